@@ -0,0 +1,388 @@
+from asyncio import IncompleteReadError, LimitOverrunError, get_running_loop, run, start_server, wait_for
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import format_datetime, formatdate, parsedate_to_datetime
+from functools import partial
+from gzip import compress
+from hashlib import sha1
+from json import dumps
+from time import time
+from urllib.parse import parse_qs, urlsplit
+
+from html_export import HTMLTemplate
+from instrumentation import count, metrics, span
+from refresh_worker import RefreshWorker
+from weather_news_mixer import (title, sources, HTML_header, load_articles, available_titles, selected_articles,
+                                render_HTML_article, render_HTML_footer)
+
+# Default address to listen on and seconds between refreshes of the mixed feed
+default_host = "127.0.0.1"
+default_port = 8080
+default_refresh_interval = 15 * 60
+
+# Seconds an idle keep-alive connection is held open
+keep_alive_timeout = 15
+
+# Rendered responses kept per snapshot, for the most recently requested formats and counts
+max_cached_responses = 128
+
+# Bodies smaller than this many bytes are sent uncompressed, as gzip would barely shrink them
+min_gzip_bytes = 1024
+
+# Content type of each format of the mixed feed
+content_types = {
+    "json": "application/json; charset=UTF-8",
+    "rss": "application/rss+xml; charset=UTF-8",
+    "html": "text/html; charset=UTF-8",
+}
+
+# RSS strings
+RSS_header = HTMLTemplate('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0">\n<channel>\n'
+                          "\t<title>{title}</title>\n\t<description>{description}</description>\n"
+                          "\t<lastBuildDate>{updated}</lastBuildDate>\n")
+RSS_item = HTMLTemplate("\t<item>\n\t\t<title>{title}</title>\n\t\t<description>{description}</description>\n"
+                        "\t\t<pubDate>{date}</pubDate>\n\t\t<source url=\"{home_page}\">{source}</source>\n\t</item>\n")
+RSS_footer = "</channel>\n</rss>\n"
+
+# Reason phrases of the statuses the server sends
+reasons = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           503: "Service Unavailable"}
+
+def RSS_date(date):
+    """
+    Convert a publish date to the RFC 822 format RSS uses.
+
+    Args:
+        date (str): The date as given by the source, in ISO 8601 or RFC 822 format.
+
+    Returns:
+        str: The RFC 822 date, or the date unchanged if it can't be parsed.
+
+    Examples:
+        >>> RSS_date("2024-05-20T01:00:00Z")
+        'Mon, 20 May 2024 01:00:00 +0000'
+    """
+    try:
+        return format_datetime(datetime.fromisoformat(date.replace("Z", "+00:00")))
+    except ValueError:
+        pass
+    try:
+        return format_datetime(parsedate_to_datetime(date))
+    except (TypeError, ValueError):
+        return date
+
+class LoopQueue:
+    """
+    A stand-in for a queue that hands every message put on it from another thread to a callback on an event loop.
+
+    Attributes:
+        loop (AbstractEventLoop): The event loop the callback runs on.
+        callback (callable): Called on the loop with each message.
+    """
+    def __init__(self, loop, callback):
+        self.loop = loop
+        self.callback = callback
+
+    def put(self, message):
+        self.loop.call_soon_threadsafe(self.callback, message)
+
+class MixedFeedServer:
+    """
+    An asyncio HTTP server for the mixed weather news, as JSON, RSS or HTML.
+
+    Requests are answered from an in-memory snapshot of every source, which a `RefreshWorker` reloads in the background
+    on a schedule, so no request ever waits on the news websites. Each format and set of counts is rendered once per
+    snapshot, then served with an ETag (answering `If-None-Match` with 304 Not Modified) and gzipped for clients that
+    accept it, so many dashboards can poll cheaply.
+
+    Routes:
+        - /news.json, /news.rss and /news.html: The mixed feed. Query parameters named after each source's command line
+          option choose how many of its articles to include, e.g. "?abc=5&sbs=3". Sources left out include all of
+          their articles, as on the command line.
+        - /metrics: The stage timings and counters, in the Prometheus text format.
+
+    Attributes:
+        batches (dict): A dict mapping each news source name to its `ArticleBatch` in the current snapshot, or `None`
+            until the first refresh finishes.
+        updated (float): The Unix time the current snapshot was loaded.
+        worker (RefreshWorker): The background worker reloading the news sources.
+
+    Examples:
+        >>> server = MixedFeedServer(interval = 300)
+        >>> asyncio.run(server.serve("0.0.0.0", 8080))
+        $ curl --compressed "http://localhost:8080/news.json?abc=5&sbs=0"
+    """
+    def __init__(self, load = load_articles, interval = default_refresh_interval):
+        self.load = load
+        self.interval = interval
+        self.batches = None
+        self.updated = None
+        self.worker = None
+        self._responses = OrderedDict()
+
+    async def serve(self, host = default_host, port = default_port):
+        """
+        Start refreshing the feed in the background and answer requests until cancelled.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on, or 0 to pick a free one.
+        """
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.worker.stop()
+
+    async def start(self, host = default_host, port = default_port):
+        """
+        Start refreshing the feed in the background and listening for requests, without waiting for either.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on, or 0 to pick a free one.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        self.worker = RefreshWorker(self.load, self.interval, results = LoopQueue(get_running_loop(), self.apply_refresh))
+        self.worker.start()
+        return await start_server(self.handle_connection, host, port)
+
+    def apply_refresh(self, message):
+        """
+        Swap in a freshly loaded snapshot posted by the refresh worker, forgetting every response rendered from the old
+        one. Failed refreshes keep the previous snapshot.
+
+        Args:
+            message (tuple): A `(kind, source, value)` message from the refresh worker.
+        """
+        kind, _, value = message
+        if kind == "finished":
+            self.batches = value
+            self.updated = time()
+            self._responses.clear()
+            count("API_snapshots_loaded")
+        elif kind == "failed":
+            count("API_snapshot_failures")
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answer every request on one connection, keeping it open between requests until the client closes it or goes
+        idle.
+
+        Args:
+            reader (StreamReader): The stream to read requests from.
+            writer (StreamWriter): The stream to write responses to.
+        """
+        try:
+            while True:
+                try:
+                    request = await wait_for(reader.readuntil(b"\r\n\r\n"), keep_alive_timeout)
+                except (IncompleteReadError, LimitOverrunError, TimeoutError, ConnectionError):
+                    break
+
+                # Split the request line and headers
+                lines = request.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    writer.write(format_response(400, {"Connection": "close"}, b"Malformed request line\n", "HTTP/1.1"))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                status, response_headers, body = self.respond(method, target, headers)
+                count("API_requests", status = status)
+
+                # HTTP/1.1 keeps connections open unless asked not to, HTTP/1.0 closes them unless asked not to
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+                writer.write(format_response(status, response_headers, body, version, include_body = method != "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, method, target, headers):
+        """
+        Work out the response to one request.
+
+        Args:
+            method (str): The request method, e.g. "GET".
+            target (str): The request target, e.g. "/news.json?abc=5".
+            headers (dict): A dict mapping each lowercase request header name to its value.
+
+        Returns:
+            tuple:
+                - int: The status code.
+                - dict: A dict mapping each response header name to its value. `Content-Length` is added later.
+                - bytes: The response body, sent in full even for HEAD requests so that its length is known.
+        """
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD", "Content-Type": "text/plain; charset=UTF-8"}, b"Only GET and HEAD are supported\n"
+
+        url = urlsplit(target)
+        if url.path == "/metrics":
+            return 200, {"Content-Type": "text/plain; version=0.0.4; charset=UTF-8"}, metrics.to_Prometheus().encode("UTF-8")
+
+        name, _, extension = url.path.rpartition(".")
+        if name != "/news" or extension not in content_types:
+            return 404, {"Content-Type": "text/plain; charset=UTF-8"}, b"Try /news.json, /news.rss or /news.html\n"
+
+        if self.batches is None:
+            return 503, {"Retry-After": "5", "Content-Type": "text/plain; charset=UTF-8"}, b"The news sources are still loading\n"
+
+        try:
+            counts = self.counts(parse_qs(url.query))
+        except ValueError as error:
+            return 400, {"Content-Type": "text/plain; charset=UTF-8"}, f"{error}\n".encode("UTF-8")
+
+        # Render each format and set of counts once per snapshot
+        key = (extension, tuple(counts.values()))
+        response = self._responses.get(key)
+        if response is None:
+            with span("API_render", format = extension):
+                response = self.render(extension, counts)
+            self._responses[key] = response
+            if len(self._responses) > max_cached_responses:
+                self._responses.popitem(last = False)
+        else:
+            self._responses.move_to_end(key)
+        body, gzipped_body, etag = response
+
+        # Send the gzipped body to clients that accept it, under its own ETag
+        use_gzip = gzipped_body is not None and "gzip" in headers.get("accept-encoding", "")
+        if use_gzip:
+            body = gzipped_body
+            etag = etag[:-1] + '-gzip"'
+
+        response_headers = {
+            "Content-Type": content_types[extension],
+            "ETag": etag,
+            "Last-Modified": formatdate(self.updated, usegmt = True),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if use_gzip:
+            response_headers["Content-Encoding"] = "gzip"
+
+        # Tell clients that already hold this version to keep it
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if "*" in tags or etag in tags:
+                return 304, response_headers, b""
+
+        return 200, response_headers, body
+
+    def counts(self, query):
+        """
+        Work out how many articles to take from each source, mirroring the spinboxes and command line options.
+
+        Args:
+            query (dict): The parsed query string, mapping each parameter to its list of values.
+
+        Returns:
+            dict: A dict mapping each news source name to its count, for every source in order.
+
+        Raises:
+            ValueError: If a count isn't a whole number of zero or more.
+        """
+        counts = {}
+        for source in sources:
+            available = available_titles(source, self.batches[source.name])
+            values = query.get(source.option)
+            if not values:
+                counts[source.name] = available
+                continue
+            if not values[-1].isdigit():
+                raise ValueError(f"{source.option} must be a whole number of zero or more, not {values[-1]!r}")
+            counts[source.name] = min(int(values[-1]), available)
+        return counts
+
+    def render(self, extension, counts):
+        """
+        Render the mixed feed in one format.
+
+        Args:
+            extension (str): The format, one of the keys of `content_types`.
+            counts (dict): A dict mapping each news source name to its count.
+
+        Returns:
+            tuple:
+                - bytes: The body.
+                - bytes: The gzipped body, or `None` if the body is too small to be worth compressing.
+                - str: The quoted ETag of the body.
+        """
+        articles = selected_articles(self.batches, counts)
+
+        if extension == "json":
+            text = dumps({
+                "title": title,
+                "updated": formatdate(self.updated, usegmt = True),
+                "articles": [{"source": article.source, "title": article.title, "date": article.date,
+                              "description": article.description, "image": article.image} for article in articles],
+            })
+        elif extension == "rss":
+            home_pages = {source.name: source.home_page for source in sources}
+            text = (RSS_header.render(title = title, description = "Weather news mixed from " + ", ".join(counts),
+                                      updated = formatdate(self.updated, usegmt = True))
+                    + "".join(RSS_item.render(title = article.title, description = article.description,
+                                              date = RSS_date(article.date), home_page = home_pages[article.source],
+                                              source = article.source) for article in articles)
+                    + RSS_footer)
+        else:
+            text = HTML_header + "".join(render_HTML_article(article) for article in articles) + render_HTML_footer()
+
+        body = text.encode("UTF-8")
+        gzipped_body = compress(body, compresslevel = 6) if len(body) >= min_gzip_bytes else None
+        return body, gzipped_body, f'"{sha1(body).hexdigest()}"'
+
+def format_response(status, headers, body, version, include_body = True):
+    """
+    Serialise a response.
+
+    Args:
+        status (int): The status code.
+        headers (dict): A dict mapping each response header name to its value.
+        body (bytes): The response body.
+        version (str): The HTTP version of the request, e.g. "HTTP/1.1".
+        include_body (bool): Whether to send the body, or only its length as for a HEAD request.
+
+    Returns:
+        bytes: The status line, headers and body.
+    """
+    headers = {"Date": formatdate(usegmt = True), **headers}
+    if status != 304:
+        headers["Content-Length"] = str(len(body))
+
+    status_line = f"{version if version in ('HTTP/1.0', 'HTTP/1.1') else 'HTTP/1.1'} {status} {reasons[status]}\r\n"
+    head = status_line + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+    return head.encode("latin-1") + (body if include_body else b"")
+
+def run_API_server(host = default_host, port = default_port, interval = default_refresh_interval, deduplicate = True):
+    """
+    Serve the mixed feed over HTTP until interrupted.
+
+    Args:
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+        interval (float): The number of seconds between refreshes of the news sources.
+        deduplicate (bool): Whether to drop near-duplicate articles across sources.
+    """
+    server = MixedFeedServer(partial(load_articles, deduplicate = deduplicate), interval)
+    print(f"Serving the mixed feed at http://{host}:{port}/news.json, /news.rss and /news.html")
+    try:
+        run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,145 @@
+class Article:
+    """
+    A single news story from any source.
+
+    Uses `__slots__` so that each article carries no per-instance `__dict__`.
+
+    Attributes:
+        source (str): The name of the news source, e.g. "ABC News".
+        title (str): The headline of the story.
+        date (str): The publish date of the story, or an empty string if the source doesn't give one.
+        description (str): The synopsis of the story, or an empty string if the source doesn't give one.
+        image (str): The URL of the story's image, or an empty string if the source doesn't give one.
+
+    Examples:
+        >>> Article("SBS News", "Heatwave hits Sydney", image = "https://example.com/heat.jpg").byline
+        '[SBS News]'
+    """
+    __slots__ = ("source", "title", "date", "description", "image")
+
+    def __init__(self, source, title, date = "", description = "", image = ""):
+        self.source = source
+        self.title = title
+        self.date = date
+        self.description = description
+        self.image = image
+
+    def __repr__(self):
+        return f"Article({self.source!r}, {self.title!r}, date = {self.date!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    @property
+    def byline(self):
+        """
+        str: The bracketed source and date shown after the headline, e.g. "[ABC News - 2024-05-20T01:00:00Z]".
+        """
+        if self.date:
+            return f"[{self.source} - {self.date}]"
+        return f"[{self.source}]"
+
+class ArticleBatch:
+    """
+    A columnar container of articles from a single news source.
+
+    Each field is stored as one list for the whole batch rather than one object per story. Fields a source never
+    provides are stored as `None` instead of a list of empty strings. `Article` records are only created on demand
+    when the batch is indexed or iterated.
+
+    Attributes:
+        source (str): The name of the news source shared by every article in the batch.
+        titles (list of str): The headlines of the stories.
+        dates (list of str or None): The publish dates, one per title, or `None` if the source has none.
+        descriptions (list of str or None): The synopses, one per title, or `None` if the source has none.
+        images (list of str or None): The image URLs, one per title, or `None` if the source has none.
+
+    Raises:
+        ValueError: If any provided column doesn't have exactly one entry per title.
+
+    Examples:
+        >>> batch = ArticleBatch("Weatherzone", ["Storms ahead", "Dry week"], dates = ["Mon", "Tue"])
+        >>> [article.title for article in batch.head(1)]
+        ['Storms ahead']
+    """
+    __slots__ = ("source", "titles", "dates", "descriptions", "images")
+
+    def __init__(self, source, titles = None, dates = None, descriptions = None, images = None):
+        self.source = source
+        self.titles = [] if titles is None else titles
+        self.dates = dates
+        self.descriptions = descriptions
+        self.images = images
+
+        # Every column must line up with the titles
+        for name in ("dates", "descriptions", "images"):
+            column = getattr(self, name)
+            if column is not None and len(column) != len(self.titles):
+                raise ValueError(f"{source} has {len(self.titles)} titles but {len(column)} {name}")
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __getitem__(self, index):
+        return Article(
+            self.source,
+            self.titles[index],
+            self.dates[index] if self.dates is not None else "",
+            self.descriptions[index] if self.descriptions is not None else "",
+            self.images[index] if self.images is not None else "",
+        )
+
+    def __iter__(self):
+        return self.head(len(self))
+
+    def __repr__(self):
+        return f"ArticleBatch({self.source!r}, {len(self)} articles)"
+
+    def append(self, title, date = "", description = "", image = ""):
+        """
+        Add one story to the end of the batch, creating any column that was previously absent.
+
+        Args:
+            title (str): The headline of the story.
+            date (str): The publish date of the story.
+            description (str): The synopsis of the story.
+            image (str): The URL of the story's image.
+        """
+        for name, value in (("dates", date), ("descriptions", description), ("images", image)):
+            column = getattr(self, name)
+            if column is None and value:
+                column = [""] * len(self.titles)
+                setattr(self, name, column)
+            if column is not None:
+                column.append(value)
+        self.titles.append(title)
+
+    def take(self, indices):
+        """
+        Build a new batch holding only the articles at the given positions.
+
+        Args:
+            indices (list of int): The positions of the articles to keep, in the order to keep them.
+
+        Returns:
+            ArticleBatch: A new batch from the same source.
+        """
+        def pick(column):
+            return None if column is None else [column[index] for index in indices]
+
+        return ArticleBatch(self.source, pick(self.titles), pick(self.dates), pick(self.descriptions), pick(self.images))
+
+    def head(self, count):
+        """
+        Yield the first `count` articles in the batch without copying any column.
+
+        Args:
+            count (int): The number of articles wanted. Counts beyond the size of the batch are clipped.
+
+        Yields:
+            Article: Each of the first `count` articles in order.
+        """
+        for index in range(min(max(count, 0), len(self))):
+            yield self[index]
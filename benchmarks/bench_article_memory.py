@@ -0,0 +1,45 @@
+from os import path
+from sys import argv, path as sys_path
+from tracemalloc import get_traced_memory, start, stop
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from article import Article, ArticleBatch
+
+# Number of articles to build, overridable from the command line
+default_size = 100_000
+
+def build_dicts(num_articles):
+    return [{"source": "ABC News", "title": f"Storm warning {i}", "date": "2024-05-20", "description": f"Rain {i}",
+             "image": f"https://example.com/{i}.jpg"} for i in range(num_articles)]
+
+def build_articles(num_articles):
+    return [Article("ABC News", f"Storm warning {i}", "2024-05-20", f"Rain {i}", f"https://example.com/{i}.jpg")
+            for i in range(num_articles)]
+
+def build_batch(num_articles):
+    batch = ArticleBatch("ABC News", [], dates = [], descriptions = [], images = [])
+    for i in range(num_articles):
+        batch.append(f"Storm warning {i}", "2024-05-20", f"Rain {i}", f"https://example.com/{i}.jpg")
+    return batch
+
+def bytes_per_article(builder, num_articles):
+    """
+    Build a collection of articles under tracemalloc and report the memory it holds per article.
+
+    Returns:
+        float: The number of bytes still allocated per article once the collection is built.
+    """
+    start()
+    collection = builder(num_articles)
+    current = get_traced_memory()[0]
+    stop()
+    del collection
+    return current / num_articles
+
+if __name__ == "__main__":
+    num_articles = int(argv[1]) if len(argv) > 1 else default_size
+
+    for name, builder in (("dict per article", build_dicts), ("Article per article", build_articles),
+                          ("ArticleBatch columns", build_batch)):
+        print(f"{name:>22}: {bytes_per_article(builder, num_articles):8.1f} bytes/article")
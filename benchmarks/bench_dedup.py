@@ -0,0 +1,91 @@
+from os import path
+from random import Random
+from sys import argv, path as sys_path
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from dedup import DuplicateIndex, normalise, shingles
+
+# Number of articles in each synthetic corpus, overridable from the command line
+default_sizes = [1_000, 10_000, 100_000, 300_000]
+
+# Largest corpus the pairwise comparison is run on, since it grows quadratically
+max_pairwise_size = 2_000
+
+# Fraction of articles that are reworded copies of an earlier article
+duplicate_fraction = 0.2
+
+# Weather words plus made-up place names, so that headlines share vocabulary the way real ones do
+weather_words = ("storm hail rain flood heatwave bushfire cyclone wind snow frost drought thunderstorm warning alert "
+                 "coast inland southeast residents crews evacuate brace record temperatures week weekend tonight severe "
+                 "damaging gusts").split()
+place_names = [f"{first}{second}" for first in ("bris", "syd", "mel", "per", "ade", "hob", "dar", "can", "cai", "tow",
+                                                "gee", "bal", "ben", "wol", "new", "mac", "roc", "bun", "mil", "kal")
+               for second in ("bane", "ney", "ton", "ville", "ford", "dale", "port", "field", "more", "gong")]
+words = weather_words + place_names
+
+def synthetic_corpus(num_articles, seed = 1609):
+    """
+    Build headlines where about `duplicate_fraction` of them are lightly reworded copies of earlier ones.
+
+    Returns:
+        tuple:
+            - list of str: The texts.
+            - list of int: For each text, the position of the original it was copied from (itself if original).
+    """
+    random = Random(seed)
+    texts = []
+    originals = []
+    for position in range(num_articles):
+        if texts and random.random() < duplicate_fraction:
+            original = originals[random.randrange(len(texts))]
+            text = texts[original].split()
+            text[random.randrange(len(text))] = random.choice(words)
+            texts.append(" ".join(text))
+            originals.append(original)
+        else:
+            texts.append(" ".join(random.choice(words) for _ in range(random.randint(10, 16))) + f" {position}")
+            originals.append(position)
+    return texts, originals
+
+def pairwise_clusters(texts, threshold):
+    # The naive approach: exact Jaccard similarity between every pair of texts
+    shingle_sets = [shingles(normalise(text)) for text in texts]
+    matches = 0
+    for first in range(len(texts)):
+        for second in range(first):
+            union = len(shingle_sets[first] | shingle_sets[second])
+            if len(shingle_sets[first] & shingle_sets[second]) / union >= threshold:
+                matches += 1
+    return matches
+
+def recall(index, originals):
+    # Fraction of copies that ended up in the same cluster as their original
+    copies = [position for position, original in enumerate(originals) if original != position]
+    if not copies:
+        return 1.0
+    found = sum(1 for position in copies if index._find(position) == index._find(originals[position]))
+    return found / len(copies)
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in argv[1:]] or default_sizes
+
+    print(f"{'articles':>9} {'LSH s':>8} {'clusters':>9} {'recall':>7} {'pairwise s':>11}")
+    for num_articles in sizes:
+        texts, originals = synthetic_corpus(num_articles)
+
+        started = perf_counter()
+        index = DuplicateIndex(threshold = 0.7)
+        for text in texts:
+            index.add(text)
+        clusters = index.clusters()
+        lsh_time = perf_counter() - started
+
+        pairwise_time = "-"
+        if num_articles <= max_pairwise_size:
+            started = perf_counter()
+            pairwise_clusters(texts, 0.7)
+            pairwise_time = f"{perf_counter() - started:.2f}"
+
+        print(f"{num_articles:>9} {lsh_time:>8.2f} {len(clusters):>9} {recall(index, originals):>7.1%} {pairwise_time:>11}")
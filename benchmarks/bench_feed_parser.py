@@ -0,0 +1,84 @@
+from os import path, remove
+from re import findall
+from sys import argv, path as sys_path
+from tempfile import mkstemp
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from feed_parser import iter_feed_items, iter_mapped_feed_items
+
+# Number of items in each synthetic feed, overridable from the command line
+default_sizes = [10_000, 100_000, 1_000_000]
+
+def write_synthetic_feed(num_items):
+    """
+    Write a Courier Mail style RSS feed with the given number of items to a temporary file.
+
+    Args:
+        num_items (int): The number of `<item>` elements to write.
+
+    Returns:
+        str: The string path of the temporary file.
+    """
+    file_descriptor, file_path = mkstemp(suffix = ".xml")
+    with open(file_descriptor, "w", encoding = "UTF-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?><rss version="0.92">\n<channel>\n')
+        file.write("\t<title>Synthetic weather news</title>\n\t<description>Benchmark feed</description>\n")
+        file.write("\t<lastBuildDate>Mon, 14 Oct 2019 00:47:30 +0000</lastBuildDate>\n")
+        for i in range(num_items):
+            file.write(f"\t<item>\n\t\t<title>Storm warning number {i} for southeast Queensland</title>\n"
+                       f"\t\t<description><![CDATA[Severe thunderstorms are expected in region {i} this afternoon.]]></description>\n"
+                       f"\t\t<link>https://example.com/news/{i}</link>\n\t\t\t</item>\n")
+        file.write("</channel>\n</rss>\n")
+    return file_path
+
+def triple_findall(file_path):
+    # The original approach: read the whole file then scan it once per field
+    with open(file_path, encoding = "UTF-8") as file:
+        file_contents = file.read()
+    titles = findall("<title>(.*)<\\/title>", file_contents)
+    dates = findall("<lastBuildDate>(.*)</lastBuildDate>", file_contents)
+    descriptions = findall("<description><!\\[CDATA\\[(.*)<\\/description>", file_contents)
+    return titles[1:], dates, descriptions
+
+def streaming_parse(file_path):
+    return [item.title for item in iter_feed_items(file_path)]
+
+def mapped_parse(file_path):
+    return [item.title for item in iter_mapped_feed_items(file_path)]
+
+def measure(function, file_path):
+    """
+    Run a parsing function untraced to time it, then again under tracemalloc to find its peak memory.
+
+    Returns:
+        tuple:
+            - float: Seconds taken.
+            - float: Peak memory in MiB.
+    """
+    started = perf_counter()
+    function(file_path)
+    elapsed = perf_counter() - started
+
+    start()
+    function(file_path)
+    peak = get_traced_memory()[1]
+    stop()
+    return elapsed, peak / 2 ** 20
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in argv[1:]] or default_sizes
+
+    print(f"{'items':>10} {'findall s':>10} {'findall MiB':>12} {'iterparse s':>12} {'iterparse MiB':>14} {'mmap s':>8} {'mmap MiB':>9}")
+    for num_items in sizes:
+        file_path = write_synthetic_feed(num_items)
+        try:
+            findall_time, findall_peak = measure(triple_findall, file_path)
+            iterparse_time, iterparse_peak = measure(streaming_parse, file_path)
+            mapped_time, mapped_peak = measure(mapped_parse, file_path)
+        finally:
+            remove(file_path)
+        print(f"{num_items:>10} {findall_time:>10.2f} {findall_peak:>12.1f} {iterparse_time:>12.2f} {iterparse_peak:>14.1f} "
+              f"{mapped_time:>8.2f} {mapped_peak:>9.1f}")
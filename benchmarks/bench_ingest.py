@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from os import cpu_count, makedirs, path
+from shutil import rmtree
+from sys import argv, path as sys_path
+from tempfile import mkdtemp
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from bulk_ingest import ingest_snapshots
+from feed_parser import iter_feed_items
+from article import Article
+from news_store import NewsStore
+
+# Days of snapshots to write and items in each snapshot, overridable from the command line
+default_days = 365
+items_per_snapshot = 50
+
+# Sources with a snapshot saved every day
+snapshot_sources = {"weatherzone": "Weatherzone", "courier-mail": "Courier Mail"}
+
+def write_snapshot_tree(directory, num_days):
+    """
+    Write one synthetic RSS snapshot per source per day, in a subdirectory per year.
+
+    Args:
+        directory (str): The string path of the directory to write the tree into.
+        num_days (int): The number of days of snapshots to write.
+    """
+    first_day = date(2015, 1, 1)
+    for day_number in range(num_days):
+        day = first_day + timedelta(days = day_number)
+        makedirs(path.join(directory, str(day.year)), exist_ok = True)
+        for option in snapshot_sources:
+            with open(path.join(directory, str(day.year), f"{day.isoformat()}-{option}.xml"), "w", encoding = "UTF-8") as file:
+                file.write('<?xml version="1.0" encoding="UTF-8"?><rss version="0.92">\n<channel>\n')
+                file.write(f"\t<title>{option} weather</title>\n\t<lastBuildDate>{day.strftime('%a, %d %b %Y')} 00:00:00 +0000</lastBuildDate>\n")
+                for i in range(items_per_snapshot):
+                    file.write(f"\t<item>\n\t\t<title>Storm warning {i} for {option} on {day}</title>\n"
+                               f"\t\t<description><![CDATA[Severe thunderstorms are expected in region {i} this afternoon.]]></description>\n"
+                               f"\t\t<link>https://example.com/{option}/{day}/{i}</link>\n\t</item>\n")
+                file.write("</channel>\n</rss>\n")
+
+def ingest_one_by_one(directory, store):
+    # The straightforward approach: parse and save each file in turn, one transaction per file
+    from bulk_ingest import find_snapshots, snapshot_source
+    for file_path in find_snapshots(directory):
+        source = snapshot_source(file_path, snapshot_sources)
+        store.save(Article(source, item.title, item.date, item.description) for item in iter_feed_items(file_path))
+
+def timed(function, *args, **kwargs):
+    started = perf_counter()
+    result = function(*args, **kwargs)
+    return perf_counter() - started, result
+
+if __name__ == "__main__":
+    num_days = int(argv[1]) if len(argv) > 1 else default_days
+    directory = mkdtemp()
+    snapshot_directory = path.join(directory, "snapshots")
+    write_snapshot_tree(snapshot_directory, num_days)
+    num_files = num_days * len(snapshot_sources)
+    print(f"{num_files} snapshots of {items_per_snapshot} items ({cpu_count()} CPUs)")
+
+    store = NewsStore(path.join(directory, "one_by_one.db"))
+    elapsed, _ = timed(ingest_one_by_one, snapshot_directory, store)
+    print(f"  one file at a time:        {elapsed:6.2f}s ({num_files / elapsed:.0f} files/s)")
+    store.close()
+
+    # Double the workers up to the number of CPUs, ingesting into a fresh database each time
+    workers = 1
+    while True:
+        store = NewsStore(path.join(directory, f"bulk_{workers}.db"))
+        elapsed, summary = timed(ingest_snapshots, snapshot_directory, store, snapshot_sources, workers = workers)
+        print(f"  ingest_snapshots, {workers:2} workers: {elapsed:6.2f}s ({num_files / elapsed:.0f} files/s, "
+              f"{summary.new_stories} stories)")
+        if workers >= (cpu_count() or 1):
+            break
+        workers = min(workers * 2, cpu_count())
+
+    # Nothing has changed, so a second run only has to look at modification times
+    elapsed, summary = timed(ingest_snapshots, snapshot_directory, store, snapshot_sources, workers = workers)
+    print(f"  re-ingest unchanged tree:  {elapsed:6.2f}s ({summary.files_skipped} files skipped)")
+    store.close()
+
+    rmtree(directory)
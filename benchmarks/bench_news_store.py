@@ -0,0 +1,63 @@
+from os import path
+from shutil import rmtree
+from sqlite3 import connect
+from sys import argv, path as sys_path
+from tempfile import mkdtemp
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from article import Article
+from news_store import NewsStore
+
+# Number of stories to save, overridable from the command line
+default_size = 100_000
+
+def synthetic_articles(num_articles, offset = 0):
+    sources = ["ABC News", "SBS News", "Weatherzone", "Courier Mail"]
+    return [Article(sources[i % 4], f"Storm warning number {i}", f"2024-05-{i % 28 + 1:02}") for i in range(offset, offset + num_articles)]
+
+def delete_and_insert(db_name, articles):
+    # The original approach: a new connection, a full wipe and one execute per row
+    SQL_connect = connect(db_name)
+    SQL_cursor = SQL_connect.cursor()
+    SQL_cursor.execute('''CREATE TABLE IF NOT EXISTS selected_stories (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        headline TEXT NOT NULL,
+                        news_feed TEXT NOT NULL,
+                        publication_date TEXT NOT NULL
+                    )''')
+    SQL_cursor.execute('''DELETE FROM `selected_stories`''')
+    for article in articles:
+        SQL_cursor.execute('''
+                            INSERT INTO selected_stories (headline, news_feed, publication_date)
+                            VALUES (?, ?, ?)
+                        ''', (article.title, article.source, article.date))
+    SQL_connect.commit()
+    SQL_connect.close()
+
+def timed(function, *args):
+    started = perf_counter()
+    result = function(*args)
+    return perf_counter() - started, result
+
+if __name__ == "__main__":
+    num_articles = int(argv[1]) if len(argv) > 1 else default_size
+    directory = mkdtemp()
+    articles = synthetic_articles(num_articles)
+    new_articles = synthetic_articles(num_articles // 100, offset = num_articles)
+
+    old_time, _ = timed(delete_and_insert, path.join(directory, "old.db"), articles)
+    old_resave_time, _ = timed(delete_and_insert, path.join(directory, "old.db"), articles + new_articles)
+
+    store = NewsStore(path.join(directory, "new.db"))
+    new_time, written = timed(store.save, articles)
+    new_resave_time, rewritten = timed(store.save, articles + new_articles)
+    store.close()
+
+    print(f"{num_articles} stories")
+    print(f"  delete-all + execute per row: first save {old_time:.2f}s, re-save with 1% new {old_resave_time:.2f}s")
+    print(f"  NewsStore executemany upsert: first save {new_time:.2f}s ({written} rows), "
+          f"re-save with 1% new {new_resave_time:.2f}s ({rewritten} rows)")
+
+    rmtree(directory)
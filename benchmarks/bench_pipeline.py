@@ -0,0 +1,319 @@
+from argparse import ArgumentParser
+from json import dump, dumps, load
+from os import chdir, cpu_count, environ, makedirs, path
+from platform import platform, python_version
+from resource import RUSAGE_SELF, getrusage
+from shutil import copyfile, move, rmtree
+from sys import exit, path as sys_path
+from tempfile import mkdtemp
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+from urllib.request import urlopen
+
+# Root of the repository, where the modules are imported from
+repository_path = path.dirname(path.dirname(path.abspath(__file__)))
+sys_path.insert(0, repository_path)
+
+from bench_feed_parser import write_synthetic_feed
+from local_feed_server import start_server
+
+# Recorded copies of the live pages, and the baseline results are compared against
+fixtures_directory = path.join(path.dirname(path.abspath(__file__)), "fixtures")
+default_baseline_path = path.join(path.dirname(path.abspath(__file__)), "baseline.json")
+
+# Number of items in each synthetic source, overridable from the command line
+default_sizes = [10, 1_000, 100_000]
+
+# A stage is reported as a regression when it takes this many times as long as the baseline, or more
+regression_ratio = 1.5
+
+# Quick stages are repeated until they have run for this many seconds in total, or this many times, keeping the best
+min_timing_seconds = 1
+max_timing_runs = 5
+
+# Stages below this many seconds in the baseline are too noisy to flag
+min_compared_seconds = 0.01
+
+# Stages in the order the pipeline runs them
+stages = ["fetch", "extract", "preview", "export_HTML", "save_SQL"]
+
+def write_ABC_page(file_path, num_items):
+    """
+    Write a page shaped like ABC News weather, with its stories in the embedded Next.js state.
+
+    Navigation links come first with titles but no publish date, as on the live page.
+
+    Args:
+        file_path (str): The string path of the page to write.
+        num_items (int): The number of stories on the page.
+    """
+    navigation = [{"title": {"children": name}, "mediaIndicator": None, "href": f"/news/{name.lower()}"}
+                  for name in ("Just In", "Weather", "Climate")]
+    stories = [{"title": {"children": f"Storm warning {i} for south-east Queensland"}, "mediaIndicator": None,
+                "firstPublished": f"2024-05-{i % 28 + 1:02}T{i % 24:02}:00:00+00:00",
+                "imgSrc": f"https://live-production.wcms.abc-cdn.net.au/{i}.jpg",
+                "synopsis": f"Severe thunderstorms are expected in region {i} this afternoon.", "id": str(i)}
+               for i in range(num_items)]
+    state = {"props": {"pageProps": {"navigation": navigation, "collection": {"items": stories}}}}
+
+    with open(file_path, "w", encoding = "UTF-8") as file:
+        file.write('<!DOCTYPE html><html><head><title>Weather - ABC News</title></head><body><div id="__next"></div>')
+        file.write('<script id="__NEXT_DATA__" type="application/json">')
+        file.write(dumps(state, separators = (",", ":")))
+        file.write("</script></body></html>")
+
+def write_SBS_page(file_path, num_items):
+    """
+    Write a page shaped like SBS News weather, with its stories in the embedded Next.js state.
+
+    The page's own title comes before the stories and the footer's title and logo after them, as on the live page.
+
+    Args:
+        file_path (str): The string path of the page to write.
+        num_items (int): The number of stories on the page.
+    """
+    stories = [{"title": f"Heatwave {i} to hit Sydney this weekend", "image": f"https://images.sbs.com.au/{i}.jpg",
+                "url": f"/news/article/heatwave-{i}"} for i in range(num_items)]
+    state = {"props": {"pageProps": {"page": {"title": "Weather", "description": "Latest weather news"},
+                                     "tiles": stories, "footer": {"title": "SBS News", "image": "https://www.sbs.com.au/logo.png", "id": 1}}}}
+
+    with open(file_path, "w", encoding = "UTF-8") as file:
+        file.write('<!DOCTYPE html><html><head><title>Weather | SBS News</title></head><body><div id="__next"></div>')
+        file.write('<script id="__NEXT_DATA__" type="application/json">')
+        file.write(dumps(state, separators = (",", ":")))
+        file.write("</script></body></html>")
+
+def write_fixtures(directory, num_items):
+    """
+    Write a synthetic copy of every source with the given number of items, or copy the recorded pages.
+
+    Args:
+        directory (str): The string path of the directory to serve the pages from.
+        num_items (int): The number of items in each source, or `None` to use the recorded fixtures.
+
+    Returns:
+        list of dict: Source configs for the ABC, SBS and RSS fixtures, with locations relative to the server.
+    """
+    makedirs(directory, exist_ok = True)
+    if num_items is None:
+        copyfile(path.join(fixtures_directory, "abc.html"), path.join(directory, "abc.html"))
+        copyfile(path.join(fixtures_directory, "sbs.html"), path.join(directory, "sbs.html"))
+        feed_path = path.join(repository_path, "data", "xml_files", "2019-10-14-courier-mail.xml")
+    else:
+        write_ABC_page(path.join(directory, "abc.html"), num_items)
+        write_SBS_page(path.join(directory, "sbs.html"), num_items)
+        feed_path = path.join(directory, "feed.xml")
+        move(write_synthetic_feed(num_items), feed_path)
+
+    # Generous timeouts, as the largest pages take a while to build and parse
+    return [
+        {"name": "ABC News", "fetcher": "http", "parser": "abc", "location": "/abc.html", "timeout": 600},
+        {"name": "SBS News", "fetcher": "http", "parser": "sbs", "location": "/sbs.html", "timeout": 600},
+        {"name": "Courier Mail", "fetcher": "file", "parser": "rss", "location": feed_path, "timeout": 600},
+    ]
+
+def measure(function):
+    """
+    Run a stage untraced to time it, then again under tracemalloc to find its peak memory.
+
+    Quick stages are timed several times and the best run is kept, as the slower runs only add noise.
+
+    Returns:
+        tuple:
+            - float: Seconds taken by the best run.
+            - float: Peak memory in MiB.
+            - object: The result of the first untraced run.
+    """
+    timings = []
+    while len(timings) < max_timing_runs and sum(timings) < min_timing_seconds:
+        started = perf_counter()
+        outcome = function()
+        timings.append(perf_counter() - started)
+        if len(timings) == 1:
+            result = outcome
+    del outcome
+
+    start()
+    function()
+    peak = get_traced_memory()[1]
+    stop()
+    return min(timings), peak / 2 ** 20, result
+
+def run_pipeline(mixer, source_configs, directory):
+    """
+    Run every stage of the mixer over one set of fixtures, the way the command line does.
+
+    Args:
+        mixer (module): The imported `weather_news_mixer` module.
+        source_configs (list of dict): The source configs from `write_fixtures`, with full locations.
+        directory (str): The string path of a scratch directory for the HTML export and database.
+
+    Returns:
+        tuple:
+            - dict: A dict mapping each stage to its seconds and peak MiB.
+            - int: The number of articles that went through the pipeline.
+    """
+    from source_registry import Source, fetchers, parsers
+
+    sources = [Source(config) for config in source_configs]
+    results = {}
+
+    # Fetch every source, then extract its articles, one stage at a time
+    def fetch():
+        return {source.name: fetchers[source.fetcher](source, None) for source in sources}
+
+    seconds, peak, contents = measure(fetch)
+    results["fetch"] = {"seconds": seconds, "peak_MiB": peak}
+
+    def extract():
+        return {source.name: parsers[source.parser](source, contents[source.name]) for source in sources}
+
+    seconds, peak, batches = measure(extract)
+    results["extract"] = {"seconds": seconds, "peak_MiB": peak}
+    del contents
+    counts = {name: len(batch) for name, batch in batches.items()}
+
+    def preview():
+        return sum(len(mixer.preview_line(article)) for article in mixer.selected_articles(batches, counts))
+
+    seconds, peak, _ = measure(preview)
+    results["preview"] = {"seconds": seconds, "peak_MiB": peak}
+
+    # Export without downloading images, so only the mixer's own work is timed
+    mixer.HTML_file_name = path.join(directory, "news.html")
+    seconds, peak, _ = measure(lambda: mixer.export_to_HTML(mixer.selected_articles(batches, counts), images = "remote"))
+    results["export_HTML"] = {"seconds": seconds, "peak_MiB": peak}
+
+    # Save into a fresh database each run, so every run writes every row
+    from news_store import NewsStore
+    run_number = []
+
+    def save():
+        run_number.append(None)
+        mixer.news_store = NewsStore(path.join(directory, f"news_log_{len(run_number)}.db"))
+        try:
+            return mixer.save_to_SQL(mixer.selected_articles(batches, counts))
+        finally:
+            mixer.news_store.close()
+
+    seconds, peak, _ = measure(save)
+    results["save_SQL"] = {"seconds": seconds, "peak_MiB": peak}
+
+    return results, sum(counts.values())
+
+def compare(results, baseline):
+    """
+    Compare every stage against the baseline.
+
+    Args:
+        results (dict): A dict mapping each size label to its stage results, as from `run_pipeline`.
+        baseline (dict): Results in the same shape, loaded from the baseline file.
+
+    Returns:
+        list of str: A description of every stage that slowed down by `regression_ratio` or more.
+    """
+    regressions = []
+    for size, stage_results in results.items():
+        for stage, result in stage_results.items():
+            expected = baseline.get(size, {}).get(stage)
+            if expected is None or expected["seconds"] < min_compared_seconds:
+                continue
+            ratio = result["seconds"] / expected["seconds"]
+            if ratio >= regression_ratio:
+                regressions.append(f"{stage} at {size} items: {result['seconds']:.3f}s vs {expected['seconds']:.3f}s "
+                                   f"({ratio:.2f}x)")
+    return regressions
+
+def record_fixtures():
+    """
+    Download the live ABC News and SBS News pages into the fixtures directory.
+    """
+    makedirs(fixtures_directory, exist_ok = True)
+    with open(path.join(repository_path, "data", "sources.json"), encoding = "UTF-8") as file:
+        configs = {config.get("option"): config for config in load(file)}
+
+    for option in ("abc", "sbs"):
+        with urlopen(configs[option]["location"], timeout = 30) as response:
+            page = response.read()
+        with open(path.join(fixtures_directory, f"{option}.html"), "wb") as file:
+            file.write(page)
+        print(f"Recorded {configs[option]['location']} ({len(page)} bytes)")
+
+def run_benchmarks(sizes, baseline_path, save_baseline):
+    """
+    Time every stage over each size of synthetic fixtures, plus the recorded fixtures when there are any.
+
+    Returns:
+        int: The exit status, 1 if any stage regressed against the baseline.
+    """
+    directory = mkdtemp()
+
+    # Import the mixer from a scratch directory so that its database isn't created in the repository
+    environ.setdefault("WEATHER_NEWS_MIXER_SOURCES", path.join(repository_path, "data", "sources.json"))
+    chdir(directory)
+    import weather_news_mixer as mixer
+
+    labels = [str(size) for size in sizes]
+    if path.exists(path.join(fixtures_directory, "abc.html")) and path.exists(path.join(fixtures_directory, "sbs.html")):
+        labels.append("recorded")
+
+    baseline = {}
+    if path.exists(baseline_path) and not save_baseline:
+        with open(baseline_path, encoding = "UTF-8") as file:
+            baseline = load(file)["results"]
+
+    print(f"{'items':>10} {'stage':>12} {'seconds':>9} {'articles/s':>11} {'peak MiB':>9} {'baseline':>9}")
+    results = {}
+    try:
+        for label in labels:
+            size_directory = path.join(directory, label)
+            source_configs = write_fixtures(path.join(size_directory, "pages"), None if label == "recorded" else int(label))
+
+            # Serve the pages from a local stand-in for the live websites
+            server, base_url = start_server(path.join(size_directory, "pages"))
+            for config in source_configs:
+                if config["fetcher"] == "http":
+                    config["location"] = base_url + config["location"]
+            try:
+                results[label], num_articles = run_pipeline(mixer, source_configs, size_directory)
+            finally:
+                server.shutdown()
+                server.server_close()
+            rmtree(size_directory)
+
+            for stage in stages:
+                result = results[label][stage]
+                expected = baseline.get(label, {}).get(stage)
+                versus = f"{result['seconds'] / expected['seconds']:8.2f}x" if expected and expected["seconds"] else f"{'-':>9}"
+                print(f"{label:>10} {stage:>12} {result['seconds']:>9.3f} {num_articles / max(result['seconds'], 1e-9):>11.0f} "
+                      f"{result['peak_MiB']:>9.1f} {versus}")
+    finally:
+        chdir(repository_path)
+        rmtree(directory)
+
+    print(f"Max RSS {getrusage(RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+    if save_baseline:
+        with open(baseline_path, "w", encoding = "UTF-8") as file:
+            dump({"machine": {"platform": platform(), "python": python_version(), "cpus": cpu_count()},
+                  "results": results}, file, indent = 4)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description = "Time every stage of the mixer end to end against local fixtures.")
+    parser.add_argument("sizes", nargs = "*", type = int, help = f"items per synthetic source (default: {default_sizes})")
+    parser.add_argument("--record", action = "store_true", help = "download the live ABC and SBS pages as fixtures and exit")
+    parser.add_argument("--baseline", default = default_baseline_path, metavar = "FILE", help = "baseline results to compare against")
+    parser.add_argument("--save-baseline", action = "store_true", help = "store these results as the new baseline")
+    arguments = parser.parse_args()
+
+    if arguments.record:
+        record_fixtures()
+    else:
+        exit(run_benchmarks(arguments.sizes or default_sizes, arguments.baseline, arguments.save_baseline))
@@ -0,0 +1,77 @@
+from os import path
+from random import Random
+from shutil import rmtree
+from sys import argv, path as sys_path
+from tempfile import mkdtemp
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from article import Article
+from news_store import NewsStore
+
+# Number of stories to archive, overridable from the command line
+default_size = 1_000_000
+
+# Stories saved per call, like a long history of separate saves
+save_size = 10_000
+
+# Times each query is repeated to average its latency
+repeats = 20
+
+weather_words = ["storm", "hail", "flood", "heatwave", "rain", "cyclone", "bushfire", "frost", "wind", "drought",
+                 "warning", "forecast", "record", "temperature", "snow", "thunderstorm", "humidity", "fog"]
+filler_words = ["residents", "told", "to", "prepare", "as", "conditions", "worsen", "across", "the", "state", "week",
+                "weekend", "expected", "bureau", "says", "emergency", "services", "on", "alert", "for"]
+
+def synthetic_articles(num_articles, offset, random):
+    # Each story mixes a few weather words with filler and one of many place names, so words range from rare to common.
+    # Stories are dated in the order they're saved, 100,000 a year
+    sources = ["ABC News", "SBS News", "Weatherzone", "Courier Mail"]
+    articles = []
+    for i in range(offset, offset + num_articles):
+        place = f"Town{random.randrange(5000)}"
+        title = " ".join(random.sample(weather_words, 2) + [place])
+        description = " ".join(random.sample(weather_words, 2) + random.sample(filler_words, 8))
+        date = f"{2010 + i // 100_000}-{i // 10_000 % 10 + 1:02}-{i // 300 % 28 + 1:02}T00:00:00Z"
+        articles.append(Article(sources[i % 4], title, date, description))
+    return articles
+
+def time_query(store, *args):
+    started = perf_counter()
+    for _ in range(repeats):
+        results = store.search(*args)
+    return (perf_counter() - started) / repeats * 1000, len(results)
+
+if __name__ == "__main__":
+    num_articles = int(argv[1]) if len(argv) > 1 else default_size
+    directory = mkdtemp()
+    random = Random(0)
+
+    store = NewsStore(path.join(directory, "archive.db"))
+    save_times = []
+    for offset in range(0, num_articles, save_size):
+        articles = synthetic_articles(min(save_size, num_articles - offset), offset, random)
+        started = perf_counter()
+        store.save(articles)
+        save_times.append(perf_counter() - started)
+
+    print(f"{store.count()} stories archived in {sum(save_times):.1f}s, "
+          f"last save of {save_size} indexed in {save_times[-1] * 1000:.0f}ms")
+
+    queries = [
+        ("rare place name", ("Town1234",)),
+        ("rare place name and word", ("hail Town1234",)),
+        ("common word", ("storm",)),
+        ("common word, newest 2,000", ("storm", None, None, 20, 2000)),
+        ("two common words", ("storm warning",)),
+        ("common word in a month", ("storm", "2010-03-01", "2010-03-31")),
+        ("a month, newest first", ("", "2010-03-01", "2010-03-31")),
+        ("no keywords, newest first", ("",)),
+    ]
+    for label, args in queries:
+        latency, num_results = time_query(store, *args)
+        print(f"  {label:28} {latency:8.2f}ms ({num_results} results)")
+
+    store.close()
+    rmtree(directory)
@@ -0,0 +1,46 @@
+from os import path
+from statistics import median
+from subprocess import run
+from sys import argv, executable
+from time import perf_counter
+
+# Root of the repository, where the modules are imported from
+repository_path = path.dirname(path.dirname(path.abspath(__file__)))
+
+# Number of times each command is run, overridable from the command line
+default_runs = 10
+
+def time_command(arguments, runs):
+    """
+    Run a Python command several times in fresh interpreters and report the median wall time.
+
+    Args:
+        arguments (list of str): The arguments to pass to the Python interpreter.
+        runs (int): The number of times to run the command.
+
+    Returns:
+        float: The median number of seconds taken.
+    """
+    timings = []
+    for _ in range(runs):
+        started = perf_counter()
+        run([executable] + arguments, cwd = repository_path, check = True, capture_output = True)
+        timings.append(perf_counter() - started)
+    return median(timings)
+
+if __name__ == "__main__":
+    runs = next((int(argument) for argument in argv[1:] if argument.isdigit()), default_runs)
+
+    commands = [
+        ("bare interpreter", ["-c", "pass"]),
+        ("CLI import (no tkinter)", ["-c", "import weather_news_mixer"]),
+        ("CLI --help", ["-m", "weather_news_mixer", "--help"]),
+        ("GUI import (tkinter)", ["-c", "import mixer_gui"]),
+    ]
+
+    # Fetching needs network access, so only time it when asked
+    if "--with-fetch" in argv:
+        commands.append(("CLI fetch", ["-m", "weather_news_mixer", "fetch"]))
+
+    for name, arguments in commands:
+        print(f"{name:>24}: {time_command(arguments, runs) * 1000:7.1f} ms")
@@ -0,0 +1,208 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from hashlib import sha1
+from io import BytesIO
+from os import cpu_count, path, stat, walk
+from re import match
+
+from article import Article
+from feed_parser import declared_encoding, iter_buffer_feed_items, iter_feed_items
+from news_store import story_row
+
+# Snapshot files handed to a worker process at a time
+chunk_size = 32
+
+# Chunks waiting on or returned from each worker before more are handed out, bounding memory use
+chunks_per_worker = 2
+
+# Stories held in memory before they are written to the database in one transaction
+write_batch_size = 10_000
+
+# Snapshot file names start with the day they were saved, e.g. "2019-10-14-courier-mail.xml"
+snapshot_name_pattern = r"(\d{4}-\d{2}-\d{2})-(.+)\.xml$"
+
+# Totals reported once an ingest finishes
+IngestSummary = namedtuple("IngestSummary", ["files_parsed", "files_skipped", "new_stories"])
+
+def find_snapshots(directory):
+    """
+    List every XML snapshot in a directory tree.
+
+    Args:
+        directory (str): The string path of the directory to search, including all of its subdirectories.
+
+    Returns:
+        list of str: The absolute string paths of the snapshot files, sorted so that dated names come out in date order.
+    """
+    snapshots = []
+    for directory_path, _, file_names in walk(directory):
+        snapshots.extend(path.abspath(path.join(directory_path, file_name)) for file_name in file_names
+                         if file_name.endswith(".xml"))
+    return sorted(snapshots)
+
+def snapshot_source(file_path, source_names):
+    """
+    Work out which news source a snapshot file belongs to from its name.
+
+    Args:
+        file_path (str): The string path of the snapshot file, e.g. "data/xml_files/2019-10-14-courier-mail.xml".
+        source_names (dict): A dict mapping each source's command line option to the source's name.
+
+    Returns:
+        str: The name of the news source, or the part of the file name after the date when no source uses it.
+
+    Examples:
+        >>> snapshot_source("archive/2019-10-14-courier-mail.xml", {"courier-mail": "Courier Mail"})
+        'Courier Mail'
+    """
+    file_name = path.basename(file_path)
+    name_match = match(snapshot_name_pattern, file_name)
+    option = name_match.group(2) if name_match else path.splitext(file_name)[0]
+    return source_names.get(option, option)
+
+def parse_snapshot(file_path, source, previous_hash = None):
+    """
+    Read one snapshot file, hash it and parse its items into rows ready to save, unless its contents were ingested
+    before.
+
+    Items without a date of their own, and whose feed has no date either, take the date in the file name.
+
+    Args:
+        file_path (str): The string path of the snapshot file.
+        source (str): The name of the news source the snapshot belongs to.
+        previous_hash (str): The content hash recorded when the file was last ingested, or `None` if it never was.
+
+    Returns:
+        tuple: The content hash of the file, and its stories as rows from `story_row`, or `None` when the contents
+            match `previous_hash`.
+    """
+    with open(file_path, "rb") as file:
+        file_contents = file.read()
+
+    file_hash = sha1(file_contents).hexdigest()
+    if file_hash == previous_hash:
+        return file_hash, None
+
+    name_match = match(snapshot_name_pattern, path.basename(file_path))
+    snapshot_date = name_match.group(1) if name_match else ""
+
+    # Scan the bytes already read, unless the feed's encoding needs a full XML parser
+    encoding = declared_encoding(file_contents)
+    items = iter_buffer_feed_items(file_contents, encoding) if encoding else iter_feed_items(BytesIO(file_contents))
+
+    rows = [story_row(Article(source, item.title, item.date or snapshot_date, item.description)) for item in items]
+    return file_hash, rows
+
+def parse_snapshot_chunk(chunk):
+    """
+    Parse a chunk of snapshot files in a worker process.
+
+    Args:
+        chunk (list of tuple): The string path, source name and previously recorded content hash of each file.
+
+    Returns:
+        list of tuple: The string path, content hash and rows (or `None`) of each file, in chunk order.
+    """
+    return [(file_path, *parse_snapshot(file_path, source, previous_hash)) for file_path, source, previous_hash in chunk]
+
+def parsed_chunks(chunks, workers):
+    """
+    Parse chunks of snapshot files across a pool of processes, yielding each chunk's results as soon as it is ready.
+
+    Only a few chunks per worker are in flight at once, so a slow database can't make parsed results pile up.
+
+    Args:
+        chunks (list of list of tuple): The chunks to parse, as taken by `parse_snapshot_chunk`.
+        workers (int): The number of worker processes. With one worker the chunks are parsed in this process.
+
+    Yields:
+        list of tuple: The results of one chunk, as returned by `parse_snapshot_chunk`, in the order chunks finish.
+    """
+    if workers == 1:
+        yield from map(parse_snapshot_chunk, chunks)
+        return
+
+    remaining = iter(chunks)
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        in_flight = set()
+        while True:
+            # Keep every worker busy without queueing the whole tree
+            for chunk in remaining:
+                in_flight.add(executor.submit(parse_snapshot_chunk, chunk))
+                if len(in_flight) >= workers * chunks_per_worker:
+                    break
+            if not in_flight:
+                return
+
+            done, in_flight = wait(in_flight, return_when = FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def ingest_snapshots(directory, store, source_names = None, workers = None):
+    """
+    Bulk ingest a directory tree of dated RSS snapshots into the news store.
+
+    Snapshots are parsed in chunks across a pool of processes, which also prepare every row to be saved. The main
+    process only writes the rows to the database, in large batches as the chunks come back, while the workers carry on
+    parsing. Files whose modification time and size haven't changed since they were last ingested are skipped without
+    being read. Changed files are re-hashed and only parsed when their contents differ, and files with the same
+    contents as any file already ingested are skipped after hashing.
+
+    Args:
+        directory (str): The string path of the directory tree holding the snapshots.
+        store (NewsStore): The store to save the stories into.
+        source_names (dict): A dict mapping each source's command line option to the source's name, used to attribute
+            snapshots to sources by file name.
+        workers (int): The number of worker processes, or `None` for one per CPU.
+
+    Returns:
+        IngestSummary: The number of files parsed, files skipped and new stories saved.
+
+    Examples:
+        >>> ingest_snapshots("archive", news_store, {"weatherzone": "Weatherzone"})
+        IngestSummary(files_parsed=3650, files_skipped=0, new_stories=21900)
+    """
+    source_names = source_names or {}
+    workers = workers or cpu_count() or 1
+
+    # Skip files that haven't been touched since they were last ingested
+    ingested = store.ingested_files()
+    known_hashes = {file_hash for _, _, file_hash in ingested.values()}
+    file_stats = {}
+    pending = []
+    files_skipped = 0
+    for file_path in find_snapshots(directory):
+        file_stat = stat(file_path)
+        record = ingested.get(file_path)
+        if record is not None and record[:2] == (file_stat.st_mtime, file_stat.st_size):
+            files_skipped += 1
+            continue
+        file_stats[file_path] = (file_stat.st_mtime, file_stat.st_size)
+        pending.append((file_path, snapshot_source(file_path, source_names), record[2] if record else None))
+
+    chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+
+    # Stream parsed stories into the database in batches, recording each file once its stories are saved
+    files_parsed = 0
+    new_stories = 0
+    rows = []
+    files = []
+    for results in parsed_chunks(chunks, workers):
+        for file_path, file_hash, file_rows in results:
+            files.append((file_path, *file_stats[file_path], file_hash))
+            if file_rows is None or file_hash in known_hashes:
+                files_skipped += 1
+                continue
+            known_hashes.add(file_hash)
+            rows.extend(file_rows)
+            files_parsed += 1
+
+        if len(rows) >= write_batch_size:
+            new_stories += store.save_rows(rows)
+            store.record_ingested(files)
+            rows = []
+            files = []
+
+    new_stories += store.save_rows(rows)
+    store.record_ingested(files)
+    return IngestSummary(files_parsed, files_skipped, new_stories)
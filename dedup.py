@@ -0,0 +1,240 @@
+from operator import eq
+from re import compile as compile_pattern
+from zlib import crc32
+
+# Anything that isn't a letter or digit is treated as a word break when normalising
+non_word_pattern = compile_pattern(r"[^0-9a-z]+")
+
+# Signature and banding sizes: 16 bands of 4 rows find pairs at about 50% similarity or more
+num_bins = 64
+num_bands = 16
+shingle_size = 4
+
+# Most articles remembered per LSH bucket, so that very common buckets can't make matching quadratic
+max_bucket_size = 8
+
+# Value of a signature bin that no shingle hashed into
+empty_bin = 1 << 32
+
+def normalise(text):
+    """
+    Lower-case text and reduce it to words separated by single spaces.
+
+    Args:
+        text (str): The text to normalise.
+
+    Returns:
+        str: The normalised text.
+
+    Examples:
+        >>> normalise("WATCH: Hail smashes south-east!")
+        'watch hail smashes south east'
+    """
+    return non_word_pattern.sub(" ", text.lower()).strip()
+
+def shingles(text, size = shingle_size):
+    """
+    Split text into its set of overlapping character shingles.
+
+    Args:
+        text (str): The normalised text.
+        size (int): The number of characters in each shingle.
+
+    Returns:
+        set of str: The shingles, or the whole text if it is shorter than one shingle.
+    """
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def signature(shingle_set):
+    """
+    Compute a one-permutation MinHash signature for a set of shingles.
+
+    Each shingle is hashed once. The hash picks one of `num_bins` bins, and every bin keeps the smallest value that
+    lands in it. Empty bins borrow the value of the next non-empty bin so that short texts still have a full signature.
+    Two signatures agree in each bin with a probability close to the Jaccard similarity of their shingle sets.
+
+    Args:
+        shingle_set (set of str): The shingles of a normalised text.
+
+    Returns:
+        tuple of int: The `num_bins` values of the signature.
+    """
+    bins = [empty_bin] * num_bins
+    for shingle in shingle_set:
+        hashed = crc32(shingle.encode("UTF-8"))
+        index = hashed % num_bins
+        value = hashed // num_bins
+        if value < bins[index]:
+            bins[index] = value
+
+    # Fill empty bins from the next non-empty bin, offset by the distance so that borrowed values stay distinct
+    if empty_bin in bins and len(set(bins)) > 1:
+        for index in range(num_bins):
+            distance = 1
+            while bins[index] == empty_bin:
+                borrowed = bins[(index + distance) % num_bins]
+                if borrowed < empty_bin:
+                    bins[index] = borrowed + distance * empty_bin
+                distance += 1
+    return tuple(bins)
+
+def similarity(first, second):
+    """
+    Estimate the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        first (tuple of int): The signature of the first text.
+        second (tuple of int): The signature of the second text.
+
+    Returns:
+        float: The fraction of bins the signatures agree on.
+    """
+    return sum(map(eq, first, second)) / num_bins
+
+class DuplicateIndex:
+    """
+    A locality-sensitive hashing index that groups near-duplicate texts without comparing every pair.
+
+    Each signature is cut into `num_bands` bands. Texts sharing any whole band land in the same bucket and become
+    candidates, and only candidates have their signatures compared. Matching texts are joined into clusters with a
+    union-find, so adding n texts takes roughly linear time. Texts can be added with a group, such as their news
+    source, and a cluster never holds two texts of the same group.
+
+    Attributes:
+        threshold (float): The estimated similarity at or above which two texts are duplicates.
+
+    Examples:
+        >>> index = DuplicateIndex(threshold = 0.7)
+        >>> index.add("Hail hits Brisbane suburbs", group = "ABC News")
+        0
+        >>> index.add("Hail hits Brisbane suburbs again", group = "SBS News")
+        1
+        >>> index.add("Hail hits Brisbane suburbs", group = "ABC News")
+        2
+        >>> index.clusters()
+        [[0, 1]]
+    """
+    def __init__(self, threshold = 0.7):
+        self.threshold = threshold
+        self._buckets = {}
+        self._signatures = []
+        self._parents = []
+        self._cluster_groups = []
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, text, group = None):
+        """
+        Add a text to the index and join it to any near-duplicate already added, unless their clusters share a group.
+
+        Args:
+            text (str): The text to add. It is normalised before hashing.
+            group (hashable): The group of the text, e.g. its news source, or `None` to join it to any near-duplicate.
+
+        Returns:
+            int: The position of the text in the index, in the order texts were added.
+        """
+        key = len(self._signatures)
+        text_signature = signature(shingles(normalise(text)))
+        self._signatures.append(text_signature)
+        self._parents.append(key)
+        self._cluster_groups.append(set() if group is None else {group})
+
+        rows = num_bins // num_bands
+        checked = set()
+        for band in range(num_bands):
+            bucket_key = (band, text_signature[band * rows:(band + 1) * rows])
+            bucket = self._buckets.setdefault(bucket_key, [])
+
+            # Compare against earlier texts sharing this band, once each, skipping any already in the same cluster
+            for other in bucket:
+                if other not in checked:
+                    checked.add(other)
+                    if self._joinable(key, other) and similarity(text_signature, self._signatures[other]) >= self.threshold:
+                        self._union(key, other)
+
+            if len(bucket) < max_bucket_size:
+                bucket.append(key)
+        return key
+
+    def clusters(self):
+        """
+        Returns:
+            list of list of int: The positions of every group of two or more near-duplicate texts.
+        """
+        groups = {}
+        for key in range(len(self._parents)):
+            groups.setdefault(self._find(key), []).append(key)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def _find(self, key):
+        while self._parents[key] != key:
+            self._parents[key] = self._parents[self._parents[key]]
+            key = self._parents[key]
+        return key
+
+    def _joinable(self, first, second):
+        # Texts can only be joined if they are in different clusters with no group in common
+        first_root = self._find(first)
+        second_root = self._find(second)
+        return first_root != second_root and self._cluster_groups[first_root].isdisjoint(self._cluster_groups[second_root])
+
+    def _union(self, first, second):
+        first_root = self._find(first)
+        second_root = self._find(second)
+        if first_root != second_root:
+            root, child = min(first_root, second_root), max(first_root, second_root)
+            self._parents[child] = root
+            self._cluster_groups[root] |= self._cluster_groups[child]
+            self._cluster_groups[child] = set()
+
+def article_score(article):
+    """
+    Rank how complete an article is, to pick the best of a group of duplicates.
+
+    Args:
+        article (Article): The article to rank.
+
+    Returns:
+        tuple: A sortable score preferring articles with an image, a description and a date, then longer descriptions.
+    """
+    return (bool(article.image), bool(article.description), bool(article.date), len(article.description))
+
+def deduplicate_batches(batches, threshold = 0.7):
+    """
+    Remove near-duplicate articles across every source, keeping the most complete article of each group.
+
+    Articles are compared on their normalised titles alone, as each outlet writes its own description of a story (if
+    it has one at all). Only articles from different sources are merged, as similar headlines from one source (e.g.
+    templated weather warnings for different regions) are different stories. When articles tie, the one from the
+    earlier source is kept.
+
+    Args:
+        batches (dict): A dict mapping each news source name to its `ArticleBatch`.
+        threshold (float): The estimated similarity at or above which two articles are duplicates.
+
+    Returns:
+        dict: A dict mapping each news source name to a new `ArticleBatch` without the dropped duplicates.
+
+    Examples:
+        >>> deduplicate_batches({"ABC News": abc_batch, "SBS News": sbs_batch})
+        {'ABC News': ArticleBatch('ABC News', 20 articles), 'SBS News': ArticleBatch('SBS News', 9 articles)}
+    """
+    index = DuplicateIndex(threshold)
+    positions = []
+    for source, batch in batches.items():
+        for position, title in enumerate(batch.titles):
+            index.add(title, group = source)
+            positions.append((source, position))
+
+    # Drop all but the best article of each cluster
+    dropped = set()
+    for cluster in index.clusters():
+        best = max(cluster, key = lambda key: (article_score(batches[positions[key][0]][positions[key][1]]), -key))
+        dropped.update(positions[key] for key in cluster if key != best)
+
+    return {source: batch.take([position for position in range(len(batch)) if (source, position) not in dropped])
+            for source, batch in batches.items()}
@@ -0,0 +1,308 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPHandler, HTTPSHandler, build_opener, urlopen
+
+from instrumentation import count
+
+# Default number of seconds allowed for each source before it is abandoned
+default_timeout = 10
+
+# Default number of seconds allowed to connect to a news website, within the source's timeout
+default_connect_timeout = 3
+
+# Most sources fetched at the same time
+max_workers = 32
+
+# Most attempts at downloading a page, and the cap on the exponentially growing wait between them
+max_attempts = 3
+backoff_base = 0.25
+backoff_max = 2
+
+# Failures in a row that open a source's circuit breaker, and seconds before it lets a trial request through
+breaker_failure_threshold = 3
+breaker_reset_timeout = 60
+
+class SourceTimeoutError(TimeoutError):
+    """
+    Raised when a task doesn't finish within its deadline.
+    """
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of loading a source whose circuit breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    A circuit breaker that stops loading a source after repeated failures, then tries again once it has cooled off.
+
+    The breaker starts closed. After `failure_threshold` failures in a row it opens, and every call is refused
+    straight away. Once `reset_timeout` seconds have passed it lets one trial call through: success closes it again,
+    failure keeps it open for another `reset_timeout`.
+
+    Attributes:
+        failure_threshold (int): The number of failures in a row that opens the breaker.
+        reset_timeout (float): The number of seconds the breaker stays open before a trial call.
+        failures (int): The number of failures in a row so far.
+
+    Examples:
+        >>> breaker = CircuitBreaker()
+        >>> if breaker.allow():
+        ...     breaker.record_success()
+    """
+    def __init__(self, failure_threshold = breaker_failure_threshold, reset_timeout = breaker_reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        """
+        str: "closed" when calls go through, "open" when they are refused, or "half-open" when a trial is due.
+        """
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """
+        Check whether a call may go ahead, letting only one trial through at a time once the breaker has cooled off.
+
+        Returns:
+            bool: Whether to make the call.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Close the breaker after a successful call.
+        """
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """
+        Count a failed call, opening the breaker once there have been too many in a row.
+        """
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold:
+                self._opened_at = monotonic()
+
+class ReadTimeoutMixin:
+    # Switch the socket to the read timeout once connected, so the request's own timeout only limits connecting
+    def __init__(self, *args, read_timeout = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_timeout = read_timeout
+
+    def connect(self):
+        super().connect()
+        if self.read_timeout is not None:
+            self.sock.settimeout(self.read_timeout)
+
+class ReadTimeoutHTTPConnection(ReadTimeoutMixin, HTTPConnection):
+    pass
+
+class ReadTimeoutHTTPSConnection(ReadTimeoutMixin, HTTPSConnection):
+    pass
+
+class ReadTimeoutHTTPHandler(HTTPHandler):
+    def __init__(self, read_timeout):
+        super().__init__()
+        self.read_timeout = read_timeout
+
+    def http_open(self, request):
+        return self.do_open(partial(ReadTimeoutHTTPConnection, read_timeout = self.read_timeout), request)
+
+class ReadTimeoutHTTPSHandler(HTTPSHandler):
+    def __init__(self, read_timeout):
+        super().__init__()
+        self.read_timeout = read_timeout
+
+    def https_open(self, request):
+        return self.do_open(partial(ReadTimeoutHTTPSConnection, read_timeout = self.read_timeout), request, context = self._context)
+
+def open_URL(request, timeout, connect_timeout = None):
+    """
+    Open a URL with separate limits on connecting and on waiting for each read.
+
+    Args:
+        request (str or Request): The URL or request to open.
+        timeout (float): The number of seconds to wait for each read from the socket.
+        connect_timeout (float): The number of seconds to wait for the connection (and TLS handshake), or `None` to
+            use `timeout`.
+
+    Returns:
+        http.client.HTTPResponse: The open response.
+
+    Examples:
+        >>> with open_URL("https://www.abc.net.au/news/weather", timeout = 10, connect_timeout = 3) as response:
+        ...     page = response.read()
+    """
+    if connect_timeout is None or timeout is None or connect_timeout >= timeout:
+        return urlopen(request, timeout = timeout)
+
+    opener = build_opener(ReadTimeoutHTTPHandler(timeout), ReadTimeoutHTTPSHandler(timeout))
+    return opener.open(request, timeout = connect_timeout)
+
+def is_retryable(error):
+    """
+    Decide whether a failed download is worth trying again.
+
+    Args:
+        error (Exception): The error the download raised.
+
+    Returns:
+        bool: True for timeouts, dropped connections and server errors, False for client errors such as 404.
+    """
+    if isinstance(error, HTTPError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (URLError, HTTPException, OSError))
+
+def with_retries(function, deadline, attempts = max_attempts):
+    """
+    Call a function until it succeeds, waiting exponentially longer between attempts, within a deadline.
+
+    Each wait is chosen at random up to the backoff cap ("full jitter"), so sources that fail together don't retry in
+    lockstep. Errors that aren't worth retrying, and errors when no time is left, are raised straight away.
+
+    Args:
+        function (callable): Called with the number of seconds left before the deadline.
+        deadline (float): The `time.monotonic()` time by which the last attempt must start.
+        attempts (int): The most calls to make.
+
+    Returns:
+        object: The result of the first successful call.
+
+    Raises:
+        Exception: Whatever the last attempt raised.
+    """
+    for attempt in range(attempts):
+        try:
+            return function(deadline - monotonic())
+        except Exception as error:
+            wait = uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+            if attempt == attempts - 1 or not is_retryable(error) or monotonic() + wait >= deadline:
+                raise
+            count("fetch_retries")
+            sleep(wait)
+
+def fetch_page(file_path, timeout = default_timeout, cache = None, connect_timeout = default_connect_timeout):
+    """
+    Download a single live news page and decode it as UTF-8, retrying timeouts, dropped connections and server errors
+    with backoff until the timeout runs out.
+
+    Args:
+        file_path (str): The string URL path to read.
+        timeout (float): The number of seconds allowed for the download, including every retry. It also limits each
+            read from the socket.
+        cache (HTTPCache): The HTTP cache to read through, if any.
+        connect_timeout (float): The number of seconds to wait for each connection.
+
+    Returns:
+        str: The decoded page contents.
+
+    Examples:
+        >>> fetch_page('https://www.abc.net.au/news/weather', timeout = 5)
+        '<!DOCTYPE html>...'
+    """
+    def download(remaining):
+        # Never wait on the socket for longer than is left of the timeout
+        read_timeout = max(min(timeout, remaining), 0.001)
+        if cache is not None:
+            return cache.get(file_path, timeout = read_timeout, connect_timeout = min(connect_timeout, read_timeout))
+        with open_URL(file_path, read_timeout, min(connect_timeout, read_timeout)) as response:
+            return response.read()
+
+    body = with_retries(download, monotonic() + timeout)
+
+    # Count bytes whether they came from the network or the cache, as both are read and decoded
+    count("bytes_fetched", len(body))
+    return body.decode("UTF-8")
+
+def run_all(tasks, timeout = default_timeout, progress = None, fallback = None):
+    """
+    Run every task at once on its own worker thread and collect the results, each against its own deadline.
+
+    The total wait is bounded by the slowest task rather than the sum of all of them. Every deadline is measured from
+    when the tasks started.
+
+    Args:
+        tasks (dict): A dict mapping each key to a callable taking no arguments.
+        timeout (float or dict): Either one timeout in seconds for every task, or a dict mapping each key to its own
+            timeout.
+        progress (callable): Called from the worker thread with each key as soon as its task succeeds.
+        fallback (callable): Called with the key and the error of every task that fails or runs out of time, to return
+            a result in its place. Without it the first failure is raised.
+
+    Returns:
+        dict: A dict mapping each key to the result of its task.
+
+    Raises:
+        SourceTimeoutError: If a task does not finish within its timeout and there is no fallback.
+        Exception: Whatever the first failing task raised, if there is no fallback.
+
+    Examples:
+        >>> run_all({"ABC News": load_ABC, "SBS News": load_SBS}, timeout = {"ABC News": 5})
+        {'ABC News': ArticleBatch('ABC News', 20 articles), 'SBS News': ArticleBatch('SBS News', 12 articles)}
+    """
+    # Work out the timeout for each task
+    if isinstance(timeout, dict):
+        timeouts = {key: timeout.get(key, default_timeout) for key in tasks}
+    else:
+        timeouts = {key: timeout for key in tasks}
+
+    if not tasks:
+        return {}
+
+    executor = ThreadPoolExecutor(max_workers = min(len(tasks), max_workers), thread_name_prefix = "feed_fetcher")
+    started = monotonic()
+
+    try:
+        # Start every task at once
+        futures = {key: executor.submit(task) for key, task in tasks.items()}
+
+        # Report each task as soon as it finishes rather than in the order they were started
+        if progress is not None:
+            def report(future, key):
+                if not future.cancelled() and future.exception() is None:
+                    progress(key)
+
+            for key, future in futures.items():
+                future.add_done_callback(lambda future, key = key: report(future, key))
+
+        # Collect each result against its own deadline
+        results = {}
+        for key, future in futures.items():
+            remaining = max(0, timeouts[key] - (monotonic() - started))
+            try:
+                try:
+                    results[key] = future.result(timeout = remaining)
+                except FutureTimeoutError:
+                    raise SourceTimeoutError(f"Timed out after {timeouts[key]} seconds fetching {key}") from None
+            except Exception as error:
+                if fallback is None:
+                    raise
+                results[key] = fallback(key, error)
+        return results
+    finally:
+        # Don't let a stuck task hold up the caller
+        executor.shutdown(wait = False, cancel_futures = True)
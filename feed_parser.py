@@ -0,0 +1,239 @@
+from codecs import lookup
+from collections import namedtuple
+from html import unescape
+from mmap import ACCESS_READ, PAGESIZE, mmap
+from re import DOTALL, compile as compile_pattern
+from xml.etree.ElementTree import iterparse
+
+# Paging hints are optional, as some platforms (e.g. Windows) have no madvise. Without them pages are left for the
+# operating system to drop
+try:
+    from mmap import MADV_DONTNEED, MADV_SEQUENTIAL
+except ImportError:
+    MADV_DONTNEED = MADV_SEQUENTIAL = None
+
+# A single news story read from an RSS feed
+FeedItem = namedtuple("FeedItem", ["title", "date", "description", "link"])
+
+# Channel-level tags holding the date a feed was published, in order of preference
+channel_date_tags = ("lastBuildDate", "pubDate")
+
+# Byte patterns for scanning a feed in place. A token is either an item's start or end tag, a whole element of one
+# of the fields kept, matched without backtracking through its contents, or an empty self-closing field element
+encoding_pattern = compile_pattern(rb"""\s*<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z0-9._-]+)["']""")
+token_pattern = compile_pattern(rb"<(/?item)(?:\s[^>]*)?(?<!/)>|"
+                                rb"<(title|pubDate|lastBuildDate|description|link)(?:\s[^>]*)?(?<!/)>([^<]*(?:<(?!/\2>)[^<]*)*)</\2>|"
+                                rb"<(title|pubDate|lastBuildDate|description|link)(?:\s[^>]*)?/>")
+CDATA_pattern = compile_pattern(rb"<!\[CDATA\[(.*?)\]\]>", DOTALL)
+
+# Bytes of a mapped feed scanned between handing the pages already scanned back to the operating system
+release_interval = 16 * 2 ** 20
+
+# Byte order mark of UTF-8 files, which overrides any declared encoding
+UTF8_BOM = b"\xef\xbb\xbf"
+
+def iter_feed_items(source):
+    """
+    Read an RSS feed in a single streaming pass and yield each `<item>` as it is completed.
+
+    Only one item is held in memory at a time, so peak memory stays flat no matter how large the feed is. Channel-level
+    tags such as the feed's own `<title>` and `<description>` are never mistaken for items, and the encoding declared
+    in the XML prolog is honoured. Items without their own `<pubDate>` take the channel's build or publish date.
+
+    Args:
+        source (str or file): The string path of the XML file to read, or an open binary file object.
+
+    Yields:
+        FeedItem: The title, date, description and link of each item in feed order. Missing fields are empty strings.
+
+    Examples:
+        >>> next(iter_feed_items('data/xml_files/2019-10-14-courier-mail.xml'))
+        FeedItem(title='‘Dangerous cocktail’ of extreme weather looming', date='Mon, 14 Oct 2019 00:47:30 +0000', ...)
+    """
+    channel = None
+    channel_dates = {}
+    depth = 0
+    item_depth = None
+
+    for event, element in iterparse(source, events = ("start", "end")):
+        if event == "start":
+            depth += 1
+            if element.tag == "channel":
+                channel = element
+            elif element.tag == "item" and item_depth is None:
+                item_depth = depth
+            continue
+
+        depth -= 1
+
+        # Remember the channel's own dates for items that don't carry one
+        if item_depth is None:
+            if element.tag in channel_date_tags and element.tag not in channel_dates:
+                channel_dates[element.tag] = (element.text or "").strip()
+            continue
+
+        if element.tag != "item" or depth != item_depth - 1:
+            continue
+        item_depth = None
+
+        date = (element.findtext("pubDate") or "").strip()
+        if not date:
+            date = next((channel_dates[tag] for tag in channel_date_tags if channel_dates.get(tag)), "")
+
+        yield FeedItem(
+            (element.findtext("title") or "").strip(),
+            date,
+            (element.findtext("description") or "").strip(),
+            (element.findtext("link") or "").strip(),
+        )
+
+        # Free the finished item and anything the channel has accumulated so far
+        element.clear()
+        if channel is not None:
+            channel.clear()
+
+def declared_encoding(buffer):
+    """
+    Find the encoding a feed declares in its XML prolog.
+
+    Args:
+        buffer (bytes or mmap): The start of the feed, or the whole feed.
+
+    Returns:
+        str: The normalised name of the encoding, "utf-8" if the feed doesn't declare one, or `None` if the feed's
+            encoding can't be scanned as bytes, e.g. UTF-16 or an unknown encoding.
+
+    Examples:
+        >>> declared_encoding(b'<?xml version="1.0" encoding="ISO-8859-1" ?><rss version="2.0">')
+        'iso8859-1'
+    """
+    if buffer[:3] == UTF8_BOM:
+        return "utf-8"
+    if buffer[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return None
+
+    encoding_match = encoding_pattern.match(buffer, 0, 200)
+    try:
+        encoding = lookup(encoding_match.group(1).decode("ascii") if encoding_match else "utf-8").name
+    except LookupError:
+        return None
+
+    # Tags can only be found by their bytes in encodings that write ASCII as ASCII
+    return encoding if "<item>".encode(encoding) == b"<item>" else None
+
+def decode_field(raw, encoding):
+    """
+    Decode the raw contents of one element, unescaping character references outside CDATA sections.
+
+    Args:
+        raw (bytes): The bytes between the element's start and end tags.
+        encoding (str): The encoding of the feed.
+
+    Returns:
+        str: The text of the element with surrounding whitespace removed.
+
+    Examples:
+        >>> decode_field(b"<![CDATA[Hail & rain]]> &#124; QLD", "utf-8")
+        'Hail & rain | QLD'
+    """
+    raw = raw.strip()
+
+    # Most fields are either plain text with nothing to unescape or a single CDATA section
+    if b"<![CDATA[" not in raw:
+        return unescape(raw.decode(encoding)) if b"&" in raw else raw.decode(encoding)
+    if raw.startswith(b"<![CDATA[") and raw.find(b"]]>") == len(raw) - 3:
+        return raw[9:-3].decode(encoding).strip()
+
+    # Otherwise CDATA sections alternate with escaped text
+    parts = CDATA_pattern.split(raw)
+    return "".join(part.decode(encoding) if index % 2 else unescape(part.decode(encoding))
+                   for index, part in enumerate(parts)).strip()
+
+def iter_buffer_feed_items(buffer, encoding):
+    """
+    Scan the bytes of an RSS feed in place and yield each `<item>`, copying and decoding only the fields that are kept.
+
+    Args:
+        buffer (bytes or mmap): The whole feed.
+        encoding (str): The encoding of the feed, as returned by `declared_encoding`.
+
+    Yields:
+        FeedItem: The title, date, description and link of each item in feed order. Missing fields are empty strings.
+    """
+    channel_date_keys = [tag.encode() for tag in channel_date_tags]
+    channel_dates = {}
+    channel_date = None
+    fields = None
+    release_pages = isinstance(buffer, mmap) and MADV_DONTNEED is not None
+    released = 0
+
+    for token in token_pattern.finditer(buffer):
+        item_tag, tag, raw, empty_tag = token.groups()
+        if empty_tag is not None:
+            tag, raw = empty_tag, b""
+
+        # Fields outside any item belong to the channel, of which only the dates are kept
+        if item_tag is None:
+            if fields is not None:
+                fields.setdefault(tag, raw)
+            elif tag not in channel_dates:
+                channel_dates[tag] = raw
+                channel_date = None
+            continue
+
+        if item_tag == b"item":
+            fields = {}
+            continue
+        if fields is None:
+            continue
+
+        # Items without their own date take the channel's build or publish date
+        date = fields.get(b"pubDate", b"")
+        if not date.strip():
+            if channel_date is None:
+                channel_date = next((channel_dates[key] for key in channel_date_keys if channel_dates.get(key, b"").strip()), b"")
+            date = channel_date
+
+        yield FeedItem(
+            decode_field(fields.get(b"title", b""), encoding),
+            decode_field(date, encoding),
+            decode_field(fields.get(b"description", b""), encoding),
+            decode_field(fields.get(b"link", b""), encoding),
+        )
+        fields = None
+
+        # Drop mapped pages behind the scan so that resident memory stays flat on huge files
+        if release_pages and token.end() - released >= release_interval:
+            released = token.end() - token.end() % PAGESIZE
+            buffer.madvise(MADV_DONTNEED, 0, released)
+
+def iter_mapped_feed_items(file_path):
+    """
+    Memory-map an RSS feed file and yield each `<item>` without reading the file into memory.
+
+    The file is scanned as bytes straight from the page cache, and only each item's fields are copied and decoded
+    using the encoding declared in the XML prolog. Memory use stays flat however large the file is. Feeds in
+    encodings that can't be scanned as bytes, such as UTF-16, are read with `iter_feed_items` instead.
+
+    Args:
+        file_path (str): The string path of the XML file to read.
+
+    Yields:
+        FeedItem: The title, date, description and link of each item in feed order. Missing fields are empty strings.
+
+    Examples:
+        >>> next(iter_mapped_feed_items('data/xml_files/2019-10-14-weatherzone.xml')).title
+        'Prime Minister and NSW Premier announce $1b funding for Wyangala, Dungowan dam projects'
+    """
+    with open(file_path, "rb") as file:
+        # Empty files can't be mapped, and have no items anyway
+        if not file.seek(0, 2):
+            return
+        with mmap(file.fileno(), 0, access = ACCESS_READ) as buffer:
+            if MADV_SEQUENTIAL is not None:
+                buffer.madvise(MADV_SEQUENTIAL)
+            encoding = declared_encoding(buffer)
+            if encoding is None:
+                yield from iter_feed_items(file_path)
+            else:
+                yield from iter_buffer_feed_items(buffer, encoding)
@@ -0,0 +1,174 @@
+from html import escape
+from os import chmod, path, remove, replace, stat, umask
+from stat import S_IMODE
+from re import compile as compile_pattern
+from tempfile import mkstemp
+
+# Placeholders look like {title} within a template
+placeholder_pattern = compile_pattern(r"\{(\w+)\}")
+
+# Size of the write buffer used for each page
+buffer_size = 1 << 16
+
+class Markup(str):
+    """
+    A string of trusted HTML that templates insert as-is instead of escaping.
+
+    Examples:
+        >>> HTMLTemplate("<p>{body}</p>").render(body = Markup("<b>Hot</b>"))
+        '<p><b>Hot</b></p>'
+    """
+
+class HTMLTemplate:
+    """
+    An HTML template compiled once into alternating literal text and field names.
+
+    Rendering only joins the precompiled pieces with the field values, escaping every value that isn't `Markup`.
+
+    Attributes:
+        template (str): The source of the template, with fields written as `{name}`.
+
+    Examples:
+        >>> HTMLTemplate("<h2>{title}</h2>").render(title = "Hail & rain")
+        '<h2>Hail &amp; rain</h2>'
+    """
+    def __init__(self, template):
+        self.template = template
+
+        # Split the template into [literal, field, literal, field, ..., literal]
+        pieces = placeholder_pattern.split(template)
+        self._literals = pieces[0::2]
+        self._fields = pieces[1::2]
+
+    def render(self, **values):
+        """
+        Fill in the template.
+
+        Args:
+            **values: The value of every field in the template. Values are escaped unless they are `Markup`.
+
+        Returns:
+            str: The rendered HTML.
+
+        Raises:
+            KeyError: If a field in the template has no value.
+        """
+        output = [self._literals[0]]
+        for field, literal in zip(self._fields, self._literals[1:]):
+            value = values[field]
+            output.append(value if isinstance(value, Markup) else escape(str(value)))
+            output.append(literal)
+        return "".join(output)
+
+def page_file_name(file_name, page_number):
+    """
+    Name the file for a page of an export. The first page keeps the original name.
+
+    Args:
+        file_name (str): The string path of the first page, e.g. "news.html".
+        page_number (int): The 1-based page number.
+
+    Returns:
+        str: The string path of the page, e.g. "news-2.html" for the second page.
+    """
+    if page_number == 1:
+        return file_name
+    stem, extension = path.splitext(file_name)
+    return f"{stem}-{page_number}{extension}"
+
+def file_mode(file_name):
+    """
+    Choose the permissions for writing a file: those of the file it replaces, or those of a newly created file.
+
+    Temporary files are only readable by their owner, so this is applied before renaming one into place.
+
+    Args:
+        file_name (str): The string path of the file to be written.
+
+    Returns:
+        int: The permission bits, e.g. 0o644.
+    """
+    try:
+        return S_IMODE(stat(file_name).st_mode)
+    except FileNotFoundError:
+        pass
+
+    # The umask can only be read by setting it, so put it straight back
+    mask = umask(0o022)
+    umask(mask)
+    return 0o666 & ~mask
+
+def write_atomically(file_name, write_contents):
+    """
+    Write a file through a temporary file in the same directory, renaming it into place only once it is complete.
+
+    Args:
+        file_name (str): The string path of the file to create or replace.
+        write_contents (callable): Called with the open, buffered text file to write the contents.
+    """
+    file_descriptor, temporary_path = mkstemp(dir = path.dirname(path.abspath(file_name)), suffix = ".tmp")
+    try:
+        with open(file_descriptor, "w", encoding = "UTF-8", buffering = buffer_size) as file:
+            write_contents(file)
+        chmod(temporary_path, file_mode(file_name))
+        replace(temporary_path, file_name)
+    except BaseException:
+        remove(temporary_path)
+        raise
+
+def export_pages(articles, file_name, header, footer, render_article, page_size = None, render_navigation = None):
+    """
+    Stream articles into one or more HTML pages, keeping only one article in memory at a time.
+
+    Args:
+        articles (iterable of Article): The articles to write, typically a generator.
+        file_name (str): The string path of the first page.
+        header (str): The HTML written at the start of every page.
+        footer (str): The HTML written at the end of every page.
+        render_article (callable): Called with each article to return its HTML.
+        page_size (int): The most articles to put on one page, or `None` to write a single page.
+        render_navigation (callable): Called with the previous and next page file names (or `None` at either end) to
+            return the HTML placed before the footer of every page when paginating.
+
+    Returns:
+        list of str: The string paths of the pages written.
+
+    Examples:
+        >>> export_pages(selected_articles(), "news.html", HTML_header, HTML_footer, render_article, page_size = 500)
+        ['news.html', 'news-2.html']
+    """
+    articles = iter(articles)
+    next_article = next(articles, None)
+    pages = []
+
+    while True:
+        page_number = len(pages) + 1
+        page_name = page_file_name(file_name, page_number)
+        has_next_page = []
+
+        def write_page(file):
+            nonlocal next_article
+            file.write(header)
+
+            # Write articles until the page is full or they run out
+            written = 0
+            while next_article is not None and (page_size is None or written < page_size):
+                file.write(render_article(next_article))
+                written += 1
+                next_article = next(articles, None)
+
+            if next_article is not None:
+                has_next_page.append(True)
+
+            if page_size is not None and render_navigation is not None:
+                previous_name = path.basename(page_file_name(file_name, page_number - 1)) if page_number > 1 else None
+                next_name = path.basename(page_file_name(file_name, page_number + 1)) if has_next_page else None
+                file.write(render_navigation(previous_name, next_name))
+
+            file.write(footer)
+
+        write_atomically(page_name, write_page)
+        pages.append(page_name)
+
+        if not has_next_page:
+            return pages
@@ -0,0 +1,219 @@
+from email.utils import formatdate
+from hashlib import sha256
+from json import dumps, load
+from os import listdir, makedirs, path, remove, replace
+from re import search
+from tempfile import mkstemp
+from threading import Lock
+from time import time
+from urllib.error import HTTPError
+from urllib.request import Request
+
+from feed_fetcher import open_URL
+from instrumentation import count
+
+class HTTPCache:
+    """
+    A persistent on-disk HTTP cache for live news pages using conditional GET requests.
+
+    Each cached page is stored as two files named after the SHA-256 hash of its URL: a `.body` file holding the raw
+    response bytes and a `.json` file holding its ETag, Last-Modified, max-age and bookkeeping times. Fresh entries
+    are served straight from disk, stale entries are revalidated with `If-None-Match`/`If-Modified-Since`, and the
+    cache is trimmed by age and total size after every write.
+
+    Attributes:
+        directory (str): The string path of the directory holding the cache files.
+        max_bytes (int): The largest total size of cached bodies to keep before evicting the least recently used.
+        max_entry_age (float): The number of seconds after which an entry is evicted regardless of use.
+        default_max_age (float): The number of seconds to treat a page as fresh when the server gives no max-age.
+        hits (int): The number of requests served from disk without touching the network.
+        revalidations (int): The number of requests answered by the server with 304 Not Modified.
+        misses (int): The number of requests that downloaded a full page.
+
+    Examples:
+        >>> cache = HTTPCache("data/http_cache", max_bytes = 10_000_000)
+        >>> cache.get("https://www.abc.net.au/news/weather", timeout = 5)
+        b'<!DOCTYPE html>...'
+    """
+    def __init__(self, directory, max_bytes = 50_000_000, max_entry_age = 7 * 24 * 60 * 60, default_max_age = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_age = max_entry_age
+        self.default_max_age = default_max_age
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._lock = Lock()
+
+        makedirs(directory, exist_ok = True)
+
+    def get(self, url, timeout = None, connect_timeout = None):
+        """
+        Return the body of a URL, using the cached copy whenever it is still fresh or the server says it is unchanged.
+
+        Args:
+            url (str): The string URL to read.
+            timeout (float): The number of seconds to wait on the socket before giving up.
+            connect_timeout (float): The number of seconds to wait for the connection, or `None` to use `timeout`.
+
+        Returns:
+            bytes: The raw response body.
+        """
+        key = sha256(url.encode("UTF-8")).hexdigest()
+        metadata = self._read_metadata(key)
+        now = time()
+
+        # Serve fresh entries without touching the network
+        if metadata is not None and now - metadata["stored_at"] < metadata["max_age"]:
+            body = self._read_body(key)
+            if body is not None:
+                self.hits += 1
+                count("HTTP_cache_requests", result = "hit")
+                metadata["last_used"] = now
+                self._write_metadata(key, metadata)
+                return body
+
+        # Otherwise revalidate whatever validators are held
+        request = Request(url)
+        if metadata is not None:
+            if metadata.get("etag"):
+                request.add_header("If-None-Match", metadata["etag"])
+            if metadata.get("last_modified"):
+                request.add_header("If-Modified-Since", metadata["last_modified"])
+
+        try:
+            with open_URL(request, timeout, connect_timeout) as response:
+                headers = response.headers
+                body = response.read()
+        except HTTPError as error:
+            if error.code != 304 or metadata is None:
+                raise
+            body = self._read_body(key)
+            if body is None:
+                # The body went missing under us, so fetch it again from scratch
+                remove(self._metadata_path(key))
+                return self.get(url, timeout, connect_timeout)
+
+            # Not modified, so refresh the freshness information and reuse the stored body
+            self.revalidations += 1
+            count("HTTP_cache_requests", result = "revalidated")
+            metadata.update(self._freshness(error.headers, metadata))
+            metadata["stored_at"] = metadata["last_used"] = time()
+            self._write_metadata(key, metadata)
+            return body
+
+        self.misses += 1
+        count("HTTP_cache_requests", result = "miss")
+        cache_control = headers.get("Cache-Control", "")
+        if "no-store" not in cache_control:
+            self._store(key, url, body, headers)
+        return body
+
+    def evict(self):
+        """
+        Remove entries older than `max_entry_age`, then the least recently used entries until the total size of the
+        stored bodies fits within `max_bytes`.
+        """
+        with self._lock:
+            now = time()
+            entries = []
+            for file_name in listdir(self.directory):
+                if not file_name.endswith(".json"):
+                    continue
+                key = file_name[:-len(".json")]
+                metadata = self._read_metadata(key)
+                if metadata is None or now - metadata["stored_at"] > self.max_entry_age:
+                    self._remove(key)
+                else:
+                    entries.append((metadata["last_used"], metadata["size"], key))
+
+            # Drop least recently used entries first
+            entries.sort()
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total_size <= self.max_bytes:
+                    break
+                self._remove(key)
+                total_size -= size
+
+    def _store(self, key, url, body, headers):
+        now = time()
+        metadata = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": now,
+            "last_used": now,
+            "size": len(body),
+        }
+        metadata.update(self._freshness(headers, metadata))
+
+        with self._lock:
+            self._write_atomic(self._body_path(key), body)
+            self._write_metadata(key, metadata)
+        self.evict()
+
+    def _freshness(self, headers, metadata):
+        # Work out how long the response stays fresh from its Cache-Control header
+        cache_control = headers.get("Cache-Control", "") if headers is not None else ""
+        freshness = {"max_age": self.default_max_age}
+
+        if "no-cache" in cache_control:
+            freshness["max_age"] = 0
+        else:
+            max_age = search(r"max-age=(\d+)", cache_control)
+            if max_age:
+                freshness["max_age"] = int(max_age.group(1))
+
+        # Keep any new validators the server sent with a 304
+        if headers is not None:
+            if headers.get("ETag"):
+                freshness["etag"] = headers.get("ETag")
+            if headers.get("Last-Modified"):
+                freshness["last_modified"] = headers.get("Last-Modified")
+            elif not metadata.get("last_modified") and not metadata.get("etag"):
+                # Fall back to the time it was stored so the page can still be revalidated
+                freshness["last_modified"] = formatdate(usegmt = True)
+        return freshness
+
+    def _body_path(self, key):
+        return path.join(self.directory, key + ".body")
+
+    def _metadata_path(self, key):
+        return path.join(self.directory, key + ".json")
+
+    def _read_body(self, key):
+        try:
+            with open(self._body_path(key), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _read_metadata(self, key):
+        try:
+            with open(self._metadata_path(key), encoding = "UTF-8") as file:
+                return load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, key, metadata):
+        self._write_atomic(self._metadata_path(key), dumps(metadata).encode("UTF-8"))
+
+    def _write_atomic(self, file_path, data):
+        # Every write gets its own temporary file, so concurrent writers of the same entry (in this process or
+        # another sharing the directory) never collide before the rename
+        file_descriptor, temporary_path = mkstemp(dir = self.directory, suffix = ".tmp")
+        try:
+            with open(file_descriptor, "wb") as file:
+                file.write(data)
+            replace(temporary_path, file_path)
+        except BaseException:
+            remove(temporary_path)
+            raise
+
+    def _remove(self, key):
+        for file_path in (self._metadata_path(key), self._body_path(key)):
+            try:
+                remove(file_path)
+            except OSError:
+                pass
@@ -0,0 +1,252 @@
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+from json import dump, load
+from os import listdir, makedirs, path, remove, replace, stat, utime
+from tempfile import mkstemp
+from threading import Lock
+from urllib.request import urlopen
+
+from feed_fetcher import default_timeout, max_workers
+
+# Pillow is optional. Without it images are kept at their original size, as long as they are small enough
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Largest image downloaded, and largest image kept at its original size when it can't be downscaled
+max_download_bytes = 10_000_000
+max_unscaled_bytes = 200_000
+
+# JPEG quality of downscaled thumbnails
+thumbnail_quality = 80
+
+# Image formats recognised by the bytes they start with, as (signature, offset, file extension, MIME type)
+image_signatures = [
+    (b"\xff\xd8\xff", 0, "jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", 0, "png", "image/png"),
+    (b"GIF87a", 0, "gif", "image/gif"),
+    (b"GIF89a", 0, "gif", "image/gif"),
+    (b"WEBP", 8, "webp", "image/webp"),
+]
+
+# Name of the file mapping each image URL to its thumbnail
+index_file_name = "index.json"
+
+def image_type(data):
+    """
+    Recognise an image format from its first bytes.
+
+    Args:
+        data (bytes): The image file contents.
+
+    Returns:
+        tuple of str: The file extension and MIME type, or `None` if the data isn't a recognised image.
+
+    Examples:
+        >>> image_type(b"\\x89PNG\\r\\n\\x1a\\n...")
+        ('png', 'image/png')
+    """
+    for signature, offset, extension, MIME_type in image_signatures:
+        if data[offset:offset + len(signature)] == signature:
+            return extension, MIME_type
+    return None
+
+def make_thumbnail(data, width):
+    """
+    Downscale an image to a thumbnail of at most the given width, keeping its aspect ratio.
+
+    With Pillow installed the thumbnail is re-encoded as a JPEG. Without it, small images are kept as they are and
+    large ones are rejected.
+
+    Args:
+        data (bytes): The original image file contents.
+        width (int): The largest width of the thumbnail in pixels.
+
+    Returns:
+        bytes: The thumbnail file contents, or `None` if the image can't be used.
+    """
+    if Image is None:
+        return data if len(data) <= max_unscaled_bytes else None
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image.thumbnail((width, width * 10))
+            output = BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality = thumbnail_quality, optimize = True)
+            return output.getvalue()
+    except (OSError, ValueError):
+        return None
+
+class ThumbnailCache:
+    """
+    A content-addressed on-disk cache of article image thumbnails.
+
+    Each thumbnail is stored once under the SHA-256 hash of its contents, so images shared by several URLs take up
+    space once. An index file maps each image URL to its thumbnail. Using a thumbnail marks it as recently used, and
+    the least recently used thumbnails are evicted once the cache grows past `max_bytes`.
+
+    Attributes:
+        directory (str): The string path of the directory holding the thumbnails.
+        max_bytes (int): The largest total size of thumbnails to keep before evicting the least recently used.
+        width (int): The largest width of a thumbnail in pixels.
+
+    Examples:
+        >>> cache = ThumbnailCache("data/thumbnails")
+        >>> cache.prefetch(["https://live-production.wcms.abc-cdn.net.au/hail.jpg"])
+        >>> cache.data_URI("https://live-production.wcms.abc-cdn.net.au/hail.jpg")
+        'data:image/jpeg;base64,/9j/4AAQ...'
+    """
+    def __init__(self, directory, max_bytes = 20_000_000, width = 250):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self._lock = Lock()
+
+        makedirs(directory, exist_ok = True)
+        try:
+            with open(path.join(directory, index_file_name), encoding = "UTF-8") as file:
+                self._index = load(file)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def get(self, url):
+        """
+        Find the cached thumbnail of an image URL, marking it as recently used.
+
+        Args:
+            url (str): The string URL of the original image.
+
+        Returns:
+            str: The string path of the thumbnail file, or `None` if it isn't cached.
+        """
+        file_name = self._index.get(url)
+        if file_name is None:
+            return None
+
+        file_path = path.join(self.directory, file_name)
+        try:
+            utime(file_path)
+        except OSError:
+            return None
+        return file_path
+
+    def data_URI(self, url):
+        """
+        Read the cached thumbnail of an image URL as a data URI, for embedding straight into a page.
+
+        Args:
+            url (str): The string URL of the original image.
+
+        Returns:
+            str: The data URI of the thumbnail, or `None` if it isn't cached.
+        """
+        file_path = self.get(url)
+        if file_path is None:
+            return None
+
+        try:
+            with open(file_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        return f"data:{image_type(data)[1]};base64,{b64encode(data).decode('ascii')}"
+
+    def prefetch(self, urls, timeout = default_timeout):
+        """
+        Download and thumbnail every image not already cached, all at once.
+
+        Images that fail to download or aren't recognised are skipped, leaving them uncached. Nothing is evicted
+        here, so thumbnails fetched for a page are still there while it is written; call `evict` once it is.
+
+        Args:
+            urls (iterable of str): The string URLs of the original images.
+            timeout (float): The number of seconds to wait on each download's socket before giving up.
+
+        Returns:
+            int: The number of thumbnails added.
+        """
+        missing = list(dict.fromkeys(url for url in urls if url and self.get(url) is None))
+        if not missing:
+            return 0
+
+        # Download on worker threads, as fetching is almost all waiting on the network
+        with ThreadPoolExecutor(max_workers = min(len(missing), max_workers), thread_name_prefix = "image_cache") as executor:
+            file_names = list(executor.map(lambda url: self._fetch(url, timeout), missing))
+
+        added = 0
+        with self._lock:
+            for url, file_name in zip(missing, file_names):
+                if file_name is not None:
+                    self._index[url] = file_name
+                    added += 1
+            self._write_index()
+        return added
+
+    def evict(self, keep = ()):
+        """
+        Remove the least recently used thumbnails until the total size fits within `max_bytes`, and forget every URL
+        whose thumbnail is gone.
+
+        Args:
+            keep (iterable of str): The string URLs of images whose thumbnails must not be removed, such as those
+                linked from pages just written. They still count towards the total size.
+        """
+        with self._lock:
+            protected = {self._index[url] for url in keep if url in self._index}
+            entries = []
+            for file_name in listdir(self.directory):
+                if file_name == index_file_name or file_name.endswith(".tmp"):
+                    continue
+                file_stat = stat(path.join(self.directory, file_name))
+                entries.append((file_stat.st_mtime, file_stat.st_size, file_name))
+
+            # Drop least recently used thumbnails first, passing over the protected ones
+            entries.sort()
+            total_size = sum(size for _, size, _ in entries)
+            kept = {file_name for _, _, file_name in entries}
+            for _, size, file_name in entries:
+                if total_size <= self.max_bytes:
+                    break
+                if file_name in protected:
+                    continue
+                remove(path.join(self.directory, file_name))
+                kept.discard(file_name)
+                total_size -= size
+
+            self._index = {url: file_name for url, file_name in self._index.items() if file_name in kept}
+            self._write_index()
+
+    def _fetch(self, url, timeout):
+        # Download, thumbnail and store one image, returning its file name or None if it can't be used
+        try:
+            with urlopen(url, timeout = timeout) as response:
+                data = response.read(max_download_bytes + 1)
+        except (OSError, ValueError):
+            return None
+        if len(data) > max_download_bytes or image_type(data) is None:
+            return None
+
+        thumbnail = make_thumbnail(data, self.width)
+        if thumbnail is None:
+            return None
+
+        # Name the thumbnail after its contents, so identical thumbnails are stored once
+        file_name = f"{sha256(thumbnail).hexdigest()}.{image_type(thumbnail)[0]}"
+        file_path = path.join(self.directory, file_name)
+        if path.exists(file_path):
+            utime(file_path)
+        else:
+            file_descriptor, temporary_path = mkstemp(dir = self.directory, suffix = ".tmp")
+            with open(file_descriptor, "wb") as file:
+                file.write(thumbnail)
+            replace(temporary_path, file_path)
+        return file_name
+
+    def _write_index(self):
+        temporary_path = path.join(self.directory, index_file_name + ".tmp")
+        with open(temporary_path, "w", encoding = "UTF-8") as file:
+            dump(self._index, file)
+        replace(temporary_path, path.join(self.directory, index_file_name))
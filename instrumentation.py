@@ -0,0 +1,222 @@
+from contextlib import contextmanager
+from json import dumps
+from threading import Lock
+from time import perf_counter, time
+
+# Prefix of every metric name in the Prometheus text format
+metric_prefix = "weather_news_mixer_"
+
+class Metrics:
+    """
+    A thread-safe registry of timing spans and counters.
+
+    Spans record how many times a stage ran and how long it took in total and at worst. Counters add up amounts such
+    as bytes fetched or rows written. Both are keyed by a name plus optional labels, e.g. the news source.
+
+    Attributes:
+        started (float): The Unix time the registry was created or last reset.
+
+    Examples:
+        >>> metrics = Metrics()
+        >>> with metrics.span("parse", source = "ABC News"):
+        ...     batch = parse_ABC_page(source, page)
+        >>> metrics.count("items_parsed", len(batch), source = "ABC News")
+        >>> print(metrics.to_Prometheus())
+        weather_news_mixer_span_seconds_count{span="parse",source="ABC News"} 1
+        ...
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forget every span and counter recorded so far.
+        """
+        with self._lock:
+            self.started = time()
+            self._spans = {}
+            self._counters = {}
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Time the code run inside a `with` block. The time is recorded even if the block raises.
+
+        Args:
+            name (str): The name of the stage, e.g. "fetch".
+            **labels: Labels telling apart runs of the same stage, e.g. `source = "ABC News"`.
+        """
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - started, **labels)
+
+    def record(self, name, seconds, **labels):
+        """
+        Record one run of a stage timed elsewhere.
+
+        Args:
+            name (str): The name of the stage.
+            seconds (float): How long the run took.
+            **labels: Labels telling apart runs of the same stage.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            runs, total, longest = self._spans.get(key, (0, 0.0, 0.0))
+            self._spans[key] = (runs + 1, total + seconds, max(longest, seconds))
+
+    def count(self, name, amount = 1, **labels):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The name of the counter, e.g. "bytes_fetched".
+            amount (int): The amount to add.
+            **labels: Labels telling apart parts of the same count.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def records(self):
+        """
+        Snapshot every span and counter as plain dicts.
+
+        Returns:
+            list of dict: One dict per span, with its run count, total and longest seconds, then one per counter.
+        """
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        records = [{"type": "span", "name": name, "labels": dict(labels), "count": runs, "total_seconds": total,
+                    "max_seconds": longest} for (name, labels), (runs, total, longest) in spans]
+        records.extend({"type": "counter", "name": name, "labels": dict(labels), "value": value}
+                       for (name, labels), value in counters)
+        return records
+
+    def to_JSON_lines(self):
+        """
+        Dump every span and counter as JSON lines, each stamped with the time of the dump.
+
+        Returns:
+            str: One JSON object per line, ending with a newline.
+        """
+        now = time()
+        return "".join(dumps({"time": now, **record}) + "\n" for record in self.records())
+
+    def to_Prometheus(self):
+        """
+        Dump every span and counter in the Prometheus text exposition format.
+
+        Spans become the `span_seconds` summary plus a `span_seconds_max` gauge, labelled with the span name. Counters
+        become `<name>_total`.
+
+        Returns:
+            str: The metrics, one sample per line, ending with a newline.
+        """
+        records = self.records()
+        lines = []
+
+        # Spans, as a summary with count and sum plus the longest run
+        span_records = [record for record in records if record["type"] == "span"]
+        if span_records:
+            lines.append(f"# TYPE {metric_prefix}span_seconds summary")
+            for record in span_records:
+                labels = Prometheus_labels({"span": record["name"], **record["labels"]})
+                lines.append(f"{metric_prefix}span_seconds_count{labels} {record['count']}")
+                lines.append(f"{metric_prefix}span_seconds_sum{labels} {record['total_seconds']:.6f}")
+            lines.append(f"# TYPE {metric_prefix}span_seconds_max gauge")
+            for record in span_records:
+                labels = Prometheus_labels({"span": record["name"], **record["labels"]})
+                lines.append(f"{metric_prefix}span_seconds_max{labels} {record['max_seconds']:.6f}")
+
+        # Counters, one metric each
+        declared = set()
+        for record in records:
+            if record["type"] != "counter":
+                continue
+            metric_name = f"{metric_prefix}{record['name']}_total"
+            if metric_name not in declared:
+                lines.append(f"# TYPE {metric_name} counter")
+                declared.add(metric_name)
+            lines.append(f"{metric_name}{Prometheus_labels(record['labels'])} {record['value']}")
+
+        return "".join(line + "\n" for line in lines)
+
+    def write(self, file_path):
+        """
+        Write every span and counter to a file.
+
+        Files ending in ".prom" or ".txt" are overwritten with the Prometheus text format, e.g. for a node exporter's
+        textfile collector. Any other file has JSON lines appended, building a history of runs to compare.
+
+        Args:
+            file_path (str): The string path of the file to write.
+        """
+        if file_path.endswith((".prom", ".txt")):
+            with open(file_path, "w", encoding = "UTF-8") as file:
+                file.write(self.to_Prometheus())
+        else:
+            with open(file_path, "a", encoding = "UTF-8") as file:
+                file.write(self.to_JSON_lines())
+
+def Prometheus_labels(labels):
+    """
+    Format labels for a Prometheus sample.
+
+    Args:
+        labels (dict): A dict mapping each label name to its value.
+
+    Returns:
+        str: The labels in braces with their values escaped, or an empty string when there are none.
+
+    Examples:
+        >>> Prometheus_labels({"span": "fetch", "source": "ABC News"})
+        '{span="fetch",source="ABC News"}'
+    """
+    if not labels:
+        return ""
+
+    # Backslashes, quotes and newlines must be escaped within label values
+    escaped = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+@contextmanager
+def profiling(file_path):
+    """
+    Run the code inside a `with` block under cProfile, saving the statistics when it finishes.
+
+    Only the calling thread is profiled. Work done on worker threads, such as fetching and parsing each source, shows
+    up in the spans instead.
+
+    Args:
+        file_path (str): The string path to save the statistics to, readable with `pstats` or snakeviz, or `None` to
+            run without profiling.
+
+    Examples:
+        >>> with profiling("mixer.prof"):
+        ...     load_articles()
+    """
+    if not file_path:
+        yield
+        return
+
+    from cProfile import Profile
+    profile = Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(file_path)
+
+# Registry shared by the whole application
+metrics = Metrics()
+span = metrics.span
+count = metrics.count
@@ -0,0 +1,66 @@
+from hashlib import sha256
+from json import dump, load
+from os import makedirs, path, replace
+from tempfile import mkstemp
+from time import time
+
+from article import ArticleBatch
+
+class LastGoodStore:
+    """
+    An on-disk copy of the last batch each news source loaded successfully, to fall back on when it fails.
+
+    Each batch is stored as a JSON file named after the SHA-256 hash of its source name, holding its columns and the
+    time it was saved.
+
+    Attributes:
+        directory (str): The string path of the directory holding the batches.
+
+    Examples:
+        >>> store = LastGoodStore("data/last_good")
+        >>> store.save(ArticleBatch("ABC News", ["Storms ahead"]))
+        >>> store.load("ABC News")
+        (ArticleBatch('ABC News', 1 articles), 1716170400.0)
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        makedirs(directory, exist_ok = True)
+
+    def save(self, batch):
+        """
+        Replace the stored batch of a source, unless the new batch is empty.
+
+        Args:
+            batch (ArticleBatch): The batch the source just loaded.
+        """
+        if not len(batch):
+            return
+
+        contents = {"source": batch.source, "saved_at": time(), "titles": batch.titles, "dates": batch.dates,
+                    "descriptions": batch.descriptions, "images": batch.images}
+
+        file_descriptor, temporary_path = mkstemp(dir = self.directory, suffix = ".tmp")
+        with open(file_descriptor, "w", encoding = "UTF-8") as file:
+            dump(contents, file)
+        replace(temporary_path, self._file_path(batch.source))
+
+    def load(self, source):
+        """
+        Read the stored batch of a source.
+
+        Args:
+            source (str): The name of the news source.
+
+        Returns:
+            tuple: The stored `ArticleBatch` and the Unix time it was saved, or `None` if there is no usable copy.
+        """
+        try:
+            with open(self._file_path(source), encoding = "UTF-8") as file:
+                contents = load(file)
+            batch = ArticleBatch(source, contents["titles"], contents["dates"], contents["descriptions"], contents["images"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return batch, contents["saved_at"]
+
+    def _file_path(self, source):
+        return path.join(self.directory, sha256(source.encode("UTF-8")).hexdigest() + ".json")
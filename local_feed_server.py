@@ -0,0 +1,140 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from socket import SHUT_RDWR
+from sys import argv
+from threading import Lock, Thread
+from time import sleep
+
+# Seconds a "hang" fault waits before answering, longer than any source's timeout
+hang_seconds = 60
+
+# Faults that can be injected into a response
+fault_names = ("error", "throttle", "reset", "hang", "truncate", "garbage")
+
+class DelayedFeedHandler(SimpleHTTPRequestHandler):
+    """
+    Serve saved news pages from a directory, sleeping before each response to imitate a slow news website, and
+    injecting faults to imitate a broken one.
+
+    Each path can be given a list of faults, used up one per request, after which it is served normally:
+
+        - "error": Answer 503 Service Unavailable.
+        - "throttle": Answer 429 Too Many Requests.
+        - "reset": Drop the connection without answering.
+        - "hang": Wait `hang_seconds` before answering.
+        - "truncate": Promise the whole page but drop the connection halfway through it.
+        - "garbage": Answer 200 with a page that has none of the markup the parsers look for.
+        - `None`: Answer normally.
+
+    Attributes:
+        delays (dict): A dict mapping request paths (e.g. "/abc.html") to the number of seconds to wait.
+        default_delay (float): The number of seconds to wait for any path not listed in `delays`.
+        faults (dict): A dict mapping request paths to the list of faults still to inject, in order.
+        extra_headers (dict): A dict mapping request paths to a dict of extra headers to send, e.g. Cache-Control.
+        requests (dict): A dict mapping request paths to the number of requests received.
+    """
+    delays = {}
+    default_delay = 0
+    faults = {}
+    extra_headers = {}
+    requests = {}
+    lock = Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests[self.path] = self.requests.get(self.path, 0) + 1
+            remaining = self.faults.get(self.path)
+            fault = remaining.pop(0) if remaining else None
+
+        sleep(self.delays.get(self.path, self.default_delay))
+
+        if fault == "error":
+            self.send_error(503)
+        elif fault == "throttle":
+            self.send_error(429)
+        elif fault == "reset":
+            self.connection.shutdown(SHUT_RDWR)
+            self.close_connection = True
+        elif fault == "hang":
+            sleep(hang_seconds)
+            super().do_GET()
+        elif fault == "truncate":
+            self.send_response(200)
+            self.send_header("Content-Length", "100000")
+            self.end_headers()
+            self.wfile.write(b"<!DOCTYPE html><html><head>")
+            self.close_connection = True
+        elif fault == "garbage":
+            body = b"<!DOCTYPE html><html><body>We're redesigning! Check back soon.</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            super().do_GET()
+
+    def end_headers(self):
+        for name, value in self.extra_headers.get(self.path, {}).items():
+            self.send_header(name, value)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        # Keep the console quiet while serving
+        pass
+
+def start_server(directory, delays = None, default_delay = 0, port = 0, faults = None, headers = None):
+    """
+    Start a local HTTP stand-in server for the live news websites on a background thread.
+
+    Args:
+        directory (str): The string path of the directory holding the saved pages.
+        delays (dict): A dict mapping request paths to the number of seconds to wait before responding.
+        default_delay (float): The number of seconds to wait for any path not listed in `delays`.
+        port (int): The port to listen on, or 0 to pick a free one.
+        faults (dict): A dict mapping request paths to a list of faults to inject into successive requests, from
+            `fault_names`. The remaining faults and the request counts are kept on the server's `feed_handler` class.
+        headers (dict): A dict mapping request paths to a dict of extra headers to send with each response, e.g.
+            `{"/abc.html": {"Cache-Control": "max-age=60"}}`.
+
+    Returns:
+        tuple:
+            - ThreadingHTTPServer: The running server, to be stopped with `shutdown()`.
+            - str: The base URL of the server, e.g. "http://127.0.0.1:54321".
+
+    Examples:
+        >>> server, base_url = start_server("data/html_files", delays = {"/abc.html": 2})
+        >>> run_all({path: partial(fetch_page, base_url + path) for path in ("/abc.html", "/sbs.html")}, timeout = 5)
+        >>> server.shutdown()
+
+        >>> server, base_url = start_server("data/html_files", faults = {"/abc.html": ["error", "reset"]})
+        >>> fetch_page(base_url + "/abc.html")  # Succeeds on the third attempt
+        >>> server.feed_handler.requests
+        {'/abc.html': 3}
+    """
+    handler = type("Handler", (DelayedFeedHandler,), {
+        "delays": dict(delays or {}),
+        "default_delay": default_delay,
+        "faults": {request_path: list(path_faults) for request_path, path_faults in (faults or {}).items()},
+        "extra_headers": dict(headers or {}),
+        "requests": {},
+        "lock": Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory = directory))
+    server.daemon_threads = True
+    server.feed_handler = handler
+
+    Thread(target = server.serve_forever, daemon = True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    # Usage: python local_feed_server.py <directory> [port] [delay]
+    server, base_url = start_server(argv[1], port = int(argv[2]) if len(argv) > 2 else 8000,
+                                    default_delay = float(argv[3]) if len(argv) > 3 else 0)
+    print(f"Serving {argv[1]} at {base_url}")
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,306 @@
+from tkinter import *
+from tkinter import messagebox
+from queue import Empty, Queue
+from threading import Thread
+from article import ArticleBatch
+from refresh_worker import RefreshWorker
+from preview_pane import PreviewPane, SelectionRows
+from instrumentation import count, span
+from weather_news_mixer import (title, sources, news_sources, background_image_file_path, load_articles, available_titles,
+                                selected_articles, preview_line, export_to_HTML, save_to_SQL, search_SQL)
+
+# Font variables
+title_font = ("Verdana", 24, "bold")
+spinbox_font = ("Helvetica", 20)
+labelframe_font = ("Verdana", 12, "bold")
+label_font = ("Helvetica", 12)
+listbox_font = ("Times", 12, "bold")
+
+# Colour variables
+title_colour = "#00cdff"
+label_colour = "#0096fa"
+widget_colour = "#64c8fa"
+
+# Refresh variables
+refresh_interval = 15 * 60
+refresh_poll_interval = 100
+
+class MixerGUI:
+    """
+    The Tkinter window for choosing how many articles to mix from each news source.
+
+    The window opens straight away with no articles. A `RefreshWorker` loads every source in the background on a
+    schedule, and its results are polled from the Tk thread with `root.after`, updating the spinbox ranges and the
+    per-source progress as they arrive.
+
+    Attributes:
+        root (Tk): The root window the widgets are built in.
+        batches (dict): A dict mapping each news source name to its latest `ArticleBatch`.
+        worker (RefreshWorker): The background worker refreshing the news sources.
+
+    Examples:
+        >>> root = Tk()
+        >>> MixerGUI(root)
+        >>> root.mainloop()
+    """
+    def __init__(self, root, load = load_articles, interval = refresh_interval):
+        self.root = root
+        self.batches = {source: ArticleBatch(source) for source in news_sources}
+        self.source_states = {source: "waiting" for source in news_sources}
+
+        root.title(title) # Set window title
+
+        # Add background image to window
+        self.background_image = PhotoImage(file = background_image_file_path)
+        background_image_label = Label(root, image = self.background_image)
+        background_image_label.grid(row = 0, column = 0, rowspan = 3, columnspan = 3)
+
+        # Title label widget
+        title_label = Label(root, text = title, bg = title_colour, font = title_font)
+        title_label.grid(row = 0, column = 0, columnspan = 3)
+
+        # Frame widget to hold all button widgets
+        button_frame = Frame(root, bg = label_colour)
+        button_frame.grid(row = 1, column = 1, padx = 10)
+
+        # Button widgets
+        preview_button = Button(button_frame, text = "Preview Selections", bg = widget_colour, activebackground = label_colour, command = self.preview_selections)
+        self.export_button = Button(button_frame, text = "Export Selections", bg = widget_colour, activebackground = label_colour, command = self.export_selections)
+        save_button = Button(button_frame, text = "Save Selections", bg = widget_colour, activebackground = label_colour, command = self.save_selections)
+
+        # Pack all button widgets
+        preview_button.pack(padx = 15, pady = 10)
+        self.export_button.pack(padx = 15, pady = 10, fill = X)
+        save_button.pack(padx = 15, pady = 10, fill = X)
+
+        # Search box and button widgets for the saved stories, showing results in the preview
+        self.search_entry = Entry(button_frame, width = 18, bg = widget_colour, font = label_font)
+        search_button = Button(button_frame, text = "Search Saved Stories", bg = widget_colour, activebackground = label_colour, command = self.search_saved_stories)
+        self.search_entry.bind("<Return>", lambda event: self.search_saved_stories())
+
+        # Pack search widgets
+        self.search_entry.pack(padx = 15, pady = (10, 0), fill = X)
+        search_button.pack(padx = 15, pady = 10, fill = X)
+
+        # LabelFrame widget for each group of news sources, alternating either side of the buttons
+        groups = list(dict.fromkeys(source.group for source in sources))
+        labelframes = {}
+        for index, group in enumerate(groups):
+            labelframes[group] = LabelFrame(root, text = group, bg = label_colour, font = labelframe_font, labelanchor = "n")
+            labelframes[group].grid(row = 1 + index // 2, column = 0 if index % 2 == 0 else 2, padx = 10)
+
+        # Label and spinbox widgets for each news source, starting at zero until its articles are loaded
+        self.spinboxes = {}
+        self.spinbox_values = {}
+        for source in sources:
+            labelframe = labelframes[source.group]
+            row = len(labelframe.grid_slaves(column = 0))
+
+            source_label = Label(labelframe, text = source.name, bg = label_colour, font = label_font)
+            source_label.grid(row = row, column = 0, padx = 10)
+
+            self.spinbox_values[source.name] = StringVar(root, value = "0")
+            self.spinboxes[source.name] = Spinbox(labelframe, from_ = 0, to = 0, width = 2, font = spinbox_font, bg = widget_colour, textvariable = self.spinbox_values[source.name])
+            self.spinboxes[source.name].grid(row = row, column = 2, padx = 10, pady = 15)
+
+        # Rows below the news source groups
+        preview_row = 1 + max(1, (len(groups) + 1) // 2)
+        background_image_label.grid(rowspan = preview_row + 1)
+
+        # Frame widget to hold all widgets involving news previewing
+        preview_frame = Frame(root)
+        preview_frame.grid(row = preview_row, column = 0, columnspan = 3)
+
+        # Preview pane rendering only the rows in view, over the selected articles or the search results
+        self.selection_rows = SelectionRows()
+        self.news_preview = PreviewPane(preview_frame, preview_line, width = 80, height = 5, bg = label_colour, font = listbox_font, wrap = WORD, spacing1 = 5, spacing3 = 10)
+        self.news_preview.pack()
+
+        # The preview follows every change to a count, whether typed or from the arrows
+        for spinbox_value in self.spinbox_values.values():
+            spinbox_value.trace_add("write", lambda *args: self.update_preview())
+
+        # Frame widget to hold all widgets involving refreshing
+        refresh_frame = Frame(root, bg = label_colour)
+        refresh_frame.grid(row = preview_row + 1, column = 0, columnspan = 3, sticky = "ew")
+
+        # Widgets for refreshing
+        self.refresh_status_label = Label(refresh_frame, text = "", bg = label_colour, font = label_font, anchor = "w")
+        refresh_button = Button(refresh_frame, text = "Refresh Now", bg = widget_colour, activebackground = label_colour, command = self.refresh_now)
+        self.cancel_button = Button(refresh_frame, text = "Cancel Refresh", bg = widget_colour, activebackground = label_colour, command = self.cancel_refresh, state = DISABLED)
+
+        # Pack all refreshing widgets
+        self.refresh_status_label.pack(side = LEFT, padx = 10, fill = X, expand = True)
+        self.cancel_button.pack(side = RIGHT, padx = 10, pady = 5)
+        refresh_button.pack(side = RIGHT, padx = 10, pady = 5)
+
+        # Start refreshing in the background and poll for its results
+        self.worker = RefreshWorker(load, interval)
+        self.worker.start()
+        self.root.after(refresh_poll_interval, self.poll_refresh)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def counts(self):
+        """
+        Returns:
+            dict: A dict mapping each news source name to the count retrieved from its spinbox, or 0 while it is
+                empty or being typed over with something other than a number.
+        """
+        counts = {}
+        for source, spinbox in self.spinboxes.items():
+            value = spinbox.get().strip()
+            counts[source] = int(value) if value.isdigit() else 0
+        return counts
+
+    def preview_selections(self):
+        """
+        Previews selected news articles in the preview pane, in source order from the top.
+
+        Only the rows in view are rendered, so selections of any size preview straight away. From then on the preview
+        follows the spinboxes and refreshed articles, re-rendering only when a changed row is in view.
+        """
+        with span("preview"):
+            self.selection_rows.update(self.batches, self.counts())
+            self.news_preview.show(self.selection_rows)
+        count("lines_previewed", len(self.selection_rows))
+
+    def update_preview(self):
+        """
+        Apply the latest spinbox counts and articles to the preview, if it is showing the selections.
+        """
+        if self.news_preview.rows is not self.selection_rows:
+            return
+
+        with span("update_preview"):
+            self.news_preview.refresh(self.selection_rows.update(self.batches, self.counts()))
+
+    def search_saved_stories(self):
+        """
+        Search the saved stories for the words in the search box and display the best matches in the preview pane.
+        """
+        self.news_preview.show(search_SQL(self.search_entry.get()))
+
+    def poll_refresh(self):
+        """
+        Apply every message the refresh worker has posted since the last poll, then poll again shortly.
+        """
+        while True:
+            try:
+                kind, source, value = self.worker.results.get_nowait()
+            except Empty:
+                break
+
+            if kind == "started":
+                self.source_states = {source: "waiting" for source in news_sources}
+                self.cancel_button.config(state = NORMAL)
+            elif kind == "progress":
+                self.source_states[source] = value
+            elif kind == "finished":
+                self.update_batches(value)
+                self.cancel_button.config(state = DISABLED)
+            elif kind in ("failed", "cancelled"):
+                # Keep the previous articles and mark every unfinished source
+                for source, state in self.source_states.items():
+                    if state != "done":
+                        self.source_states[source] = kind
+                self.cancel_button.config(state = DISABLED)
+
+        self.refresh_status_label.config(text = "   ".join(f"{source}: {state}" for source, state in self.source_states.items()))
+        self.root.after(refresh_poll_interval, self.poll_refresh)
+
+    def update_batches(self, batches):
+        """
+        Swap in freshly loaded articles and update each spinbox range to match, lowering any count that is now too high.
+        A preview of the selections follows the new articles.
+
+        Args:
+            batches (dict): A dict mapping each news source name to its new `ArticleBatch`.
+        """
+        self.batches = batches
+        counts = self.counts()
+
+        for source in sources:
+            spinbox = self.spinboxes[source.name]
+            num_titles = available_titles(source, batches[source.name])
+
+            spinbox.config(to = num_titles)
+            if counts[source.name] > num_titles:
+                spinbox.delete(0, END)
+                spinbox.insert(0, num_titles)
+
+        self.update_preview()
+
+    def refresh_now(self):
+        """
+        Refresh every news source straight away.
+        """
+        self.worker.refresh_now()
+
+    def cancel_refresh(self):
+        """
+        Cancel the refresh in progress, keeping the articles from the last one.
+        """
+        self.worker.cancel()
+
+    def close(self):
+        """
+        Stop the refresh worker and close the window.
+        """
+        self.worker.stop()
+        self.root.destroy()
+
+    def export_selections(self):
+        """
+        Export the selected news articles to the HTML file on a background thread, as inlining their images can mean
+        downloading every one. The export button is disabled until the export finishes.
+        """
+        articles = selected_articles(self.batches, self.counts())
+        results = Queue()
+
+        def export():
+            try:
+                export_to_HTML(articles)
+                results.put(None)
+            except Exception as error:
+                results.put(error)
+
+        self.export_button.config(state = DISABLED, text = "Exporting...")
+        Thread(target = export, name = "HTML_export", daemon = True).start()
+        self.root.after(refresh_poll_interval, self.poll_export, results)
+
+    def poll_export(self, results):
+        """
+        Re-enable the export button once the export has finished, reporting any error, or poll again shortly.
+
+        Args:
+            results (Queue): The queue the export thread posts `None` or its error to when it finishes.
+        """
+        try:
+            error = results.get_nowait()
+        except Empty:
+            self.root.after(refresh_poll_interval, self.poll_export, results)
+            return
+
+        self.export_button.config(state = NORMAL, text = "Export Selections")
+        if error is not None:
+            messagebox.showerror(title, f"Couldn't export the selections: {error}")
+
+    def save_selections(self):
+        """
+        Save the selected news articles to the SQLite database.
+        """
+        save_to_SQL(selected_articles(self.batches, self.counts()))
+
+def run_gui():
+    """
+    Build and display the Tkinter GUI until the window is closed, loading the news sources in the background.
+    """
+    with span("build_GUI"):
+        root = Tk() # Create instance of tkinter class
+        MixerGUI(root)
+
+    # Display Tkinter GUI
+    root.mainloop()
+
+if __name__ == "__main__":
+    run_gui()
@@ -0,0 +1,348 @@
+from email.utils import parsedate_to_datetime
+from hashlib import sha1
+from re import match
+from sqlite3 import connect
+
+from article import Article
+
+# Placeholder date stored for sources that don't publish one
+missing_date = "N/A"
+
+# Most results returned by a search unless a limit is given
+default_search_limit = 20
+
+def content_hash(source, title, date):
+    """
+    Hash the fields that identify a story so the same story is only ever stored once.
+
+    Args:
+        source (str): The name of the news source.
+        title (str): The headline of the story.
+        date (str): The publish date of the story.
+
+    Returns:
+        str: The hexadecimal SHA-1 digest of the three fields.
+
+    Examples:
+        >>> content_hash("ABC News", "Storms ahead", "2024-05-20T01:00:00Z")
+        '5b0b1c...'
+    """
+    return sha1("\x1f".join((source, title, date)).encode("UTF-8")).hexdigest()
+
+def sortable_date(date):
+    """
+    Convert a publish date from any source into an ISO 8601 date that sorts and compares as text.
+
+    Args:
+        date (str): The publish date as given by the source, either ISO 8601 or the RFC 822 format used by RSS feeds.
+
+    Returns:
+        str: The date as "YYYY-MM-DD", or `None` if it can't be read.
+
+    Examples:
+        >>> sortable_date("2024-05-20T01:00:00Z")
+        '2024-05-20'
+        >>> sortable_date("Mon, 20 May 2024 11:00:00 +1000")
+        '2024-05-20'
+    """
+    ISO_match = match(r"\d{4}-\d{2}-\d{2}", date)
+    if ISO_match:
+        return ISO_match.group()
+    try:
+        return parsedate_to_datetime(date).date().isoformat()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def match_expression(keywords):
+    """
+    Build an FTS5 query that matches stories containing every keyword.
+
+    Each keyword is quoted so that characters with a meaning in the FTS5 query syntax are searched for literally.
+
+    Args:
+        keywords (str): The keywords separated by spaces.
+
+    Returns:
+        str: The FTS5 match expression.
+
+    Examples:
+        >>> match_expression("hail south-east")
+        '"hail" "south-east"'
+    """
+    return " ".join('"' + keyword.replace('"', '""') + '"' for keyword in keywords.split())
+
+def story_row(article):
+    """
+    Prepare an article to be saved, working out its content hash and sortable date.
+
+    Bulk loaders can call this in worker processes and pass the rows to `NewsStore.save_rows`.
+
+    Args:
+        article (Article): The article to prepare.
+
+    Returns:
+        tuple: The headline, news feed, publication date, content hash, description and sortable date of the story.
+    """
+    date = article.date or missing_date
+    return (article.title, article.source, date, content_hash(article.source, article.title, date), article.description,
+            sortable_date(date))
+
+class NewsStore:
+    """
+    An incremental SQLite store for saved news stories.
+
+    One connection is opened lazily and reused for every save. The database runs in WAL mode so readers never block
+    the writer. Each save inserts all of its rows with `executemany` inside a single transaction, and stories already
+    in the table are skipped by their content hash, so history builds up across runs without ever being rewritten.
+
+    Headlines and descriptions are indexed in an FTS5 table. Each save indexes only its new stories in the same
+    transaction, so the archive can always be searched by keyword and date range.
+
+    Attributes:
+        db_name (str): The string path of the SQLite database file.
+
+    Examples:
+        >>> store = NewsStore("news_log.db")
+        >>> store.save(selected_articles())
+        3
+        >>> store.search("hail", start_date = "2024-05-01")
+        [Article('ABC News', 'Hail smashes south-east', date = '2024-05-20T01:00:00Z')]
+        >>> store.close()
+    """
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._connection = None
+
+    @property
+    def connection(self):
+        """
+        sqlite3.Connection: The shared connection, opened and set up on first use.
+        """
+        if self._connection is None:
+            self._connection = connect(self.db_name)
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            self._create_schema()
+        return self._connection
+
+    def _create_schema(self):
+        SQL_cursor = self._connection.cursor()
+
+        # Create a table
+        SQL_cursor.execute('''CREATE TABLE IF NOT EXISTS selected_stories (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            headline TEXT NOT NULL,
+                            news_feed TEXT NOT NULL,
+                            publication_date TEXT NOT NULL,
+                            content_hash TEXT,
+                            description TEXT NOT NULL DEFAULT '',
+                            sortable_date TEXT
+                        )''')
+
+        # Upgrade tables created before stories were hashed, described or given a sortable date
+        columns = [row[1] for row in SQL_cursor.execute("PRAGMA table_info(selected_stories)")]
+        if "content_hash" not in columns:
+            SQL_cursor.execute("ALTER TABLE selected_stories ADD COLUMN content_hash TEXT")
+        if "description" not in columns:
+            SQL_cursor.execute("ALTER TABLE selected_stories ADD COLUMN description TEXT NOT NULL DEFAULT ''")
+        if "sortable_date" not in columns:
+            SQL_cursor.execute("ALTER TABLE selected_stories ADD COLUMN sortable_date TEXT")
+            dates = SQL_cursor.execute("SELECT DISTINCT publication_date FROM selected_stories").fetchall()
+            SQL_cursor.executemany("UPDATE selected_stories SET sortable_date = ? WHERE publication_date = ?",
+                                   [(sortable_date(date), date) for date, in dates])
+
+        # Backfill hashes for any rows saved before hashing, keeping only the first copy of each story
+        unhashed = SQL_cursor.execute('''SELECT id, news_feed, headline, publication_date
+                                         FROM selected_stories WHERE content_hash IS NULL''').fetchall()
+        if unhashed:
+            SQL_cursor.executemany("UPDATE selected_stories SET content_hash = ? WHERE id = ?",
+                                   [(content_hash(source, headline, date), row_id) for row_id, source, headline, date in unhashed])
+            SQL_cursor.execute('''DELETE FROM selected_stories WHERE id NOT IN (
+                                    SELECT MIN(id) FROM selected_stories GROUP BY content_hash
+                                )''')
+
+        # Index the hash for upserts and the columns stories are looked up by
+        SQL_cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS selected_stories_content_hash ON selected_stories (content_hash)")
+        SQL_cursor.execute("CREATE INDEX IF NOT EXISTS selected_stories_news_feed ON selected_stories (news_feed)")
+        SQL_cursor.execute("CREATE INDEX IF NOT EXISTS selected_stories_publication_date ON selected_stories (publication_date)")
+        SQL_cursor.execute("CREATE INDEX IF NOT EXISTS selected_stories_sortable_date ON selected_stories (sortable_date)")
+
+        # Full-text index over headlines and descriptions, reading its text from selected_stories
+        search_exists = SQL_cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'selected_stories_search'").fetchone()
+        SQL_cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS selected_stories_search USING fts5 (
+                            headline, description,
+                            content = 'selected_stories', content_rowid = 'id', tokenize = 'porter unicode61'
+                        )''')
+        if not search_exists:
+            SQL_cursor.execute("INSERT INTO selected_stories_search (selected_stories_search) VALUES ('rebuild')")
+
+        # Keep the full-text index in step with changes to selected_stories. New stories are indexed by save() in one
+        # statement instead, since a trigger makes FTS5 flush its index to disk after every row
+        SQL_cursor.execute("DROP TRIGGER IF EXISTS selected_stories_search_insert")
+        SQL_cursor.execute('''CREATE TRIGGER IF NOT EXISTS selected_stories_search_delete AFTER DELETE ON selected_stories BEGIN
+                            INSERT INTO selected_stories_search (selected_stories_search, rowid, headline, description)
+                            VALUES ('delete', old.id, old.headline, old.description);
+                        END''')
+        SQL_cursor.execute('''CREATE TRIGGER IF NOT EXISTS selected_stories_search_update AFTER UPDATE OF headline, description ON selected_stories BEGIN
+                            INSERT INTO selected_stories_search (selected_stories_search, rowid, headline, description)
+                            VALUES ('delete', old.id, old.headline, old.description);
+                            INSERT INTO selected_stories_search (rowid, headline, description)
+                            VALUES (new.id, new.headline, new.description);
+                        END''')
+
+        # Snapshot files already bulk ingested, so that unchanged files are skipped on the next run
+        SQL_cursor.execute('''CREATE TABLE IF NOT EXISTS ingested_files (
+                            path TEXT PRIMARY KEY,
+                            modified REAL NOT NULL,
+                            size INTEGER NOT NULL,
+                            content_hash TEXT NOT NULL
+                        )''')
+        SQL_cursor.execute("CREATE INDEX IF NOT EXISTS ingested_files_content_hash ON ingested_files (content_hash)")
+
+        self._connection.commit()
+
+    def save(self, articles):
+        """
+        Store any articles not already saved, in a single transaction.
+
+        Args:
+            articles (iterable of Article): The articles to save.
+
+        Returns:
+            int: The number of new stories written.
+        """
+        return self.save_rows([story_row(article) for article in articles])
+
+    def save_rows(self, rows):
+        """
+        Store any stories not already saved from rows prepared by `story_row`, in a single transaction.
+
+        The new stories are added to the full-text index in the same transaction.
+
+        Args:
+            rows (list of tuple): The stories to save, as returned by `story_row`.
+
+        Returns:
+            int: The number of new stories written.
+        """
+        connection = self.connection
+        with connection:
+            # Take the write lock first, so that every story after the newest one so far is one of ours
+            connection.execute("BEGIN IMMEDIATE")
+            newest_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM selected_stories").fetchone()[0]
+
+            SQL_cursor = connection.executemany('''
+                                    INSERT INTO selected_stories (headline, news_feed, publication_date, content_hash,
+                                                                  description, sortable_date)
+                                    VALUES (?, ?, ?, ?, ?, ?)
+                                    ON CONFLICT (content_hash) DO NOTHING
+                                ''', rows)
+            connection.execute('''INSERT INTO selected_stories_search (rowid, headline, description)
+                                  SELECT id, headline, description FROM selected_stories WHERE id > ?''', (newest_id,))
+        return SQL_cursor.rowcount
+
+    def search(self, keywords = "", start_date = None, end_date = None, limit = default_search_limit, max_ranked = None):
+        """
+        Search the saved stories by keyword and publish date.
+
+        Keyword searches return the best matches first, ranked by BM25 with headline matches weighted above
+        description matches. Every match in the date range is ranked unless `max_ranked` is given, in which case only
+        that many of the matches with the latest publish dates are, so recent stories aren't buried under older ones.
+        Searches without keywords return the newest stories first.
+
+        Args:
+            keywords (str): Words that must all appear in the headline or description. Words are matched on their
+                stems, so "storm" also finds "storms". An empty string matches every story.
+            start_date (str): The earliest publish date wanted, as "YYYY-MM-DD", or `None` for no limit.
+            end_date (str): The latest publish date wanted, as "YYYY-MM-DD", or `None` for no limit.
+            limit (int): The most stories returned.
+            max_ranked (int): The most matches ranked by relevance, taking those with the latest publish dates, or
+                `None` to rank every match.
+
+        Returns:
+            list of Article: The matching stories, without images.
+
+        Examples:
+            >>> store.search("flood warning", start_date = "2024-01-01", end_date = "2024-06-30", limit = 5)
+            [Article('SBS News', 'Flood warning issued for Lismore', date = '2024-03-02T04:30:00Z')]
+        """
+        # Stories without a readable date are left out of date-range searches
+        date_conditions = ""
+        date_parameters = []
+        if start_date:
+            date_conditions += " AND selected_stories.sortable_date >= ?"
+            date_parameters.append(start_date)
+        if end_date:
+            date_conditions += " AND selected_stories.sortable_date <= ?"
+            date_parameters.append(end_date)
+
+        if keywords.strip():
+            # Stories are saved roughly in date order, so only scan the index between the first and last story in range
+            if date_conditions:
+                date_conditions += f''' AND selected_stories_search.rowid BETWEEN
+                                       (SELECT MIN(id) FROM selected_stories WHERE 1{date_conditions}) AND
+                                       (SELECT MAX(id) FROM selected_stories WHERE 1{date_conditions})'''
+                date_parameters *= 3
+
+            # When capped, score only the matches with the latest publish dates
+            matches = f'''SELECT selected_stories.id, bm25(selected_stories_search, 2.0, 1.0) AS score
+                           FROM selected_stories_search JOIN selected_stories ON selected_stories.id = selected_stories_search.rowid
+                           WHERE selected_stories_search MATCH ?{date_conditions}'''
+            parameters = [match_expression(keywords)] + date_parameters
+            if max_ranked is not None:
+                matches += " ORDER BY selected_stories.sortable_date DESC, selected_stories.id DESC LIMIT ?"
+                parameters.append(max_ranked)
+
+            query = f'''SELECT news_feed, headline, publication_date, description
+                        FROM ({matches}) AS matches JOIN selected_stories ON selected_stories.id = matches.id
+                        ORDER BY matches.score LIMIT ?'''
+            parameters.append(limit)
+        else:
+            # List every story in the date range, newest first
+            query = f'''SELECT news_feed, headline, publication_date, description FROM selected_stories
+                        WHERE 1{date_conditions}
+                        ORDER BY sortable_date DESC, id DESC LIMIT ?'''
+            parameters = date_parameters + [limit]
+
+        rows = self.connection.execute(query, parameters).fetchall()
+        return [Article(source, headline, "" if date == missing_date else date, description)
+                for source, headline, date, description in rows]
+
+    def ingested_files(self):
+        """
+        Returns:
+            dict: A dict mapping the string path of every ingested snapshot file to its modification time, size and
+                content hash when it was ingested.
+        """
+        rows = self.connection.execute("SELECT path, modified, size, content_hash FROM ingested_files")
+        return {path: (modified, size, file_hash) for path, modified, size, file_hash in rows}
+
+    def record_ingested(self, files):
+        """
+        Remember snapshot files as ingested, replacing any earlier record of the same path.
+
+        Args:
+            files (iterable of tuple): The string path, modification time, size and content hash of each file.
+        """
+        with self.connection:
+            self.connection.executemany('''
+                                        INSERT INTO ingested_files (path, modified, size, content_hash)
+                                        VALUES (?, ?, ?, ?)
+                                        ON CONFLICT (path) DO UPDATE SET modified = excluded.modified,
+                                            size = excluded.size, content_hash = excluded.content_hash
+                                    ''', files)
+
+    def count(self):
+        """
+        Returns:
+            int: The number of stories stored.
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM selected_stories").fetchone()[0]
+
+    def close(self):
+        """
+        Close the shared connection, if it is open.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,145 @@
+from itertools import repeat
+from json import JSONDecoder
+from operator import itemgetter
+from re import compile as compile_pattern
+
+from instrumentation import count
+
+# The opening tag of the script a Next.js page embeds its initial state in, up to the start of the JSON
+state_script_pattern = compile_pattern(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>\s*')
+
+# Decodes one JSON value from a position in a string, ignoring whatever follows it
+state_decoder = JSONDecoder()
+
+def find_page_state(file_contents):
+    """
+    Locate the JSON state embedded in a Next.js page and decode it in a single pass.
+
+    The state is decoded in place from the end of its script tag, without copying it out of the page first.
+
+    Args:
+        file_contents (str): The downloaded page contents.
+
+    Returns:
+        The decoded state, usually a dict, or `None` if the page has no readable state.
+
+    Examples:
+        >>> find_page_state('<script id="__NEXT_DATA__" type="application/json">{"props": {}}</script>')
+        {'props': {}}
+    """
+    match = state_script_pattern.search(file_contents)
+    if match is None:
+        return None
+
+    try:
+        state, _ = state_decoder.raw_decode(file_contents, match.end())
+    except ValueError:
+        return None
+    return state
+
+class RecordRule:
+    """
+    A precompiled rule for pulling aligned records out of a page's decoded state.
+
+    Every object in the state that holds all of the rule's required keys is one record, and each field is read from
+    that object along its path of keys. All of a record's fields come from the same object, so the columns returned
+    always line up, however the page orders or nests its stories. Records whose required fields are not strings are
+    rejected and counted as `records_rejected`; optional fields that are missing or not strings are left empty.
+
+    Attributes:
+        name (str): The name of the rule, used to label its rejected records.
+        fields (dict): A dict mapping each field to its tuple of keys within a record object.
+        required (tuple): The fields every record must have.
+        in_list (bool): Whether records must be items of a list, skipping one-off objects like a page's header and
+            footer that share their keys.
+
+    Examples:
+        >>> rule = RecordRule("SBS", {"title": ("title",), "image": ("image",)}, in_list = True)
+        >>> rule.extract({"page": {"title": "Weather"}, "tiles": [{"title": "Heatwave", "image": "heat.jpg"}]})
+        {'title': ['Heatwave'], 'image': ['heat.jpg']}
+    """
+    def __init__(self, name, fields, required = None, in_list = False):
+        self.name = name
+        self.fields = {field: tuple(keys) for field, keys in fields.items()}
+        self.required = tuple(fields if required is None else required)
+        self.in_list = in_list
+
+        # Objects are matched on the first key of each required field's path
+        self._match_keys = frozenset(self.fields[field][0] for field in self.required)
+        self._paths = [(field in self.required, self.fields[field]) for field in self.fields]
+
+    def extract(self, state):
+        """
+        Walk the state in document order, collecting one entry per field for every record found.
+
+        Args:
+            state: The decoded state, e.g. from `find_page_state`.
+
+        Returns:
+            dict: A dict mapping each field to its list of values, all of the same length. Every list is empty if
+                the state is neither an object nor an array.
+        """
+        # Only objects and arrays can hold records
+        columns = [[] for _ in self.fields]
+        rejected = self._walk(state, False, columns) if type(state) is dict or type(state) is list else 0
+        if rejected:
+            count("records_rejected", rejected, rule = self.name)
+        return dict(zip(self.fields, columns))
+
+    def _walk(self, node, listed, columns):
+        # Collect the records in a dict or list, keeping its children in their order on the page, and return the
+        # number rejected. Records are not searched for records nested inside them
+        if type(node) is dict:
+            if (listed or not self.in_list) and self._match_keys <= node.keys():
+                return self._read(node, columns)
+            children = node.values()
+        elif self._read_list(node, columns):
+            return 0
+        else:
+            children = node
+
+        rejected = 0
+        listed = type(node) is list
+        for child in children:
+            if type(child) is dict or type(child) is list:
+                rejected += self._walk(child, listed, columns)
+        return rejected
+
+    def _read(self, node, columns):
+        # Follow each field's path, rejecting the record if a required field isn't a string
+        values = []
+        for is_required, keys in self._paths:
+            value = node
+            for key in keys:
+                value = value.get(key) if type(value) is dict else None
+            if type(value) is not str:
+                if is_required:
+                    return 1
+                value = ""
+            values.append(value)
+
+        for column, value in zip(columns, values):
+            column.append(value)
+        return 0
+
+    def _read_list(self, items, columns):
+        # Read a whole list of records a field at a time, if every item is a record with every field a string, and
+        # report whether it could. Lists of stories are read this way without a Python call per story
+        if not items or not all(map(isinstance, items, repeat(dict))) or not all(map(self._match_keys.issubset, items)):
+            return False
+
+        values = []
+        for _, keys in self._paths:
+            try:
+                column = items
+                for key in keys:
+                    column = list(map(itemgetter(key), column))
+            except (KeyError, TypeError):
+                return False
+            if not all(map(isinstance, column, repeat(str))):
+                return False
+            values.append(column)
+
+        for column, column_values in zip(columns, values):
+            column.extend(column_values)
+        return True
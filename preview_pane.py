@@ -0,0 +1,186 @@
+from bisect import bisect_right
+from itertools import accumulate
+from tkinter import DISABLED, END, LEFT, NORMAL, RIGHT, Y, Frame, Scrollbar, Text
+
+# Rows scrolled by each notch of the mouse wheel
+wheel_scroll_rows = 3
+
+class SelectionRows:
+    """
+    The articles chosen from each source, as a sequence indexed by row without copying any batch.
+
+    Each row is looked up on demand from the running totals of the counts, so even selections of millions of articles
+    cost one entry per source. Updating the counts or batches reports the first row that changed, letting a view keep
+    every row before it.
+
+    Examples:
+        >>> rows = SelectionRows(batches, {'ABC News': 2, 'SBS News': 1})
+        >>> [article.source for article in rows]
+        ['ABC News', 'ABC News', 'SBS News']
+        >>> rows.update(batches, {'ABC News': 2, 'SBS News': 3})
+        3
+    """
+    def __init__(self, batches = None, counts = None):
+        self._selection = []
+        self._offsets = [0]
+        if batches is not None:
+            self.update(batches, counts or {})
+
+    def update(self, batches, counts):
+        """
+        Change the batches or the number of articles chosen from each.
+
+        Args:
+            batches (dict): A dict mapping each news source name to its `ArticleBatch`.
+            counts (dict): A dict mapping news source names to the number of articles wanted. Sources left out are
+                skipped, and counts beyond the size of a batch are clipped.
+
+        Returns:
+            int: The first row that changed, or `None` if every row is the same as before.
+        """
+        selection = [(source, batch, min(max(counts.get(source, 0), 0), len(batch))) for source, batch in batches.items()]
+
+        # Rows only change from the first source with a different batch or count, and only after the rows it keeps
+        # when just its count changed
+        first_changed = None
+        for position, (source, batch, count) in enumerate(selection):
+            if position >= len(self._selection) or self._selection[position][1] is not batch:
+                first_changed = self._offsets[position]
+                break
+            if self._selection[position][2] != count:
+                first_changed = self._offsets[position] + min(count, self._selection[position][2])
+                break
+        else:
+            if len(selection) != len(self._selection):
+                first_changed = self._offsets[len(selection)]
+
+        self._selection = selection
+        self._offsets = list(accumulate((count for _, _, count in selection), initial = 0))
+        return first_changed
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row out of range")
+
+        # Find the last source starting at or before the row
+        position = bisect_right(self._offsets, index) - 1
+        return self._selection[position][1][index - self._offsets[position]]
+
+class PreviewPane(Frame):
+    """
+    A scrolling preview of a sequence of articles that only renders the rows in view.
+
+    The text widget holds just the visible window of rows, re-rendered as it scrolls, so previewing a selection of
+    any size costs the same. The scrollbar is driven by the row position rather than by the text widget.
+
+    Attributes:
+        format_row (callable): Called with each article in view to return its line of text.
+        rows (sequence): The articles shown, e.g. a `SelectionRows` or a list of `Article`.
+        top (int): The index of the first row in view.
+        visible_rows (int): The number of rows rendered at once, which is also the height of the text widget in lines.
+        text (Text): The text widget holding the rows in view. Every other keyword argument of the pane configures it.
+
+    Examples:
+        >>> pane = PreviewPane(root, preview_line, width = 80, height = 5)
+        >>> pane.pack()
+        >>> pane.show(SelectionRows(batches, {'ABC News': 5000}))
+    """
+    def __init__(self, master, format_row, height = 5, **text_options):
+        super().__init__(master)
+        self.format_row = format_row
+        self.rows = []
+        self.top = 0
+        self.visible_rows = height
+
+        # Widgets for the rows in view and the scrollbar over every row
+        self.text = Text(self, height = height, state = DISABLED, **text_options)
+        self.scrollbar = Scrollbar(self, orient = "vertical", command = self.yview)
+
+        # Scroll by row with the mouse wheel, on Windows and macOS and then on X11
+        self.text.bind("<MouseWheel>", lambda event: self.scroll(-wheel_scroll_rows if event.delta > 0 else wheel_scroll_rows))
+        self.text.bind("<Button-4>", lambda event: self.scroll(-wheel_scroll_rows))
+        self.text.bind("<Button-5>", lambda event: self.scroll(wheel_scroll_rows))
+
+        # Pack the pane's widgets
+        self.text.pack(side = LEFT)
+        self.scrollbar.pack(side = RIGHT, fill = Y)
+
+    def show(self, rows):
+        """
+        Preview a new sequence of articles from the top.
+
+        Args:
+            rows (sequence): The articles to show. It is read each time the pane renders, so a `SelectionRows` can be
+                updated in place and passed to `refresh`.
+        """
+        self.rows = rows
+        self.top = 0
+        self._render()
+
+    def refresh(self, first_changed = 0):
+        """
+        Bring the pane up to date after its rows changed in place, re-rendering only if a changed row is in view.
+
+        Args:
+            first_changed (int): The first row that changed, as returned by `SelectionRows.update`, or `None` if none
+                did.
+        """
+        if first_changed is None:
+            return
+
+        top = min(self.top, max(len(self.rows) - 1, 0))
+        if first_changed < top + self.visible_rows or top != self.top:
+            self.top = top
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def scroll(self, rows):
+        """
+        Move the view up (negative) or down (positive) by a number of rows.
+
+        Args:
+            rows (int): The number of rows to move.
+        """
+        self._scroll_to(self.top + rows)
+        return "break"
+
+    def yview(self, *args):
+        """
+        Handle the scrollbar's commands: "moveto" a fraction of the rows, or "scroll" by units (rows) or pages.
+        """
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * self.visible_rows if args[2] == "pages" else amount)
+
+    def _scroll_to(self, top):
+        # The last row can be scrolled to the top, so long rows that wrap can always be seen in full
+        top = min(max(top, 0), max(len(self.rows) - 1, 0))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _render(self):
+        # Replace the text with the rows in view, in order from the top
+        bottom = min(self.top + self.visible_rows, len(self.rows))
+        lines = "\n".join(self.format_row(self.rows[index]) for index in range(self.top, bottom))
+
+        self.text.config(state = NORMAL)
+        self.text.delete(1.0, END)
+        self.text.insert(END, lines)
+        self.text.config(state = DISABLED)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        # Show the window in view as a fraction of every row
+        if not self.rows:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.top / len(self.rows), min(self.top + self.visible_rows, len(self.rows)) / len(self.rows))
@@ -0,0 +1,82 @@
+from queue import Queue
+from threading import Event, Thread
+
+class RefreshWorker(Thread):
+    """
+    A background thread that reloads every news source on a schedule and posts the results to a queue.
+
+    The GUI thread never waits on the network. It polls `results` (e.g. with `root.after`) and receives messages as
+    `(kind, source, value)` tuples:
+
+        - ("started", None, None): A refresh has begun.
+        - ("progress", source, state): A source moved to a new state, e.g. "fetching", "downloaded", "done" or "stale".
+        - ("finished", None, batches): A refresh completed with the dict of `ArticleBatch` per source.
+        - ("failed", None, error): A refresh raised an exception.
+        - ("cancelled", None, None): A refresh was cancelled and its results thrown away.
+
+    Attributes:
+        load (callable): Called with a `progress` keyword argument to load the batches, e.g. `load_articles`.
+        interval (float): The number of seconds to wait between the end of one refresh and the start of the next.
+        results (Queue): The queue the messages are posted to.
+
+    Examples:
+        >>> worker = RefreshWorker(load_articles, interval = 900)
+        >>> worker.start()
+        >>> worker.results.get()
+        ('started', None, None)
+    """
+    def __init__(self, load, interval, results = None):
+        super().__init__(name = "refresh_worker", daemon = True)
+        self.load = load
+        self.interval = interval
+        self.results = Queue() if results is None else results
+        self._wake = Event()
+        self._cancelled = Event()
+        self._stopped = Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._cancelled.clear()
+            self.results.put(("started", None, None))
+
+            try:
+                batches = self.load(progress = self._report_progress)
+            except Exception as error:
+                if self._cancelled.is_set():
+                    self.results.put(("cancelled", None, None))
+                else:
+                    self.results.put(("failed", None, error))
+            else:
+                if self._cancelled.is_set():
+                    self.results.put(("cancelled", None, None))
+                else:
+                    self.results.put(("finished", None, batches))
+
+            # Sleep until the next scheduled refresh unless woken early
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _report_progress(self, source, state):
+        if not self._cancelled.is_set():
+            self.results.put(("progress", source, state))
+
+    def refresh_now(self):
+        """
+        Start the next refresh straight away instead of waiting for the schedule.
+        """
+        self._wake.set()
+
+    def cancel(self):
+        """
+        Cancel the refresh in progress. Downloads already under way finish in the background but their results are
+        thrown away, and the schedule carries on as normal.
+        """
+        self._cancelled.set()
+
+    def stop(self):
+        """
+        Cancel the refresh in progress and stop scheduling new ones.
+        """
+        self._stopped.set()
+        self._cancelled.set()
+        self._wake.set()
@@ -0,0 +1,246 @@
+from importlib import import_module
+from json import load
+from threading import Lock
+
+from article import ArticleBatch
+from feed_fetcher import (default_timeout, default_connect_timeout, fetch_page, run_all, CircuitBreaker, CircuitOpenError,
+                          SourceTimeoutError)
+from instrumentation import count, span
+
+# Registered fetchers and parsers, by the names used in the sources config file
+fetchers = {}
+parsers = {}
+
+# Circuit breaker of each source, by source name, kept for as long as the application runs
+circuit_breakers = {}
+
+class EmptyBatchError(Exception):
+    """
+    Raised when a source loads without any articles, usually because its page no longer has the markup its parser
+    looks for.
+    """
+
+def register_fetcher(name):
+    """
+    Register a fetcher under a name that sources can refer to in the config file.
+
+    A fetcher is called with the `Source` and the HTTP cache, and returns whatever its source's parser expects.
+
+    Args:
+        name (str): The name to register the fetcher under.
+
+    Returns:
+        callable: A decorator that registers the function and returns it unchanged.
+
+    Examples:
+        >>> @register_fetcher("ftp")
+        ... def fetch_FTP_file(source, cache):
+        ...     ...
+    """
+    def decorator(function):
+        fetchers[name] = function
+        return function
+    return decorator
+
+def register_parser(name):
+    """
+    Register a parser under a name that sources can refer to in the config file.
+
+    A parser is called with the `Source` and the fetched contents, and returns an `ArticleBatch`.
+
+    Args:
+        name (str): The name to register the parser under.
+
+    Returns:
+        callable: A decorator that registers the function and returns it unchanged.
+
+    Examples:
+        >>> @register_parser("bom")
+        ... def parse_BoM_warnings(source, file_contents):
+        ...     ...
+    """
+    def decorator(function):
+        parsers[name] = function
+        return function
+    return decorator
+
+def resolve(registry, name):
+    """
+    Look up a fetcher or parser by its registered name, or import it from a "module:function" path.
+
+    Args:
+        registry (dict): Either `fetchers` or `parsers`.
+        name (str): A registered name, or a "module:function" path to a plugin outside this repository.
+
+    Returns:
+        callable: The fetcher or parser.
+
+    Raises:
+        KeyError: If the name is neither registered nor a "module:function" path.
+    """
+    if name in registry:
+        return registry[name]
+    if ":" in name:
+        module_name, function_name = name.split(":", 1)
+        return getattr(import_module(module_name), function_name)
+    raise KeyError(f"No fetcher or parser registered as {name!r}")
+
+@register_fetcher("http")
+def fetch_HTTP_page(source, cache):
+    # Download the page through the HTTP cache
+    return fetch_page(source.location, source.timeout, cache, source.connect_timeout)
+
+@register_fetcher("file")
+def fetch_local_file(source, cache):
+    # Leave reading the file to the parser so that it can stream it
+    return source.location
+
+class Source:
+    """
+    A news source declared in the sources config file.
+
+    Attributes:
+        name (str): The name of the news source, e.g. "ABC News".
+        group (str): The heading the source is shown under in the GUI, e.g. "Live Weather News".
+        fetcher (str): The registered name or "module:function" path of the fetcher.
+        parser (str): The registered name or "module:function" path of the parser.
+        location (str): The URL or file path the fetcher reads.
+        home_page (str): The URL credited in the sources list of the HTML export.
+        label (str): The name shown next to the home page in the sources list of the HTML export.
+        option (str): The command line option used to choose how many articles to take, e.g. "abc".
+        max_titles (int): The most articles that can be chosen, or `None` for no limit.
+        timeout (float): The number of seconds allowed to fetch and parse the source.
+        connect_timeout (float): The number of seconds allowed to connect to the source's website.
+
+    Examples:
+        >>> Source({"name": "Weatherzone", "fetcher": "file", "parser": "rss", "location": "data/wz.xml"})
+        Source('Weatherzone')
+    """
+    __slots__ = ("name", "group", "fetcher", "parser", "location", "home_page", "label", "option", "max_titles", "timeout",
+                 "connect_timeout")
+
+    def __init__(self, config):
+        self.name = config["name"]
+        self.group = config.get("group", "Weather News")
+        self.fetcher = config["fetcher"]
+        self.parser = config["parser"]
+        self.location = config["location"]
+        self.home_page = config.get("home_page", self.location)
+        self.label = config.get("label", self.name)
+        self.option = config.get("option", self.name.lower().replace(" news", "").replace(" ", "-"))
+        self.max_titles = config.get("max_titles")
+        self.timeout = config.get("timeout", default_timeout)
+        self.connect_timeout = config.get("connect_timeout", default_connect_timeout)
+
+    def __repr__(self):
+        return f"Source({self.name!r})"
+
+    def load(self, cache = None, progress = None):
+        """
+        Fetch and parse the source, timing each step and counting the articles parsed.
+
+        Args:
+            cache (HTTPCache): The HTTP cache for fetchers that download pages.
+            progress (callable): Called with the source name and "downloaded" once the fetch finishes.
+
+        Returns:
+            ArticleBatch: The articles of the source.
+        """
+        with span("fetch", source = self.name):
+            file_contents = resolve(fetchers, self.fetcher)(self, cache)
+        if progress is not None:
+            progress(self.name, "downloaded")
+
+        with span("parse", source = self.name):
+            batch = resolve(parsers, self.parser)(self, file_contents)
+        count("items_parsed", len(batch), source = self.name)
+        return batch
+
+def load_sources(config_path):
+    """
+    Read the list of news sources from a JSON config file.
+
+    Args:
+        config_path (str): The string path of the config file, holding a JSON list of source objects.
+
+    Returns:
+        list of Source: The sources in the order they are listed.
+
+    Examples:
+        >>> load_sources("data/sources.json")
+        [Source('ABC News'), Source('SBS News'), Source('Weatherzone'), Source('Courier Mail')]
+    """
+    with open(config_path, encoding = "UTF-8") as file:
+        return [Source(config) for config in load(file)]
+
+def load_batches(sources, cache = None, progress = None, last_good = None):
+    """
+    Fetch and parse every source concurrently, each against its own timeout.
+
+    A source that fails, runs out of time, loads without any articles or has its circuit breaker open never holds up or
+    breaks the others. It falls back to the last batch it loaded successfully, or to an empty batch if it never has.
+
+    Args:
+        sources (list of Source): The sources to load.
+        cache (HTTPCache): The HTTP cache for fetchers that download pages.
+        progress (callable): Called with a source name and its state ("fetching", "downloaded", "done" or "stale") as
+            each source moves along. It may be called from a worker thread.
+        last_good (LastGoodStore): The store to save each successful batch to and fall back on, if any.
+
+    Returns:
+        dict: A dict mapping each source name to its `ArticleBatch`, in the order of `sources`.
+    """
+    if progress is None:
+        progress = lambda name, state: None
+
+    for source in sources:
+        progress(source.name, "fetching")
+
+    # Each load's outcome is recorded on its breaker once, by whichever comes first of the load finishing and its
+    # deadline passing, so a load still running past its deadline can't count twice or close the breaker afterwards
+    settled = set()
+    settled_lock = Lock()
+
+    def settle(name):
+        with settled_lock:
+            if name in settled:
+                return False
+            settled.add(name)
+            return True
+
+    def load(source):
+        # Skip sources that keep failing until their breaker lets a trial through
+        breaker = circuit_breakers.setdefault(source.name, CircuitBreaker())
+        if not breaker.allow():
+            raise CircuitOpenError(f"{source.name} failed {breaker.failures} times in a row")
+
+        try:
+            batch = source.load(cache, progress)
+            if not len(batch):
+                raise EmptyBatchError(f"{source.name} loaded without any articles")
+        except Exception:
+            if settle(source.name):
+                breaker.record_failure()
+            raise
+        if settle(source.name):
+            breaker.record_success()
+
+        if last_good is not None:
+            last_good.save(batch)
+        return batch
+
+    def fall_back(name, error):
+        # A task still stuck past its deadline counts against its breaker too
+        if isinstance(error, SourceTimeoutError) and settle(name):
+            circuit_breakers[name].record_failure()
+        count("source_failures", source = name, error = type(error).__name__)
+        progress(name, "stale")
+
+        stored = last_good.load(name) if last_good is not None else None
+        return stored[0] if stored is not None else ArticleBatch(name)
+
+    tasks = {source.name: lambda source = source: load(source) for source in sources}
+    timeouts = {source.name: source.timeout for source in sources}
+    batches = run_all(tasks, timeouts, lambda name: progress(name, "done"), fall_back)
+
+    return {source.name: batches[source.name] for source in sources}
@@ -0,0 +1,7 @@
+from os import environ, path
+from sys import path as import_path
+
+# Import the mixer's modules from the repository root, and its sources config wherever the tests are run from
+root_directory = path.dirname(path.dirname(path.abspath(__file__)))
+import_path.insert(0, root_directory)
+environ.setdefault("WEATHER_NEWS_MIXER_SOURCES", path.join(root_directory, "data", "sources.json"))
@@ -0,0 +1,154 @@
+from asyncio import open_connection, run, sleep
+from gzip import decompress
+from json import loads
+from threading import Event
+
+from api_server import MixedFeedServer
+from article import ArticleBatch
+from weather_news_mixer import sources
+
+class StubLoad:
+    """
+    Stands in for `load_articles`, holding every refresh until released and numbering the snapshots it returns.
+    """
+    def __init__(self, released = True):
+        self.released = Event()
+        self.calls = 0
+        if released:
+            self.released.set()
+
+    def __call__(self, progress = None):
+        self.released.wait(5)
+        self.calls += 1
+        return {source.name: ArticleBatch(source.name, [f"{source.name} storm {number} of snapshot {self.calls}"
+                                                        for number in range(20)],
+                                          descriptions = ["Heavy rain and strong winds across the state. " * 3] * 20)
+                for source in sources}
+
+def serve(load, scenario):
+    # Run a scenario against a server on a free port, stopping the server and its worker afterwards
+    async def main():
+        feed_server = MixedFeedServer(load, interval = 3600)
+        server = await feed_server.start("127.0.0.1", 0)
+        try:
+            return await scenario(feed_server, server.sockets[0].getsockname()[1])
+        finally:
+            load.released.set()
+            feed_server.worker.stop()
+            server.close()
+            await server.wait_closed()
+
+    return run(main())
+
+async def request(port, target, **headers):
+    # Send one request and read the whole response, returning its status, lowercase headers and body
+    reader, writer = await open_connection("127.0.0.1", port)
+    extra_headers = "".join(f"{name.replace('_', '-')}: {value}\r\n" for name, value in headers.items())
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n{extra_headers}\r\n".encode("latin-1"))
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    response_headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    return int(lines[0].split(" ")[1]), response_headers, body
+
+async def until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await sleep(0.01)
+    raise AssertionError("timed out waiting for the server")
+
+def test_feed_is_unavailable_until_the_first_snapshot_loads():
+    load = StubLoad(released = False)
+
+    async def scenario(feed_server, port):
+        status, headers, _ = await request(port, "/news.json")
+        assert (status, headers["retry-after"]) == (503, "5")
+
+        load.released.set()
+        await until(lambda: feed_server.batches is not None)
+        status, _, _ = await request(port, "/news.json")
+        assert status == 200
+
+    serve(load, scenario)
+
+def test_matching_ETags_are_answered_with_not_modified():
+    load = StubLoad()
+
+    async def scenario(feed_server, port):
+        await until(lambda: feed_server.batches is not None)
+        status, headers, body = await request(port, "/news.rss")
+        etag = headers["etag"]
+        assert status == 200 and body.startswith(b"<?xml")
+
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            status, headers, body = await request(port, "/news.rss", if_none_match = if_none_match)
+            assert (status, headers["etag"], body) == (304, etag, b"")
+
+        status, _, _ = await request(port, "/news.rss", if_none_match = '"other"')
+        assert status == 200
+
+    serve(load, scenario)
+
+def test_gzipped_responses_carry_their_own_ETag():
+    load = StubLoad()
+
+    async def scenario(feed_server, port):
+        await until(lambda: feed_server.batches is not None)
+        _, plain_headers, plain_body = await request(port, "/news.html")
+        status, headers, body = await request(port, "/news.html", accept_encoding = "gzip, deflate")
+
+        assert status == 200 and headers["content-encoding"] == "gzip" and headers["vary"] == "Accept-Encoding"
+        assert decompress(body) == plain_body
+        assert headers["etag"] == plain_headers["etag"][:-1] + '-gzip"'
+
+        # The uncompressed ETag doesn't match the gzipped variant, and the other way around
+        status, _, _ = await request(port, "/news.html", accept_encoding = "gzip", if_none_match = plain_headers["etag"])
+        assert status == 200
+        status, _, _ = await request(port, "/news.html", if_none_match = headers["etag"])
+        assert status == 200
+        status, _, _ = await request(port, "/news.html", accept_encoding = "gzip", if_none_match = headers["etag"])
+        assert status == 304
+
+    serve(load, scenario)
+
+def test_counts_are_read_from_the_query_string():
+    load = StubLoad()
+    ABC_News = next(source for source in sources if source.option == "abc")
+
+    async def scenario(feed_server, port):
+        await until(lambda: feed_server.batches is not None)
+        _, _, body = await request(port, "/news.json?abc=2&abc=3")
+        articles = loads(body)["articles"]
+        assert [article["source"] for article in articles].count(ABC_News.name) == 3
+
+        _, _, body = await request(port, "/news.json?abc=1000")
+        assert [article["source"] for article in loads(body)["articles"]].count(ABC_News.name) == 20
+
+        for query in ("abc=-1", "abc=two", "abc=1.5"):
+            status, _, body = await request(port, f"/news.json?{query}")
+            assert status == 400 and body.startswith(b"abc must be a whole number"), query
+
+    serve(load, scenario)
+
+def test_a_refresh_replaces_cached_responses():
+    load = StubLoad()
+
+    async def scenario(feed_server, port):
+        await until(lambda: feed_server.batches is not None)
+        _, headers, body = await request(port, "/news.json?abc=1")
+        assert b"snapshot 1" in body
+
+        feed_server.worker.refresh_now()
+        await until(lambda: load.calls == 2 and "snapshot 2" in feed_server.batches[sources[0].name].titles[0])
+        status, new_headers, new_body = await request(port, "/news.json?abc=1", if_none_match = headers["etag"])
+
+        assert status == 200 and b"snapshot 2" in new_body
+        assert new_headers["etag"] != headers["etag"]
+
+    serve(load, scenario)
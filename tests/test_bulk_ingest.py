@@ -0,0 +1,67 @@
+from os import stat, utime
+
+import bulk_ingest
+from bulk_ingest import ingest_snapshots
+from news_store import NewsStore
+
+source_names = {"courier-mail": "Courier Mail", "weatherzone": "Weatherzone"}
+
+def write_snapshot(directory, file_name, titles, date = None):
+    # A small RSS feed whose items only carry a date when one is given
+    date_element = f"<pubDate>{date}</pubDate>" if date else ""
+    items = "".join(f"<item><title>{title}</title><description>{title} today.</description>{date_element}</item>"
+                    for title in titles)
+    file_path = directory / file_name
+    file_path.write_text(f'<?xml version="1.0" encoding="UTF-8"?><rss><channel><title>Weather</title>{items}'
+                         "</channel></rss>", encoding = "UTF-8")
+    return file_path
+
+def test_snapshots_take_their_source_and_date_from_the_file_name(tmp_path):
+    write_snapshot(tmp_path, "2019-10-14-courier-mail.xml", ["Storm hits Brisbane"])
+    write_snapshot(tmp_path, "2019-10-15-weatherzone.xml", ["Hail in Toowoomba"], "Wed, 16 Oct 2019 01:00:00 GMT")
+    write_snapshot(tmp_path, "2019-10-16-local-paper.xml", ["Frost in Stanthorpe"])
+    store = NewsStore(str(tmp_path / "news_log.db"))
+
+    summary = ingest_snapshots(str(tmp_path), store, source_names, workers = 1)
+
+    assert summary == (3, 0, 3)
+    stories = {article.title: article for article in store.search(limit = 10)}
+    assert (stories["Storm hits Brisbane"].source, stories["Storm hits Brisbane"].date) == ("Courier Mail", "2019-10-14")
+    assert stories["Hail in Toowoomba"].source == "Weatherzone"
+    assert stories["Hail in Toowoomba"].date.startswith("Wed, 16 Oct 2019")
+    assert stories["Frost in Stanthorpe"].source == "local-paper"
+
+def test_unchanged_files_are_skipped_without_being_read(tmp_path, monkeypatch):
+    write_snapshot(tmp_path, "2019-10-14-courier-mail.xml", ["Storm hits Brisbane"])
+    store = NewsStore(str(tmp_path / "news_log.db"))
+    ingest_snapshots(str(tmp_path), store, source_names, workers = 1)
+
+    # Any file handed to a parser now would have been read
+    parsed = []
+    monkeypatch.setattr(bulk_ingest, "parse_snapshot_chunk", lambda chunk: parsed.extend(chunk) or [])
+
+    assert ingest_snapshots(str(tmp_path), store, source_names, workers = 1) == (0, 1, 0)
+    assert parsed == []
+
+def test_touched_files_with_the_same_contents_are_not_parsed_again(tmp_path):
+    file_path = write_snapshot(tmp_path, "2019-10-14-courier-mail.xml", ["Storm hits Brisbane"])
+    store = NewsStore(str(tmp_path / "news_log.db"))
+    ingest_snapshots(str(tmp_path), store, source_names, workers = 1)
+
+    file_stat = stat(file_path)
+    utime(file_path, (file_stat.st_atime, file_stat.st_mtime + 60))
+
+    assert ingest_snapshots(str(tmp_path), store, source_names, workers = 1) == (0, 1, 0)
+    assert store.ingested_files()[str(file_path)][0] == file_stat.st_mtime + 60
+
+def test_copies_of_ingested_snapshots_are_skipped(tmp_path):
+    original = write_snapshot(tmp_path, "2019-10-14-courier-mail.xml", ["Storm hits Brisbane"])
+    store = NewsStore(str(tmp_path / "news_log.db"))
+    ingest_snapshots(str(tmp_path), store, source_names, workers = 1)
+
+    copies = tmp_path / "copies"
+    copies.mkdir()
+    (copies / original.name).write_bytes(original.read_bytes())
+
+    assert ingest_snapshots(str(tmp_path), store, source_names, workers = 1) == (0, 2, 0)
+    assert store.count() == 1
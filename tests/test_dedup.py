@@ -0,0 +1,59 @@
+from article import ArticleBatch
+from dedup import DuplicateIndex, deduplicate_batches
+
+def test_same_headline_with_and_without_description_collapses_to_one_article():
+    batches = {
+        "ABC News": ArticleBatch("ABC News", ["Severe storms and giant hail lash south-east Queensland"],
+                                 dates = ["2024-05-20T01:00:00Z"],
+                                 descriptions = ["Residents are cleaning up after hailstones the size of cricket balls fell overnight."],
+                                 images = ["https://example.com/hail.jpg"]),
+        "SBS News": ArticleBatch("SBS News", ["Severe storms and giant hail lash south-east Queensland", "Heatwave hits Perth"],
+                                 images = ["https://example.com/storm.jpg", "https://example.com/heat.jpg"]),
+    }
+
+    deduplicated = deduplicate_batches(batches)
+
+    assert deduplicated["ABC News"].titles == ["Severe storms and giant hail lash south-east Queensland"]
+    assert deduplicated["SBS News"].titles == ["Heatwave hits Perth"]
+
+def test_reworded_headline_from_another_outlet_is_merged():
+    batches = {
+        "ABC News": ArticleBatch("ABC News", ["Severe storms and giant hail lash south-east Queensland"],
+                                 descriptions = ["Hailstones the size of cricket balls fell overnight."]),
+        "Courier Mail": ArticleBatch("Courier Mail", ["Giant hail and severe storms lash South East Queensland"],
+                                     descriptions = ["A wild night across the south-east as supercells rolled through."]),
+    }
+
+    deduplicated = deduplicate_batches(batches)
+
+    assert len(deduplicated["ABC News"]) + len(deduplicated["Courier Mail"]) == 1
+
+def test_different_stories_are_kept():
+    batches = {
+        "ABC News": ArticleBatch("ABC News", ["Severe storms and giant hail lash south-east Queensland"]),
+        "SBS News": ArticleBatch("SBS News", ["Snow falls on the Blue Mountains for the first time in years"]),
+    }
+
+    deduplicated = deduplicate_batches(batches)
+
+    assert len(deduplicated["ABC News"]) == len(deduplicated["SBS News"]) == 1
+
+def test_similar_headlines_from_one_source_are_all_kept():
+    titles = ["Flood warning for Lismore", "Flood warning for Lismore lifted",
+              "Severe thunderstorm warning issued for south-east Queensland",
+              "Severe thunderstorm warning issued for south-west Queensland"]
+    batches = {"ABC News": ArticleBatch("ABC News", list(titles)),
+               "SBS News": ArticleBatch("SBS News", ["Severe thunderstorm warning issued for south-east Queensland"])}
+
+    deduplicated = deduplicate_batches(batches)
+
+    assert deduplicated["ABC News"].titles == titles
+    assert len(deduplicated["SBS News"]) == 0
+
+def test_a_story_is_merged_with_at_most_one_article_per_source():
+    index = DuplicateIndex(threshold = 0.7)
+    index.add("Severe thunderstorm warning issued for south-east Queensland", group = "ABC News")
+    index.add("Severe thunderstorm warning issued for south-east Queensland", group = "SBS News")
+    index.add("Severe thunderstorm warning issued for south-west Queensland", group = "SBS News")
+
+    assert index.clusters() == [[0, 1]]
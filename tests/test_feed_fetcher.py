@@ -0,0 +1,41 @@
+from functools import partial
+from time import monotonic
+
+import pytest
+
+from feed_fetcher import SourceTimeoutError, fetch_page, run_all
+from local_feed_server import start_server
+
+@pytest.fixture
+def pages(tmp_path):
+    for name in ("abc", "sbs", "weatherzone"):
+        (tmp_path / f"{name}.html").write_text(f"<html>{name}</html>", encoding = "UTF-8")
+    return tmp_path
+
+def test_concurrent_fetch_is_bounded_by_slowest_source(pages):
+    server, base_url = start_server(str(pages), delays = {"/abc.html": 0.6, "/sbs.html": 0.6, "/weatherzone.html": 0.6})
+    try:
+        tasks = {name: partial(fetch_page, f"{base_url}/{name}.html", 5) for name in ("abc", "sbs", "weatherzone")}
+        started = monotonic()
+        results = run_all(tasks, timeout = 5)
+        elapsed = monotonic() - started
+    finally:
+        server.shutdown()
+
+    assert results == {name: f"<html>{name}</html>" for name in tasks}
+    # Three 0.6 second sources fetched one after another would take 1.8 seconds
+    assert elapsed < 1.2
+
+def test_slow_source_times_out_without_holding_up_the_others(pages):
+    server, base_url = start_server(str(pages), delays = {"/abc.html": 3})
+    try:
+        tasks = {name: partial(fetch_page, f"{base_url}/{name}.html", 5) for name in ("abc", "sbs")}
+        started = monotonic()
+        results = run_all(tasks, timeout = {"abc": 0.5, "sbs": 5}, fallback = lambda key, error: error)
+        elapsed = monotonic() - started
+    finally:
+        server.shutdown()
+
+    assert isinstance(results["abc"], SourceTimeoutError)
+    assert results["sbs"] == "<html>sbs</html>"
+    assert elapsed < 1.5
@@ -0,0 +1,24 @@
+from io import BytesIO
+from os import path
+
+import pytest
+
+from feed_parser import iter_buffer_feed_items, iter_feed_items, iter_mapped_feed_items
+
+@pytest.mark.parametrize("empty_description", [b"<description />", b"<description/>", b'<description type="html" />'])
+def test_self_closing_field_does_not_swallow_the_next_item(empty_description):
+    feed = (b'<?xml version="1.0" encoding="UTF-8"?><rss><channel><title>Weather</title>'
+            b"<item><title>A</title>" + empty_description + b"</item>"
+            b"<item><title>B</title><description>real</description></item>"
+            b"</channel></rss>")
+
+    streamed = list(iter_feed_items(BytesIO(feed)))
+    scanned = list(iter_buffer_feed_items(feed, "utf-8"))
+
+    assert scanned == streamed
+    assert [(item.title, item.description) for item in scanned] == [("A", ""), ("B", "real")]
+
+@pytest.mark.parametrize("file_name", ["2019-10-14-courier-mail.xml", "2019-10-14-weatherzone.xml"])
+def test_mapped_reader_matches_streaming_reader(file_name):
+    file_path = path.join(path.dirname(__file__), "..", "data", "xml_files", file_name)
+    assert list(iter_mapped_feed_items(file_path)) == list(iter_feed_items(file_path))
@@ -0,0 +1,25 @@
+from os import chmod, stat, umask
+from stat import S_IMODE
+
+from html_export import write_atomically
+
+def test_new_file_gets_default_permissions(tmp_path):
+    file_path = tmp_path / "news.html"
+    mask = umask(0o022)
+    try:
+        write_atomically(str(file_path), lambda file: file.write("<html></html>"))
+    finally:
+        umask(mask)
+
+    assert file_path.read_text(encoding = "UTF-8") == "<html></html>"
+    assert S_IMODE(stat(file_path).st_mode) == 0o644
+
+def test_replaced_file_keeps_its_permissions(tmp_path):
+    file_path = tmp_path / "news.html"
+    file_path.write_text("old", encoding = "UTF-8")
+    chmod(file_path, 0o640)
+
+    write_atomically(str(file_path), lambda file: file.write("new"))
+
+    assert file_path.read_text(encoding = "UTF-8") == "new"
+    assert S_IMODE(stat(file_path).st_mode) == 0o640
@@ -0,0 +1,121 @@
+from hashlib import sha256
+from json import dump, load
+from os import listdir, path
+from threading import Thread
+from time import time
+
+import pytest
+
+from http_cache import HTTPCache
+from local_feed_server import start_server
+
+@pytest.fixture
+def serve(tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    for name in ("abc", "sbs", "weatherzone"):
+        (pages / f"{name}.html").write_text(f"<html>{name} {'x' * 1000}</html>", encoding = "UTF-8")
+    servers = []
+
+    def serve(**options):
+        server, base_url = start_server(str(pages), **options)
+        servers.append(server)
+        return server, base_url
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+@pytest.fixture
+def cache_directory(tmp_path):
+    return str(tmp_path / "http_cache")
+
+def test_fresh_entry_is_served_without_a_request(serve, cache_directory):
+    server, base_url = serve()
+    cache = HTTPCache(cache_directory, default_max_age = 300)
+
+    first = cache.get(f"{base_url}/abc.html", timeout = 5)
+    second = cache.get(f"{base_url}/abc.html", timeout = 5)
+
+    assert first == second and first.startswith(b"<html>abc")
+    assert (cache.misses, cache.hits, cache.revalidations) == (1, 1, 0)
+    assert server.feed_handler.requests["/abc.html"] == 1
+
+def test_stale_entry_is_revalidated_with_304(serve, cache_directory):
+    server, base_url = serve(headers = {"/abc.html": {"Cache-Control": "max-age=0"}})
+    cache = HTTPCache(cache_directory, default_max_age = 300)
+
+    first = cache.get(f"{base_url}/abc.html", timeout = 5)
+    second = cache.get(f"{base_url}/abc.html", timeout = 5)
+
+    assert first == second
+    assert (cache.misses, cache.hits, cache.revalidations) == (1, 0, 1)
+    assert server.feed_handler.requests["/abc.html"] == 2
+
+def test_no_store_responses_are_not_cached(serve, cache_directory):
+    server, base_url = serve(headers = {"/abc.html": {"Cache-Control": "no-store"}})
+    cache = HTTPCache(cache_directory, default_max_age = 300)
+
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+
+    assert cache.misses == 2
+    assert listdir(cache_directory) == []
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(serve, cache_directory):
+    server, base_url = serve()
+    cache = HTTPCache(cache_directory, max_bytes = 2500, default_max_age = 300)
+
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    cache.get(f"{base_url}/sbs.html", timeout = 5)
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    cache.get(f"{base_url}/weatherzone.html", timeout = 5)
+
+    # SBS was used least recently, so it made room for Weatherzone
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    cache.get(f"{base_url}/sbs.html", timeout = 5)
+    assert server.feed_handler.requests == {"/abc.html": 1, "/sbs.html": 2, "/weatherzone.html": 1}
+
+def test_entries_older_than_max_entry_age_are_evicted(serve, cache_directory):
+    server, base_url = serve()
+    cache = HTTPCache(cache_directory, max_entry_age = 60, default_max_age = 300)
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    cache.get(f"{base_url}/sbs.html", timeout = 5)
+
+    # Age the ABC entry past the limit
+    metadata_path = path.join(cache_directory, sha256(f"{base_url}/abc.html".encode("UTF-8")).hexdigest() + ".json")
+    with open(metadata_path) as file:
+        metadata = load(file)
+    metadata["stored_at"] = time() - 120
+    with open(metadata_path, "w") as file:
+        dump(metadata, file)
+
+    cache.evict()
+
+    assert len([file_name for file_name in listdir(cache_directory) if file_name.endswith(".json")]) == 1
+    assert not path.exists(metadata_path)
+
+def test_concurrent_hits_on_the_same_entry(serve, cache_directory):
+    server, base_url = serve()
+    cache = HTTPCache(cache_directory, default_max_age = 300)
+    cache.get(f"{base_url}/abc.html", timeout = 5)
+    errors = []
+
+    def read():
+        # A second cache on the same directory stands in for another process
+        other = HTTPCache(cache_directory, default_max_age = 300)
+        try:
+            for _ in range(50):
+                other.get(f"{base_url}/abc.html", timeout = 5)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [Thread(target = read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert server.feed_handler.requests["/abc.html"] == 1
+    assert not [file_name for file_name in listdir(cache_directory) if file_name.endswith(".tmp")]
@@ -0,0 +1,84 @@
+from base64 import b64decode
+from os import listdir, utime
+
+import pytest
+
+import image_cache
+from image_cache import ThumbnailCache, index_file_name
+from local_feed_server import start_server
+
+# Small PNG-signed files, kept as they are when Pillow isn't used
+images = {name: b"\x89PNG\r\n\x1a\n" + name.encode("ascii") * 100 for name in ("hail", "flood", "storm")}
+
+@pytest.fixture
+def base_url(tmp_path, monkeypatch):
+    # Thumbnails are the original bytes without Pillow, so sizes and contents are predictable
+    monkeypatch.setattr(image_cache, "Image", None)
+    pictures = tmp_path / "pictures"
+    pictures.mkdir()
+    for name, data in images.items():
+        (pictures / f"{name}.png").write_bytes(data)
+    (pictures / "hail-copy.png").write_bytes(images["hail"])
+    (pictures / "notes.txt").write_bytes(b"not an image")
+
+    server, base_url = start_server(str(pictures))
+    yield base_url
+    server.shutdown()
+
+def thumbnail_files(cache):
+    return sorted(file_name for file_name in listdir(cache.directory) if file_name != index_file_name)
+
+def test_prefetch_downloads_each_missing_image_once(tmp_path, base_url):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"))
+    urls = [f"{base_url}/hail.png", f"{base_url}/flood.png", f"{base_url}/hail.png", f"{base_url}/notes.txt"]
+
+    assert cache.prefetch(urls, timeout = 5) == 2
+    assert cache.prefetch(urls, timeout = 5) == 0
+    assert cache.get(f"{base_url}/notes.txt") is None
+
+    data_URI = cache.data_URI(f"{base_url}/hail.png")
+    assert data_URI.startswith("data:image/png;base64,")
+    assert b64decode(data_URI.split(",", 1)[1]) == images["hail"]
+
+def test_identical_images_are_stored_once(tmp_path, base_url):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"))
+    cache.prefetch([f"{base_url}/hail.png", f"{base_url}/hail-copy.png"], timeout = 5)
+
+    assert cache.get(f"{base_url}/hail.png") == cache.get(f"{base_url}/hail-copy.png")
+    assert len(thumbnail_files(cache)) == 1
+
+def test_prefetch_keeps_the_batch_even_past_the_size_limit(tmp_path, base_url):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"), max_bytes = 1)
+    urls = [f"{base_url}/{name}.png" for name in images]
+
+    assert cache.prefetch(urls, timeout = 5) == 3
+    assert all(cache.get(url) is not None for url in urls)
+
+def test_eviction_removes_the_least_recently_used_and_prunes_the_index(tmp_path, base_url):
+    directory = str(tmp_path / "thumbnails")
+    cache = ThumbnailCache(directory, max_bytes = 2 * len(images["hail"]) + 100)
+    urls = {name: f"{base_url}/{name}.png" for name in images}
+    cache.prefetch(urls.values(), timeout = 5)
+
+    # Use the thumbnails in a known order: flood longest ago, then hail, then storm
+    for age, name in enumerate(["storm", "hail", "flood"]):
+        utime(cache.get(urls[name]), (1_000_000 - age, 1_000_000 - age))
+    cache.evict()
+
+    assert cache.get(urls["flood"]) is None
+    assert cache.get(urls["hail"]) is not None and cache.get(urls["storm"]) is not None
+    assert len(thumbnail_files(cache)) == 2
+    assert urls["flood"] not in ThumbnailCache(directory)._index
+
+def test_eviction_spares_kept_thumbnails(tmp_path, base_url):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails"), max_bytes = len(images["hail"]) + 100)
+    urls = {name: f"{base_url}/{name}.png" for name in images}
+    cache.prefetch(urls.values(), timeout = 5)
+
+    # Flood is the least recently used, but a page links to it
+    for age, name in enumerate(["storm", "hail", "flood"]):
+        utime(cache.get(urls[name]), (1_000_000 - age, 1_000_000 - age))
+    cache.evict(keep = [urls["flood"]])
+
+    assert cache.get(urls["flood"]) is not None
+    assert cache.get(urls["hail"]) is None and cache.get(urls["storm"]) is None
@@ -0,0 +1,66 @@
+from json import loads
+
+from instrumentation import Metrics, Prometheus_labels, metric_prefix
+
+def recorded_metrics():
+    metrics = Metrics()
+    metrics.record("fetch", 0.5, source = "ABC News")
+    metrics.record("fetch", 1.5, source = "ABC News")
+    metrics.record("parse", 0.25)
+    metrics.count("bytes_fetched", 100, source = "SBS News")
+    metrics.count("rows_written", 3)
+    metrics.count("bytes_fetched", 50, source = "ABC News")
+    return metrics
+
+def test_Prometheus_declares_each_metric_once_before_its_samples():
+    lines = recorded_metrics().to_Prometheus().splitlines()
+
+    # Every sample follows the TYPE line of its own metric, with no other metric's samples in between
+    current_metric = None
+    declared = []
+    for line in lines:
+        if line.startswith("# TYPE "):
+            current_metric = line.split()[2]
+            declared.append(current_metric)
+        else:
+            metric_name = line.split("{")[0].split()[0]
+            assert metric_name in (current_metric, current_metric + "_count", current_metric + "_sum")
+    assert len(declared) == len(set(declared))
+    assert f"# TYPE {metric_prefix}bytes_fetched_total counter" in lines
+    assert f"# TYPE {metric_prefix}span_seconds summary" in lines
+
+def test_Prometheus_samples_add_up_spans_and_counters():
+    lines = recorded_metrics().to_Prometheus().splitlines()
+
+    assert f'{metric_prefix}span_seconds_count{{span="fetch",source="ABC News"}} 2' in lines
+    assert f'{metric_prefix}span_seconds_sum{{span="fetch",source="ABC News"}} 2.000000' in lines
+    assert f'{metric_prefix}span_seconds_max{{span="fetch",source="ABC News"}} 1.500000' in lines
+    assert f'{metric_prefix}bytes_fetched_total{{source="SBS News"}} 100' in lines
+    assert f"{metric_prefix}rows_written_total 3" in lines
+
+def test_label_values_are_escaped():
+    assert Prometheus_labels({"source": 'The "Weather"\\Desk\nQLD'}) == '{source="The \\"Weather\\"\\\\Desk\\nQLD"}'
+    assert Prometheus_labels({}) == ""
+
+def test_JSON_lines_hold_one_stamped_record_each():
+    records = [loads(line) for line in recorded_metrics().to_JSON_lines().splitlines()]
+
+    assert len(records) == 5
+    assert len({record["time"] for record in records}) == 1
+    assert {"type": "span", "name": "fetch", "labels": {"source": "ABC News"}, "count": 2, "total_seconds": 2.0,
+            "max_seconds": 1.5} in [{key: value for key, value in record.items() if key != "time"} for record in records]
+
+def test_write_replaces_Prometheus_files_and_appends_JSON_lines(tmp_path):
+    metrics = recorded_metrics()
+    Prometheus_path = str(tmp_path / "mixer.prom")
+    history_path = str(tmp_path / "metrics.jsonl")
+
+    metrics.write(Prometheus_path)
+    metrics.write(Prometheus_path)
+    metrics.write(history_path)
+    metrics.write(history_path)
+
+    with open(Prometheus_path, encoding = "UTF-8") as file:
+        assert file.read() == metrics.to_Prometheus()
+    with open(history_path, encoding = "UTF-8") as file:
+        assert len(file.read().splitlines()) == 2 * len(metrics.records())
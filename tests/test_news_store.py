@@ -0,0 +1,25 @@
+from article import Article
+from news_store import NewsStore
+
+def test_ranking_every_match_finds_older_better_matches(tmp_path):
+    store = NewsStore(str(tmp_path / "news_log.db"))
+    best = Article("ABC News", "Hail hail hail in Toowoomba", "2019-01-01T00:00:00Z", "Hail covers the town in white.")
+    newer = [Article("SBS News", f"Storm {number} brings some hail", f"2024-05-{number % 28 + 1:02}T00:00:00Z",
+                     "Wind and rain across the state.") for number in range(20)]
+    store.save([best] + newer)
+
+    assert best.title not in [article.title for article in store.search("hail", limit = 1, max_ranked = 5)]
+    assert [article.title for article in store.search("hail", limit = 1, max_ranked = None)] == [best.title]
+
+def test_capped_search_ranks_the_latest_published_matches(tmp_path):
+    store = NewsStore(str(tmp_path / "news_log.db"))
+    latest = Article("ABC News", "Hail in Toowoomba", "2024-06-01T00:00:00Z", "Ice on the roads.")
+    older = [Article("SBS News", f"Hail hail hail {number}", f"2019-05-{number + 1:02}T00:00:00Z", "Hail again.")
+             for number in range(10)]
+
+    # The latest story is saved first, so a cap on insertion order would skip it
+    store.save([latest])
+    store.save(older)
+
+    assert [article.title for article in store.search("hail", max_ranked = 1)] == [latest.title]
+    assert len(store.search("hail", max_ranked = 3)) == 3
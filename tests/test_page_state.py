@@ -0,0 +1,62 @@
+from json import dumps
+
+import pytest
+
+from page_state import RecordRule, find_page_state
+from weather_news_mixer import parse_ABC_markup, parse_ABC_page, parse_SBS_page
+from source_registry import Source
+
+ABC_source = Source({"name": "ABC News", "fetcher": "http", "parser": "abc", "location": "https://www.abc.net.au/news/weather"})
+SBS_source = Source({"name": "SBS News", "fetcher": "http", "parser": "sbs", "location": "https://www.sbs.com.au/news"})
+
+def page(state):
+    return f'<!DOCTYPE html><html><script id="__NEXT_DATA__" type="application/json">{dumps(state)}</script></html>'
+
+def ABC_story(number, **fields):
+    return dict({"title": {"children": f"Storm {number}"}, "mediaIndicator": None, "firstPublished": f"2024-05-{number + 1:02}",
+                 "imgSrc": f"https://example.com/{number}.jpg", "synopsis": f"About storm {number}."}, **fields)
+
+def test_ABC_stories_line_up_whatever_the_order_of_their_fields():
+    stories = [ABC_story(number) for number in range(12)]
+    stories[8] = {key: stories[8][key] for key in reversed(stories[8])}
+    navigation = [{"title": {"children": "Just In"}, "mediaIndicator": None}]
+
+    batch = parse_ABC_page(ABC_source, page({"props": {"navigation": navigation, "items": stories}}))
+
+    assert batch.titles == [f"Storm {number}" for number in range(12)]
+    assert all(article.description == f"About {article.title.lower()}." for article in batch)
+    assert all(article.image.endswith(f"/{article.title.split()[1]}.jpg") for article in batch)
+
+def test_ABC_stories_with_missing_or_invalid_fields():
+    stories = [ABC_story(0, synopsis = None), ABC_story(1, title = {"children": 5}), ABC_story(2)]
+    del stories[2]["imgSrc"]
+
+    batch = parse_ABC_page(ABC_source, page({"items": stories}))
+
+    assert batch.titles == ["Storm 0", "Storm 2"]
+    assert batch.descriptions == ["", "About storm 2."]
+    assert batch.images == ["https://example.com/0.jpg", ""]
+
+def test_SBS_header_and_footer_are_not_stories():
+    state = {"page": {"title": "Weather", "image": "https://example.com/banner.jpg"},
+             "tiles": [{"title": "Heatwave", "image": "https://example.com/heat.jpg"}],
+             "footer": {"title": "SBS News", "image": "https://example.com/logo.png"}}
+
+    batch = parse_SBS_page(SBS_source, page(state))
+
+    assert batch.titles == ["Heatwave"]
+    assert batch.images == ["https://example.com/heat.jpg"]
+
+@pytest.mark.parametrize("state", ["42", '"text"', "null", "{broken"])
+def test_state_without_records(state):
+    contents = f'<script id="__NEXT_DATA__" type="application/json">{state}</script>'
+    rule = RecordRule("SBS", {"title": ("title",), "image": ("image",)})
+
+    assert rule.extract(find_page_state(contents)) == {"title": [], "image": []}
+    assert len(parse_SBS_page(SBS_source, contents)) == 0
+
+def test_ABC_page_without_state_and_few_synopses_gives_an_empty_batch():
+    contents = '"title":{"children":"Storm"},"mediaIndicator":null,"firstPublished":"2024-05-01","imgSrc":"a.jpg",'
+
+    assert len(parse_ABC_markup(ABC_source, contents)) == 0
+    assert len(parse_ABC_page(ABC_source, contents)) == 0
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("tkinter")
+
+from article import ArticleBatch
+from preview_pane import PreviewPane, SelectionRows
+
+class StubText:
+    # Stands in for the Text widget, keeping its contents and counting renders
+    def __init__(self):
+        self.contents = ""
+        self.renders = 0
+
+    def config(self, **options):
+        pass
+
+    def delete(self, start, end):
+        self.contents = ""
+        self.renders += 1
+
+    def insert(self, index, text):
+        self.contents += text
+
+class StubScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+def stub_pane(visible_rows = 3):
+    # Build a pane without a display, around stub widgets
+    pane = PreviewPane.__new__(PreviewPane)
+    pane.format_row = lambda article: article.title
+    pane.rows = []
+    pane.top = 0
+    pane.visible_rows = visible_rows
+    pane.text = StubText()
+    pane.scrollbar = StubScrollbar()
+    return pane
+
+@pytest.fixture
+def batches():
+    return {source: ArticleBatch(source, [f"{source} {number}" for number in range(10)]) for source in ("ABC News", "SBS News")}
+
+def test_selection_rows_index_across_batches(batches):
+    rows = SelectionRows(batches, {"ABC News": 2, "SBS News": 3})
+
+    assert len(rows) == 5
+    assert [article.title for article in rows] == ["ABC News 0", "ABC News 1", "SBS News 0", "SBS News 1", "SBS News 2"]
+    assert rows[-1].title == "SBS News 2"
+    with pytest.raises(IndexError):
+        rows[5]
+
+def test_selection_rows_update_reports_first_changed_row(batches):
+    rows = SelectionRows(batches, {"ABC News": 2, "SBS News": 3})
+
+    assert rows.update(batches, {"ABC News": 2, "SBS News": 3}) is None
+    assert rows.update(batches, {"ABC News": 2, "SBS News": 5}) == 5
+    assert rows.update(batches, {"ABC News": 1, "SBS News": 5}) == 1
+    assert rows.update(dict(batches, **{"SBS News": ArticleBatch("SBS News", ["New"] * 10)}), {"ABC News": 1, "SBS News": 5}) == 1
+    assert rows.update(batches, {"ABC News": 1, "SBS News": 50}) == 1
+    assert len(rows) == 11
+
+def test_pane_renders_only_rows_in_view(batches):
+    pane = stub_pane()
+    rows = SelectionRows(batches, {"ABC News": 10, "SBS News": 10})
+
+    pane.show(rows)
+    assert pane.text.contents.split("\n") == ["ABC News 0", "ABC News 1", "ABC News 2"]
+
+    pane.scroll(9)
+    assert pane.text.contents.split("\n") == ["ABC News 9", "SBS News 0", "SBS News 1"]
+    assert pane.scrollbar.position == (9 / 20, 12 / 20)
+
+def test_pane_refresh_skips_changes_below_the_view(batches):
+    pane = stub_pane()
+    rows = SelectionRows(batches, {"ABC News": 5, "SBS News": 5})
+    pane.show(rows)
+    renders = pane.text.renders
+
+    # Adding SBS articles only changes rows after the first five
+    pane.refresh(rows.update(batches, {"ABC News": 5, "SBS News": 8}))
+    assert pane.text.renders == renders
+    assert pane.scrollbar.position == (0, 3 / 13)
+
+    # Changing the ABC count changes a row in view
+    pane.refresh(rows.update(batches, {"ABC News": 1, "SBS News": 8}))
+    assert pane.text.renders == renders + 1
+    assert pane.text.contents.split("\n") == ["ABC News 0", "SBS News 0", "SBS News 1"]
+
+def test_pane_refresh_moves_up_when_rows_shrink_below_the_view(batches):
+    pane = stub_pane()
+    rows = SelectionRows(batches, {"ABC News": 10, "SBS News": 10})
+    pane.show(rows)
+    pane.scroll(15)
+
+    pane.refresh(rows.update(batches, {"ABC News": 2, "SBS News": 0}))
+    assert pane.top == 1
+    assert pane.text.contents.split("\n") == ["ABC News 1"]
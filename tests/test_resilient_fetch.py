@@ -0,0 +1,109 @@
+from json import dumps
+from time import monotonic, sleep
+
+import pytest
+
+import source_registry
+import weather_news_mixer  # Registers the abc, sbs and rss parsers
+from feed_fetcher import CircuitBreaker, fetch_page
+from last_good_store import LastGoodStore
+from local_feed_server import start_server
+from source_registry import Source, load_batches
+
+def SBS_page(titles):
+    state = {"props": {"pageProps": {"tiles": [{"title": title, "image": f"https://example.com/{number}.jpg"}
+                                               for number, title in enumerate(titles)]}}}
+    return f'<html><script id="__NEXT_DATA__" type="application/json">{dumps(state)}</script></html>'
+
+@pytest.fixture(autouse = True)
+def circuit_breakers(monkeypatch):
+    # Give every test its own breakers
+    breakers = {}
+    monkeypatch.setattr(source_registry, "circuit_breakers", breakers)
+    return breakers
+
+@pytest.fixture
+def serve(tmp_path):
+    (tmp_path / "sbs.html").write_text(SBS_page(["Heatwave hits Sydney", "Storms for Perth"]), encoding = "UTF-8")
+    servers = []
+
+    def serve(**options):
+        server, base_url = start_server(str(tmp_path), **options)
+        servers.append(server)
+        return server, base_url
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+def SBS_source(base_url, **config):
+    return Source(dict({"name": "SBS News", "fetcher": "http", "parser": "sbs", "location": f"{base_url}/sbs.html"}, **config))
+
+def load(source, last_good):
+    states = {}
+    batches = load_batches([source], last_good = last_good, progress = lambda name, state: states.__setitem__(name, state))
+    return batches[source.name], states[source.name]
+
+@pytest.mark.parametrize("faults", [["error", "reset"], ["throttle", "truncate"]])
+def test_retries_recover_from_transient_faults(serve, faults):
+    server, base_url = serve(faults = {"/sbs.html": faults})
+
+    page = fetch_page(f"{base_url}/sbs.html", timeout = 5)
+
+    assert "Heatwave hits Sydney" in page
+    assert server.feed_handler.requests["/sbs.html"] == 3
+
+def test_hanging_source_falls_back_to_last_good_batch_at_its_timeout(serve, tmp_path, circuit_breakers):
+    server, base_url = serve(faults = {"/sbs.html": [None, "hang"]})
+    source = SBS_source(base_url, timeout = 1)
+    last_good = LastGoodStore(str(tmp_path / "last_good"))
+    assert load(source, last_good)[1] == "done"
+
+    started = monotonic()
+    batch, state = load(source, last_good)
+
+    assert monotonic() - started < 1.5
+    assert state == "stale"
+    assert batch.titles == ["Heatwave hits Sydney", "Storms for Perth"]
+
+    # The load still running past its deadline doesn't count against the breaker a second time
+    sleep(1.5)
+    assert circuit_breakers["SBS News"].failures == 1
+
+def test_page_without_articles_falls_back_to_last_good_batch(serve, tmp_path, circuit_breakers):
+    server, base_url = serve(faults = {"/sbs.html": [None, "garbage"]})
+    source = SBS_source(base_url)
+    last_good = LastGoodStore(str(tmp_path / "last_good"))
+    assert load(source, last_good)[1] == "done"
+
+    batch, state = load(source, last_good)
+
+    assert state == "stale"
+    assert batch.titles == ["Heatwave hits Sydney", "Storms for Perth"]
+    assert circuit_breakers["SBS News"].failures == 1
+
+def test_breaker_opens_after_repeated_failures_then_lets_a_trial_through(serve, tmp_path, circuit_breakers):
+    server, base_url = serve(faults = {"/sbs.html": ["error"] * 9})
+    source = SBS_source(base_url, timeout = 2)
+    circuit_breakers["SBS News"] = breaker = CircuitBreaker(failure_threshold = 3, reset_timeout = 0.5)
+    last_good = LastGoodStore(str(tmp_path / "last_good"))
+
+    for _ in range(3):
+        load(source, last_good)
+    assert breaker.state == "open"
+    assert server.feed_handler.requests["/sbs.html"] == 9
+
+    # While open the source isn't requested at all
+    started = monotonic()
+    batch, state = load(source, last_good)
+    assert monotonic() - started < 0.1
+    assert (len(batch), state) == (0, "stale")
+    assert server.feed_handler.requests["/sbs.html"] == 9
+
+    # Once cooled off, one successful trial closes it again
+    sleep(0.5)
+    assert breaker.state == "half-open"
+    batch, state = load(source, last_good)
+    assert state == "done"
+    assert len(batch) == 2
+    assert breaker.state == "closed"
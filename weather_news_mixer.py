@@ -1,49 +1,74 @@
-from tkinter import *
-from re import findall
-from urllib.request import urlopen
-from sqlite3 import *
-
-# Font variables
-title_font = ("Verdana", 24, "bold")
-spinbox_font = ("Helvetica", 20)
-labelframe_font = ("Verdana", 12, "bold")
-label_font = ("Helvetica", 12)
-listbox_font = ("Times", 12, "bold")
-
-# Colour variables
-title_colour = "#00cdff"
-label_colour = "#0096fa"
-widget_colour = "#64c8fa"
+from argparse import ArgumentParser
+from io import StringIO
+from os import environ, path
+from itertools import islice
+from re import compile as compile_pattern
+from atexit import register
+from http_cache import HTTPCache
+from last_good_store import LastGoodStore
+from dedup import deduplicate_batches
+from bulk_ingest import ingest_snapshots
+from source_registry import register_parser, load_sources, load_batches
+from feed_parser import iter_feed_items, iter_mapped_feed_items
+from page_state import RecordRule, find_page_state
+from article import ArticleBatch
+from news_store import NewsStore, default_search_limit
+from html_export import HTMLTemplate, Markup, export_pages
+from image_cache import ThumbnailCache
+from instrumentation import count, metrics, profiling, span
 
 # File name and path variables
 SQL_db_name = "news_log.db"
 HTML_file_name = "news.html"
+HTTP_cache_directory = "data/http_cache"
+thumbnail_directory = "data/thumbnails"
+last_good_directory = "data/last_good"
 background_image_file_path = "data/img_files/background_image.gif"
-weatherzone_file_path = "data/xml_files/2019-10-14-weatherzone.xml"
-courier_mail_file_path = "data/xml_files/2019-10-14-courier-mail.xml"
-ABC_file_path = "https://www.abc.net.au/news/weather"
-SBS_file_path = "https://www.sbs.com.au/news/tag/subject/weather"
-
-# Regex patterns
-title_pattern = "<title>(.*)<\/title>"
-weatherzone_description_pattern = "<description>(.*)<\/description>"
-weatherzone_date_pattern = "<pubDate>(.*)</pubDate>"
-courier_mail_description_pattern = "<description><!\[CDATA\[(.*)<\/description>"
-courier_mail_date_pattern = "<lastBuildDate>(.*)</lastBuildDate>"
-ABC_pattern = '"title":{"children":"(.*?)"},"mediaIndicator"' 
-ABC_date_pattern = '"firstPublished":"(.*?)",' 
-ABC_img_pattern = '"imgSrc":"(.*?)",'
-ABC_description_pattern = '"synopsis":"(.*?)",'
-SBS_pattern = '"title":"(.*?)",'
-SBS_img_pattern = '"image":"(.*?)",'
+sources_file_path = environ.get("WEATHER_NEWS_MIXER_SOURCES", "data/sources.json")
+
+# Where to write timings and counters, and cProfile statistics, when set
+metrics_file_path = environ.get("WEATHER_NEWS_MIXER_METRICS")
+profile_file_path = environ.get("WEATHER_NEWS_MIXER_PROFILE")
+
+# Most articles written to each page of the HTML export
+HTML_page_size = 1000
+
+# How the HTML export shows article images: "inline" embeds thumbnails in the page, "link" points at thumbnails in
+# `thumbnail_directory`, and "remote" points at the original images on the news websites
+HTML_image_modes = ("inline", "link", "remote")
+HTML_image_mode = "inline"
+
+# Thumbnail cache variables
+thumbnail_width = 250
+thumbnail_cache_max_bytes = 20_000_000
+
+# Estimated similarity of title and description at which articles count as the same story
+duplicate_threshold = 0.7
+
+# HTTP cache variables
+HTTP_cache_max_bytes = 20_000_000
+HTTP_cache_default_max_age = 300
+
+# Rules for the stories in the embedded state of the ABC and SBS pages. ABC's navigation links have no publish date,
+# and SBS's page header and footer are not in a list, so neither counts as a story
+ABC_rule = RecordRule("ABC", {"title": ("title", "children"), "date": ("firstPublished",), "description": ("synopsis",),
+                              "image": ("imgSrc",)}, required = ("title", "date"))
+SBS_rule = RecordRule("SBS", {"title": ("title",), "image": ("image",)}, in_list = True)
+
+# Regex patterns for pages without an embedded state
+ABC_pattern = compile_pattern('"title":{"children":"(.*?)"},"mediaIndicator"')
+ABC_date_pattern = compile_pattern('"firstPublished":"(.*?)",')
+ABC_img_pattern = compile_pattern('"imgSrc":"(.*?)",')
+ABC_description_pattern = compile_pattern('"synopsis":"(.*?)",')
+SBS_pattern = compile_pattern('"title":"(.*?)",')
+SBS_img_pattern = compile_pattern('"image":"(.*?)",')
 
 # String variables
 title = "Weather News Mixer"
-news_sources = ["ABC News", "SBS News", "Weatherzone", "Courier Mail"]
-ABC_page_name = " [" + news_sources[0] + " - "
-SBS_page_name = " [" + news_sources[1] + "]"
-weatherzone_page_name = " [" + news_sources[2] + " - "
-courier_mail_page_name = " [" + news_sources[3] + " - "
+
+# News sources, in the order they are shown and mixed
+sources = load_sources(sources_file_path)
+news_sources = [source.name for source in sources]
 
 # HTML strings
 HTML_header = """
@@ -113,6 +138,10 @@ HTML_header = """
                                 text-align: center;
                                 color: #ff0000;
                             }
+                            nav.pages {
+                                text-align: center;
+                                padding-bottom: 20px;
+                            }
                         </style>
                 </head>
                 <body>
@@ -126,380 +155,597 @@ HTML_footer = """
                 <hr class = "divider">
                 <h3 class = "sources">Sources</h3>
                 <ul>
+            """
+HTML_footer_end = """
+                </ul>
+                </body>
+                </html>
+            """
+HTML_source = HTMLTemplate("""
                     <li>
-                        <p class = "sources">ABC Weather News: <a href = "https://www.abc.net.au/news/weather">https://www.abc.net.au/news/weather</a></p>
-                    </li>
-                    <li>
-                        <p class = "sources">SBS Weather News: <a href = "https://www.sbs.com.au/news/tag/subject/weather">https://www.sbs.com.au/news/tag/subject/weather</a></p>
-                    </li>
-                    <li>
-                        <p class = "sources">Weatherzone News: <a href = "https://rss.weatherzone.com.au/?u=12994-1285&news=1">https://rss.weatherzone.com.au/?u=12994-1285&news=1</a></p>
-                    </li>
-                    <li>
-                        <p class = "sources">Courier Mail News: <a href = "https://www.couriermail.com.au/news/queensland/weather/rss">https://www.couriermail.com.au/news/queensland/weather/rss</a></p>
+                        <p class = "sources">{label}: <a href = "{home_page}">{home_page}</a></p>
                     </li>
-            """
-
-def regex_live_file(file_path, page_pattern, image_pattern):
+            """)
+HTML_article = HTMLTemplate("""
+                        <h2>{title}</h2>
+                        {image}
+                        {description}
+                        <h3 class = "date"> {byline}</h3>
+                        <hr class = "newsDivider">
+                        """)
+HTML_image = HTMLTemplate('<img src = "{image}" style = "width: 250px;"></img>')
+HTML_description = HTMLTemplate('<p class = "description">{description}</p>')
+HTML_no_image = Markup('<p class = "errorMessage">No image available for this news website</p>')
+HTML_no_description = Markup('<p class = "errorMessage">No description available for this news website</p>')
+HTML_navigation = HTMLTemplate("""
+                <nav class = "pages">{previous_link} {next_link}</nav>
+            """)
+HTML_page_link = HTMLTemplate('<a href = "{page}">{label}</a>')
+
+@register_parser("abc")
+def parse_ABC_page(source, file_contents):
     """
-    Open live news URLs and regex them to filter out titles, publish dates, descriptions and images.
+    Extract the titles, publish dates, descriptions and images of the stories on a live ABC News page.
+
+    The stories are read from the page's embedded state, falling back to regexes over the whole page if it has none.
 
     Args:
-        file_path (str): The string URL path to read.
-        page_pattern (str): The string pattern to regex search for news titles.
-        image_pattern (str): The string pattern to regex search for images.
+        source (Source): The news source the page was fetched for.
+        file_contents (str): The downloaded page contents.
 
     Returns:
-        tuple or list:
-            - If `file_path` is `ABC_file_path`, returns a tuple:
-                - list of str: List of string titles matching number of dates.
-                - list of str: List of string dates found.
-                - list of str: List of images matching number of dates.
-                - list of str: List of descriptions matching number of dates.
-            - If `file_path` is `SBS_file_path`, returns a list:
-                - list of str: List of string titles found excluding the first and last titles.
-                - list of str: List of images excluding the last one.
+        ArticleBatch: A batch of titles, dates, images and descriptions, one of each per story.
     
     Examples:
-        >>> regex_live_file('http://example.com/abc_file', 'some_regex_pattern', 'some_image_pattern')
-        (['Title1', 'Title2'], ['Date1', 'Date2'], ['Image1', 'Image2'], ['Description1', 'Description2'])
-
-        >>> regex_live_file('http://example.com/sbs_file', 'some_regex_pattern', 'some_image_pattern')
-        (['Title2', 'Title3'], ['Image1', 'Image2'])
-    """
-    # Open specified file and read contents
-    with urlopen(file_path) as response:
-        file_contents = response.read().decode("UTF-8")
-
-    # Find titles and images in the file contents using the provided pattern
-    titles = findall(page_pattern, file_contents)
-    images = findall(image_pattern, file_contents)
-
-    # Extract dates and descriptions only if the file path is for ABC News
-    if file_path == ABC_file_path:
-        dates = findall(ABC_date_pattern, file_contents)
-        descriptions = findall(ABC_description_pattern, file_contents)
-        
-        # Move the 9th description to the start of the list to align with titles
-        index_to_move = 8
-        element = descriptions.pop(index_to_move)
-        descriptions.insert(0, element)
-
-        # Return titles, dates, images and descriptions for ABC News
-        return titles[len(titles) - len(dates):], dates, images[len(images) - len(dates):], descriptions[len(descriptions) - len(dates):]
+        >>> parse_ABC_page(ABC_source, '<!DOCTYPE html>...')
+        ArticleBatch('ABC News', 2 articles)
+    """
+    # Walk the embedded state for one aligned record per story
+    records = extract_records(source, ABC_rule, file_contents)
+    if records is None:
+        return parse_ABC_markup(source, file_contents)
+
+    # Return titles, dates, images and descriptions for ABC News
+    return ArticleBatch(source.name, records["title"], dates = records["date"], descriptions = records["description"],
+                        images = records["image"])
+
+def parse_ABC_markup(source, file_contents):
+    """
+    Regex a live ABC News page without an embedded state to filter out titles, publish dates, descriptions and images.
+
+    Args:
+        source (Source): The news source the page was fetched for.
+        file_contents (str): The downloaded page contents.
+
+    Returns:
+        ArticleBatch: A batch of titles, dates, images and descriptions matching the number of dates found, or an
+            empty batch if there are fewer of any other field.
+    """
+    # Find titles, dates, images and descriptions in the file contents
+    titles = ABC_pattern.findall(file_contents)
+    images = ABC_img_pattern.findall(file_contents)
+    dates = ABC_date_pattern.findall(file_contents)
+    descriptions = ABC_description_pattern.findall(file_contents)
+
+    # Navigation links come before the stories with a title, image or description but no date, so the stories are
+    # the last of each. Without enough of every field there is no telling which belongs to which story
+    num_dates = len(dates)
+    if min(len(titles), len(images), len(descriptions)) < num_dates:
+        return ArticleBatch(source.name)
+    return ArticleBatch(source.name, titles[len(titles) - num_dates:], dates = dates,
+                        descriptions = descriptions[len(descriptions) - num_dates:], images = images[len(images) - num_dates:])
+
+@register_parser("sbs")
+def parse_SBS_page(source, file_contents):
+    """
+    Extract the titles and images of the stories on a live SBS News page.
+
+    The stories are read from the page's embedded state, falling back to regexes over the whole page if it has none.
+
+    Args:
+        source (Source): The news source the page was fetched for.
+        file_contents (str): The downloaded page contents.
+
+    Returns:
+        ArticleBatch: A batch of titles and images, one of each per story.
     
+    Examples:
+        >>> parse_SBS_page(SBS_source, '<!DOCTYPE html>...')
+        ArticleBatch('SBS News', 2 articles)
+    """
+    # Walk the embedded state for one aligned record per story
+    records = extract_records(source, SBS_rule, file_contents)
+    if records is None:
+        return parse_SBS_markup(source, file_contents)
+
     # Return titles and images for SBS News
-    if file_path == SBS_file_path:
-        return titles[1:-1], images[:-1]
+    return ArticleBatch(source.name, records["title"], images = records["image"])
+
+def parse_SBS_markup(source, file_contents):
+    """
+    Regex a live SBS News page without an embedded state to filter out titles and images.
+
+    Args:
+        source (Source): The news source the page was fetched for.
+        file_contents (str): The downloaded page contents.
+
+    Returns:
+        ArticleBatch: A batch of titles and images, excluding the first and last titles and the last image.
+    """
+    # Find titles and images in the file contents
+    titles = SBS_pattern.findall(file_contents)[1:-1]
+    images = SBS_img_pattern.findall(file_contents)[:-1]
+
+    # Return titles and images for SBS News, keeping only titles that have an image
+    num_titles = min(len(titles), len(images))
+    return ArticleBatch(source.name, titles[:num_titles], images = images[:num_titles])
+
+def extract_records(source, rule, file_contents):
+    """
+    Decode a page's embedded state and pull the records of a rule out of it.
+
+    Args:
+        source (Source): The news source the page was fetched for.
+        rule (RecordRule): The rule picking out the page's stories.
+        file_contents (str): The downloaded page contents.
 
-def regex_archived_file(file_path, title_index, description_index, date_pattern, description_pattern):
+    Returns:
+        dict: A dict mapping each of the rule's fields to its list of values, or `None` if the page has no state or
+            no stories in it, counted as a `state_fallbacks` for the source.
+    """
+    state = find_page_state(file_contents)
+    records = rule.extract(state) if state is not None else None
+    if not records or not records["title"]:
+        count("state_fallbacks", source = source.name)
+        return None
+    return records
+
+@register_parser("rss")
+def parse_archived_file(source, file_contents):
     """
-    Open archived news XML files and regex them to filter out titles, publish dates and descriptions.
+    Stream through the items of an RSS feed to collect titles, publish dates and descriptions.
+
+    Feed files are memory-mapped and scanned in place rather than read into memory.
 
     Args:
-        file_path (str): The string path of the file to read.
-        title_index (int): The integer index to start regex search at to skip initial title patterns.
-        description_index (int): The integer index to start regex search at to skip initial description patterns.
-        date_pattern (str): The string pattern to regex search for news publish dates.
-        description_pattern (str): The string pattern to regex search for news descriptions.
+        source (Source): The news source the feed belongs to.
+        file_contents (str): The string path of the feed file for sources read with the "file" fetcher, otherwise
+            the downloaded feed itself.
 
     Returns:
-        tuple:
-            - list of str: List of string titles found starting from the specified index.
-            - list of str: List of string news publish dates found.
-            - list of str: List of string descriptions found starting from the specified index.
+        ArticleBatch: A batch with the title, publish date and description of every item in the feed.
     
     Examples:
-        >>> regex_archived_file('path/to/archive.xml', 2, 1, r'\\d{4}-\\d{2}-\\d{2}', r'<description>.*?</description>')
-        (['Title3', 'Title4'], ['2022-01-01', '2022-01-02'], ['Description2', 'Description3'])
+        >>> parse_archived_file(courier_mail_source, 'data/xml_files/2019-10-14-courier-mail.xml')
+        ArticleBatch('Courier Mail', 10 articles)
+    """
+    batch = ArticleBatch(source.name, [], dates = [], descriptions = [])
+    items = iter_mapped_feed_items(file_contents) if source.fetcher == "file" else iter_feed_items(StringIO(file_contents))
+
+    # Collect each item's fields in a single pass over the feed
+    for item in items:
+        batch.append(item.title, item.date, item.description)
+
+    return batch
+
+def load_articles(progress = None, deduplicate = True):
+    """
+    Fetch and extract the articles of every registered news source.
+
+    Every source is fetched and parsed concurrently, with live news pages downloaded through the HTTP cache. A source
+    that fails or times out shows the articles it last loaded successfully instead. Stories covered by several sources
+    are then merged, keeping the most complete copy.
+
+    Args:
+        progress (callable): Called with a news source name and its state ("fetching", "downloaded", "done" or
+            "stale") as each source moves along. It may be called from a worker thread.
+        deduplicate (bool): Whether to drop near-duplicate articles across sources.
+
+    Returns:
+        dict: A dict mapping each news source name to its `ArticleBatch`, in the order of `news_sources`.
+
+    Examples:
+        >>> load_articles()
+        {'ABC News': ArticleBatch('ABC News', 20 articles), 'SBS News': ArticleBatch('SBS News', 12 articles), ...}
     """
-    # Open specified file and read contents
-    with open(file_path, encoding = 'UTF-8') as file:
-        file_contents = file.read()
+    HTTP_cache = HTTPCache(HTTP_cache_directory, max_bytes = HTTP_cache_max_bytes, default_max_age = HTTP_cache_default_max_age)
+    with span("load_articles"):
+        batches = load_batches(sources, cache = HTTP_cache, progress = progress, last_good = LastGoodStore(last_good_directory))
 
-    # Find titles, dates and descriptions using regex patterns
-    titles = findall(title_pattern, file_contents)
-    date = findall(date_pattern, file_contents)
-    descriptions = findall(description_pattern, file_contents)
+    if deduplicate:
+        with span("deduplicate"):
+            batches = deduplicate_batches(batches, duplicate_threshold)
+    return batches
 
-    # Return titles and descriptions starting from specified index as well as all dates found
-    return titles[title_index:], date, descriptions[description_index:]
+def available_titles(source, batch):
+    """
+    Count how many articles can be chosen from a source.
 
-def preview_selections():
+    Args:
+        source (Source): The news source.
+        batch (ArticleBatch): The articles loaded for the source.
+
+    Returns:
+        int: The number of articles in the batch, capped at the source's `max_titles` if it has one.
     """
-    Previews selected news articles by extracting data from various sources and displaying it in a text widget.
+    if source.max_titles is None:
+        return len(batch)
+    return min(len(batch), source.max_titles)
 
-    This method retrieves the number of articles to preview from user input, extracts the articles from different sources
-    using specified regex patterns, and inserts the formatted article previews into a text widget. The text widget is updated
-    to show the previews and then disabled to prevent further editing.
+def selected_articles(batches, counts):
+    """
+    Yield the chosen number of articles from each source, in source order.
+
+    Args:
+        batches (dict): A dict mapping each news source name to its `ArticleBatch`.
+        counts (dict): A dict mapping news source names to the number of articles wanted. Sources left out are skipped.
 
-    Sources:
-        - ABC News
-        - SBS News
-        - Weatherzone
-        - Courier Mail
+    Yields:
+        Article: The first N articles of each source, where N is the count for that source.
 
     Examples:
-        >>> preview_selections()
-        # Updates the text widget with the previews of selected news articles.
-    """
-    # Extract counts of articles from spinboxes
-    ABC_count = int(ABC_news_spinbox.get())
-    SBS_count = int(SBS_news_spinbox.get())
-    weatherzone_count = int(weatherzone_news_spinbox.get())
-    courier_mail_count = int(courier_mail_news_spinbox.get())
-
-    # Enable text widget for editing and clear the text widget
-    news_preview_text.config(state = NORMAL)
-    news_preview_text.delete(1.0, END)
-
-    # Insert article previews into the text widget based on count retreived from user input spinboxes
-    if ABC_count > 0:
-        for i in range(ABC_count):
-            news_preview_text.insert(1.0, '"' + ABC_extract[0][i] + '"' + ABC_page_name + ABC_extract[1][i] + "]" + "\n")
-    if SBS_count > 0:
-        for i in range(SBS_count):
-            news_preview_text.insert(1.0, '"' + SBS_extract[0][i] + '"' + SBS_page_name + "\n")
-    if weatherzone_count > 0:
-        for i in range(weatherzone_count):
-            news_preview_text.insert(1.0, '"' + weatherzone_extract[0][i] + '"' + weatherzone_page_name + weatherzone_extract[1][0] + "]" + "\n")
-    if courier_mail_count > 0:
-        for i in range(courier_mail_count):
-            news_preview_text.insert(1.0, '"' + courier_mail_extract[0][i] + '"' + courier_mail_page_name + courier_mail_extract[1][0] + "]" + "\n")
-
-    # Disable text widget after editing
-    news_preview_text.config(state = DISABLED)
-
-def export_to_HTML():
-    """
-    Export news articles to an HTML file based on counts from spinboxes.
-
-    This function extracts the counts of articles from various spinboxes, constructs
-    an HTML file with the news articles, and writes it to a specified file.
+        >>> [article.source for article in selected_articles(batches, {'ABC News': 2, 'SBS News': 1})]
+        ['ABC News', 'ABC News', 'SBS News']
+    """
+    for source, batch in batches.items():
+        yield from batch.head(counts.get(source, 0))
+
+def preview_line(article):
+    """
+    Format an article as a one-line preview.
+
+    Args:
+        article (Article): The article to preview.
+
+    Returns:
+        str: The quoted headline followed by its source and date, e.g. '"Storms ahead" [ABC News - 2024-05-20]'.
+    """
+    return f'"{article.title}" {article.byline}'
+
+def render_HTML_article(article, image_source = None):
+    """
+    Render one article for the HTML export, noting any image or description its source doesn't provide.
+
+    Args:
+        article (Article): The article to render.
+        image_source (str): The URL, relative path or data URI to show the article's image from, or `None` to use
+            the original image URL.
+
+    Returns:
+        str: The escaped HTML for the article.
+    """
+    image = HTML_image.render(image = image_source or article.image) if article.image else HTML_no_image
+    description = HTML_description.render(description = article.description) if article.description else HTML_no_description
+
+    return HTML_article.render(title = article.title, image = Markup(image), description = Markup(description), byline = article.byline)
+
+def render_HTML_navigation(previous_page, next_page):
+    """
+    Render the links between pages of a paginated HTML export.
+
+    Args:
+        previous_page (str): The file name of the previous page, or `None` on the first page.
+        next_page (str): The file name of the next page, or `None` on the last page.
+
+    Returns:
+        str: The HTML for the page links.
+    """
+    previous_link = HTML_page_link.render(page = previous_page, label = "Previous page") if previous_page else ""
+    next_link = HTML_page_link.render(page = next_page, label = "Next page") if next_page else ""
+
+    return HTML_navigation.render(previous_link = Markup(previous_link), next_link = Markup(next_link))
+
+def render_HTML_footer():
+    """
+    Render the footer of the HTML export, crediting the home page of every news source.
+
+    Returns:
+        str: The HTML for the footer.
+    """
+    return HTML_footer + "".join(HTML_source.render(label = source.label, home_page = source.home_page) for source in sources) + HTML_footer_end
+
+def HTML_image_source(image, images, thumbnails):
+    """
+    Choose where the HTML export shows an image from, falling back to the original URL when it has no thumbnail.
+
+    Args:
+        image (str): The URL of the original image.
+        images (str): One of `HTML_image_modes`.
+        thumbnails (ThumbnailCache): The thumbnail cache, or `None` for "remote".
+
+    Returns:
+        str: A data URI, a path relative to the exported pages, or the original URL.
+    """
+    if images == "inline":
+        return thumbnails.data_URI(image) or image
+    if images == "link":
+        thumbnail_path = thumbnails.get(image)
+        if thumbnail_path is not None:
+            return path.relpath(thumbnail_path, path.dirname(path.abspath(HTML_file_name))).replace(path.sep, "/")
+    return image
+
+def with_prefetched_images(articles, thumbnails):
+    """
+    Pass articles through, fetching the thumbnails of each page's worth of articles together before yielding them.
+
+    Args:
+        articles (iterable of Article): The articles to export.
+        thumbnails (ThumbnailCache): The thumbnail cache to fill.
+
+    Yields:
+        Article: Each article in order, once its image has been fetched.
+    """
+    articles = iter(articles)
+    while True:
+        page = list(islice(articles, HTML_page_size))
+        if not page:
+            return
+        with span("prefetch_images"):
+            count("images_cached", thumbnails.prefetch(article.image for article in page))
+        yield from page
+
+def export_to_HTML(articles, images = None):
+    """
+    Export news articles to an HTML file.
+
+    This function streams the given articles into an HTML file, starting a new page every `HTML_page_size` articles.
+    Each page is written to a temporary file first and renamed into place once complete. Unless images are left
+    remote, each page's images are first downloaded together and downscaled into the thumbnail cache, so that pages
+    stay small and, when inlined, open offline. Images without a thumbnail are left pointing at the original URL. The
+    cache is trimmed once every page is written, keeping any thumbnails the pages link to.
+
+    Args:
+        articles (iterable of Article): The articles to export, typically from `selected_articles`.
+        images (str): One of `HTML_image_modes`, or `None` for `HTML_image_mode`.
+
+    Returns:
+        list of str: The string paths of the pages written.
 
     Side Effects:
-        Creates or overwrites an HTML file with the specified name, containing the
-        news articles extracted from various sources.
+        Creates or overwrites an HTML file with the specified name, plus "news-2.html", "news-3.html" and so on when
+        there are more articles than fit on one page.
 
     Examples:
-        >>> export_to_HTML()
-        # This will create an HTML file with the news articles as specified by the
-        # counts from the spinboxes.
-    """
-    # Extract counts of articles from spinboxes
-    ABC_count = int(ABC_news_spinbox.get())
-    SBS_count = int(SBS_news_spinbox.get())
-    weatherzone_count = int(weatherzone_news_spinbox.get())
-    courier_mail_count = int(courier_mail_news_spinbox.get())
-
-    with open(HTML_file_name, "w", encoding="UTF-8") as file:
-        # Write the HTML header
-        file.write(HTML_header)
-
-        # Write ABC News articles if any
-        if ABC_count > 0:
-            for i in range(ABC_count):
-                file.write(f"""
-                        <h2>{ABC_extract[0][i]}</h2>
-                        <img src = "{ABC_extract[2][i]}" style = "width: 250px;"></img>
-                        <p class = "description">{ABC_extract[3][i]}</p>
-                        <h3 class = "date">{ABC_page_name}{ABC_extract[1][i]}]</h3>
-                        <hr class = "newsDivider">
-                        """)
-                
-        # Write SBS News articles if any
-        if SBS_count > 0:
-            for i in range(SBS_count):
-                file.write(f"""
-                        <h2>{SBS_extract[0][i]}</h2>
-                        <img src = "{SBS_extract[1][i]}" style = "width: 250px;"></img>
-                        <p class = "errorMessage">No description available for this news website</p>
-                        <h3 class = "date">{SBS_page_name}</h3>
-                        <hr class = "newsDivider">
-                        """)
-                
-        # Write Weatherzone news articles if any
-        if weatherzone_count > 0:
-            for i in range(weatherzone_count):
-                file.write(f"""
-                        <h2>{weatherzone_extract[0][i]}</h2>
-                        <p class = "errorMessage">No image available for this news website</p>
-                        <p class = "description">{weatherzone_extract[2][i]}</p>
-                        <h3 class = "date">{weatherzone_page_name}{weatherzone_extract[1][0]}]</h3>
-                        <hr class = "newsDivider">
-                        """)
-                
-        # Write Courier Mail news articles if any
-        if courier_mail_count > 0:
-            for i in range(courier_mail_count):
-                file.write(f"""
-                        <h2>{courier_mail_extract[0][i]}</h2>
-                        <p class = "errorMessage">No image available for this news website</p>
-                        <p class = "description">{courier_mail_extract[2][i]}</p>
-                        <h3 class = "date">{courier_mail_page_name}{courier_mail_extract[1][0]}]</h3>
-                        <hr class = "newsDivider">
-                        """)
+        >>> export_to_HTML(selected_articles(batches, {'ABC News': 3, 'Weatherzone': 2}))
+        ['news.html']
+    """
+    images = images or HTML_image_mode
+    thumbnails = None
+    if images != "remote":
+        thumbnails = ThumbnailCache(thumbnail_directory, max_bytes = thumbnail_cache_max_bytes, width = thumbnail_width)
+        articles = with_prefetched_images(articles, thumbnails)
+
+    # Tally rendered articles locally and count them once, keeping the per-article cost down. Linked images are
+    # remembered so that their thumbnails outlive the eviction below
+    articles_rendered = 0
+    linked_images = set()
+
+    def render_article(article):
+        nonlocal articles_rendered
+        articles_rendered += 1
+        if images == "link" and article.image:
+            linked_images.add(article.image)
+        return render_HTML_article(article, HTML_image_source(article.image, images, thumbnails) if article.image else None)
+
+    with span("export_HTML"):
+        pages = export_pages(articles, HTML_file_name, HTML_header, render_HTML_footer(), render_article,
+                             page_size = HTML_page_size, render_navigation = render_HTML_navigation)
+
+    # Only trim the thumbnail cache once every page is written, so no page loses the thumbnails it was fetched with
+    if thumbnails is not None:
+        thumbnails.evict(keep = linked_images)
+    count("articles_rendered", articles_rendered)
+    count("HTML_pages_written", len(pages))
+    return pages
+
+def save_to_SQL(articles):
+    """
+    Save news articles to an SQLite database.
+
+    This method adds any of the given articles that haven't been saved before to the SQLite database, keeping every
+    story saved on previous runs.
 
-        # Write the HTML footer
-        file.write(HTML_footer)
+    Args:
+        articles (iterable of Article): The articles to save, typically from `selected_articles`.
+
+    Returns:
+        int: The number of new stories written.
 
-def save_to_SQL():
+    Example:
+        >>> save_to_SQL(selected_articles(batches, {'ABC News': 3}))
+        3
+    """
+    with span("save_SQL"):
+        rows_written = news_store.save(articles)
+    count("rows_written", rows_written)
+    return rows_written
+
+def search_SQL(keywords = "", start_date = None, end_date = None, limit = default_search_limit, max_ranked = None):
     """
-    Save selected news articles to an SQLite database.
+    Search every story saved to the SQLite database.
+
+    Args:
+        keywords (str): Words that must all appear in the headline or description, or an empty string for any story.
+        start_date (str): The earliest publish date wanted, as "YYYY-MM-DD", or `None` for no limit.
+        end_date (str): The latest publish date wanted, as "YYYY-MM-DD", or `None` for no limit.
+        limit (int): The most stories returned.
+        max_ranked (int): The most keyword matches ranked by relevance, taking those with the latest publish dates, or
+            `None` to rank every match.
 
-    This method extracts the number of selected articles from the various news feeds based on user input from 
-    spinboxes, connects to an SQLite database (creating it if it doesn't exist), creates a table for storing news 
-    articles, clears any existing data in the table, and inserts the selected news articles into the table.
+    Returns:
+        list of Article: The matching stories, best matches first, or newest first when no keywords are given.
 
     Example:
-        >>> save_to_SQL()
-        # Saves the selected news articles to the 'news_log.db' SQLite database.
-    """
-    # Extract counts of articles from spinboxes
-    ABC_count = int(ABC_news_spinbox.get())
-    SBS_count = int(SBS_news_spinbox.get())
-    weatherzone_count = int(weatherzone_news_spinbox.get())
-    courier_mail_count = int(courier_mail_news_spinbox.get())
-    
-    # Connect to SQLite3 database (create if not exists)
-    SQL_connect = connect(SQL_db_name)
-
-    # Create a cursor object 
-    SQL_cursor = SQL_connect.cursor()
-
-    # Create a table
-    SQL_cursor.execute('''CREATE TABLE IF NOT EXISTS selected_stories (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        headline TEXT NOT NULL,
-                        news_feed TEXT NOT NULL,
-                        publication_date TEXT NOT NULL
-                    )''')
-    
-    # Clear data in table
-    SQL_cursor.execute('''DELETE FROM `selected_stories`''')
-
-    # Insert selected news articles using queries into SQLite database
-    if ABC_count > 0:
-        for i in range(ABC_count):
-            SQL_cursor.execute('''
-                                INSERT INTO selected_stories (headline, news_feed, publication_date)
-                                VALUES (?, ?, ?)
-                            ''', (ABC_extract[0][i], news_sources[0], ABC_extract[1][i]))
-    if SBS_count > 0:
-        for i in range(SBS_count):
-            SQL_cursor.execute('''
-                                INSERT INTO selected_stories (headline, news_feed, publication_date)
-                                VALUES (?, ?, ?)
-                            ''', (SBS_extract[0][i], news_sources[1], "N/A"))
-    if weatherzone_count > 0:
-        for i in range(weatherzone_count):
-            SQL_cursor.execute('''
-                                INSERT INTO selected_stories (headline, news_feed, publication_date)
-                                VALUES (?, ?, ?)
-                            ''', (weatherzone_extract[0][i], news_sources[2], weatherzone_extract[1][0]))
-    if courier_mail_count > 0:
-        for i in range(courier_mail_count):
-            SQL_cursor.execute('''
-                                INSERT INTO selected_stories (headline, news_feed, publication_date)
-                                VALUES (?, ?, ?)
-                            ''', (courier_mail_extract[0][i], news_sources[3], courier_mail_extract[1][0]))
-
-    # Commit changes
-    SQL_connect.commit()
-
-    # Close the connection
-    SQL_connect.close()
-   
-# Extract titles and dates from various article sources
-ABC_extract = regex_live_file(ABC_file_path, ABC_pattern, ABC_img_pattern)
-SBS_extract = regex_live_file(SBS_file_path, SBS_pattern, SBS_img_pattern)
-weatherzone_extract = regex_archived_file(weatherzone_file_path, 2, 1, weatherzone_date_pattern, weatherzone_description_pattern)
-courier_mail_extract = regex_archived_file(courier_mail_file_path, 1, 0, courier_mail_date_pattern, courier_mail_description_pattern)
-
-# Variables for number of available titles for each news article source
-ABC_num_titles = len(regex_live_file(ABC_file_path, ABC_pattern, ABC_img_pattern)[0])
-SBS_num_titles = len(regex_live_file(SBS_file_path, SBS_pattern, SBS_img_pattern)[0])
-weatherzone_num_titles = 6
-courier_mail_num_titles = 10
-
-root = Tk() # Create instance of tkinter class
-
-root.title(title) # Set window title
-
-# Add background image to window
-background_image = PhotoImage(file = background_image_file_path)
-background_image_label = Label(root, image = background_image)
-background_image_label.grid(row = 0, column = 0, rowspan = 3, columnspan = 3)
-
-# Title label widget
-title_label = Label(root, text = title, bg = title_colour, font = title_font)
-title_label.grid(row = 0, column = 0, columnspan = 3)
-
-## LabelFrame widget to hold all live news widgets
-live_news_labelframe = LabelFrame(root, text = "Live Weather News", bg = label_colour, font = labelframe_font, labelanchor = "n")
-live_news_labelframe.grid(row = 1, column = 0, padx = 10)
-
-# Widgets for live news
-ABC_news_label = Label(live_news_labelframe, text = "ABC News", bg = label_colour, font = label_font)
-SBS_news_label = Label(live_news_labelframe, text = "SBS News", bg = label_colour, font = label_font)
-
-ABC_news_spinbox = Spinbox(live_news_labelframe, from_ = 0, to = ABC_num_titles, width = 2, font = spinbox_font, bg = widget_colour)
-SBS_news_spinbox = Spinbox(live_news_labelframe, from_ = 0, to = SBS_num_titles, width = 2, font = spinbox_font, bg = widget_colour)
-
-# Grid live news widgets
-ABC_news_label.grid(row = 0, column = 0, padx = 10)
-SBS_news_label.grid(row = 1, column = 0, padx = 10)
-
-ABC_news_spinbox.grid(row = 0, column = 2, padx = 10, pady = 15)
-SBS_news_spinbox.grid(row = 1, column = 2, padx = 10, pady = 15)
-
-# Frame widget to hold all button widgets
-button_frame = Frame(root, bg = label_colour)
-button_frame.grid(row = 1, column = 1, padx = 10)
-
-# Button widgets
-preview_button = Button(button_frame, text = "Preview Selections", bg = widget_colour, activebackground = label_colour, command = preview_selections)
-export_button = Button(button_frame, text = "Export Selections", bg = widget_colour, activebackground = label_colour, command = export_to_HTML)
-save_button = Button(button_frame, text = "Save Selections", bg = widget_colour, activebackground = label_colour, command = save_to_SQL)
-
-# Pack all button widgets
-preview_button.pack(padx = 15, pady = 10)
-export_button.pack(padx = 15, pady = 10, fill = X)
-save_button.pack(padx = 15, pady = 10, fill = X)
-
-# LabelFrame widget to hold all old news widgets
-old_news_labelframe = LabelFrame(root, text = "Old Weather News", bg = label_colour, font = labelframe_font, labelanchor = "n")
-old_news_labelframe.grid(row = 1, column = 2)
-
-# Widgets for old news
-weatherzone_news_label = Label(old_news_labelframe, text = "Weatherzone News", bg = label_colour, font = label_font)
-courier_mail_news_label = Label(old_news_labelframe, text = "Courier Mail News", bg = label_colour, font = label_font)
-
-weatherzone_news_spinbox = Spinbox(old_news_labelframe, from_ = 0, to = weatherzone_num_titles, width = 2, font = spinbox_font, bg = widget_colour)
-courier_mail_news_spinbox = Spinbox(old_news_labelframe, from_ = 0, to = courier_mail_num_titles, width = 2, font = spinbox_font, bg = widget_colour)
-
-# Grid old news widgets
-weatherzone_news_label.grid(row = 0, column = 0, padx = 10)
-courier_mail_news_label.grid(row = 1, column = 0, padx = 10)
-
-weatherzone_news_spinbox.grid(row = 0, column = 2, padx = 10, pady = 15)
-courier_mail_news_spinbox.grid(row = 1, column = 2, padx = 10, pady = 15)
-
-# Frame widget to hold all widgets involving news previewing
-preview_frame = Frame(root)
-preview_frame.grid(row = 2, column = 0, columnspan = 3)
-
-# Widgets for news previewing
-news_preview_text = Text(preview_frame, width = 80, height = 5, bg = label_colour, font = listbox_font, wrap = WORD, state = DISABLED, spacing1 = 5, spacing3 = 10)
-news_preview_scrollbar = Scrollbar(preview_frame, orient = 'vertical')
-
-# Link both news previewing text and scrollbar widgets
-news_preview_text.config(yscrollcommand = news_preview_scrollbar.set)
-news_preview_scrollbar.config(command = news_preview_text.yview)
-
-# Pack all news previewing widgets
-news_preview_text.pack(side = LEFT)
-news_preview_scrollbar.pack(side = RIGHT, fill = Y)
+        >>> search_SQL("hail", start_date = "2024-05-01")
+        [Article('ABC News', 'Hail smashes south-east', date = '2024-05-20T01:00:00Z')]
+    """
+    return news_store.search(keywords, start_date, end_date, limit, max_ranked)
+
+def ingest_SQL(directory, workers = None):
+    """
+    Save every story in a directory tree of archived RSS snapshots to the SQLite database.
+
+    Snapshots are attributed to news sources by the option in their file name, e.g. "2019-10-14-courier-mail.xml"
+    belongs to Courier Mail. Snapshots ingested on an earlier run are skipped unless they have changed.
+
+    Args:
+        directory (str): The string path of the directory tree holding the snapshots.
+        workers (int): The number of parsing processes, or `None` for one per CPU.
+
+    Returns:
+        IngestSummary: The number of files parsed, files skipped and new stories saved.
+
+    Example:
+        >>> ingest_SQL("data/xml_files")
+        IngestSummary(files_parsed=2, files_skipped=0, new_stories=16)
+    """
+    with span("ingest"):
+        summary = ingest_snapshots(directory, news_store, {source.option: source.name for source in sources}, workers)
+    count("snapshots_parsed", summary.files_parsed)
+    count("snapshots_skipped", summary.files_skipped)
+    count("rows_written", summary.new_stories)
+    return summary
+
+# Store for saved stories, sharing one connection for the whole session
+news_store = NewsStore(SQL_db_name)
+register(news_store.close)
+
+def parse_arguments(argv = None):
+    """
+    Parse the command line.
+
+    Args:
+        argv (list of str): The arguments to parse, or `None` to use `sys.argv`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments, with `command` set to `None` when the GUI should be shown.
+    """
+    parser = ArgumentParser(prog = "python -m weather_news_mixer", description = "Mix weather news from several sources. "
+                            "Run without a command to open the GUI.")
+    parser.add_argument("--keep-duplicates", action = "store_true", help = "keep stories covered by more than one source")
+    parser.add_argument("--metrics", default = metrics_file_path, metavar = "FILE",
+                        help = "write stage timings and counters on exit, as Prometheus text to a .prom or .txt file or "
+                               "appended as JSON lines to any other file (default: $WEATHER_NEWS_MIXER_METRICS)")
+
+    # Counts for each source, mirroring the spinboxes, shared by every command
+    counts_parser = ArgumentParser(add_help = False)
+    for source in sources:
+        counts_parser.add_argument("--" + source.option, dest = source.name, type = int, metavar = "N",
+                                   help = f"number of {source.name} articles (default: all)")
+
+    subparsers = parser.add_subparsers(dest = "command")
+    subparsers.add_parser("fetch", help = "fetch every source and print how many articles each has")
+    subparsers.add_parser("preview", parents = [counts_parser], help = "print a preview of the selected articles")
+    export_parser = subparsers.add_parser("export-html", parents = [counts_parser], help = f"export the selected articles to {HTML_file_name}")
+    export_parser.add_argument("--images", choices = HTML_image_modes, default = HTML_image_mode,
+                               help = "embed image thumbnails in the page, link to thumbnail files, or link to the original images "
+                                      f"(default: {HTML_image_mode})")
+    subparsers.add_parser("save-sql", parents = [counts_parser], help = f"save the selected articles to {SQL_db_name}")
+
+    # Searching reads the saved stories only, without fetching any source
+    search_parser = subparsers.add_parser("search", help = f"search the stories saved to {SQL_db_name}")
+    search_parser.add_argument("keywords", nargs = "*", help = "words that must all appear in the headline or description")
+    search_parser.add_argument("--from", dest = "start_date", metavar = "YYYY-MM-DD", help = "earliest publish date")
+    search_parser.add_argument("--to", dest = "end_date", metavar = "YYYY-MM-DD", help = "latest publish date")
+    search_parser.add_argument("--limit", type = int, default = default_search_limit, metavar = "N",
+                               help = f"most stories to show (default: {default_search_limit})")
+    search_parser.add_argument("--rank", type = int, default = 0, metavar = "N",
+                               help = "rank only the N keyword matches with the latest publish dates (default: rank every match)")
+
+    # Ingesting reads archived snapshots only, without fetching any source
+    ingest_parser = subparsers.add_parser("ingest", help = f"save every story in a directory tree of dated RSS snapshots to {SQL_db_name}")
+    ingest_parser.add_argument("directory", help = 'directory of snapshots named like "2019-10-14-courier-mail.xml"')
+    ingest_parser.add_argument("--workers", type = int, metavar = "N", help = "number of parsing processes (default: one per CPU)")
+
+    # Serving refreshes the sources in the background rather than fetching them up front
+    serve_parser = subparsers.add_parser("serve", help = "serve the mixed feed over HTTP as JSON, RSS and HTML")
+    serve_parser.add_argument("--host", default = "127.0.0.1", help = "address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type = int, default = 8080, help = "port to listen on (default: 8080)")
+    serve_parser.add_argument("--interval", type = float, default = 15 * 60, metavar = "SECONDS",
+                              help = "seconds between refreshes of the news sources (default: 900)")
+
+    return parser.parse_args(argv)
+
+def main(argv = None):
+    """
+    Run the mixer from the command line, or open the GUI when no command is given.
+
+    Tkinter is only imported for the GUI, so every command also works on headless machines. The whole run is
+    profiled with cProfile when the `WEATHER_NEWS_MIXER_PROFILE` environment variable names a file to save to.
+
+    Args:
+        argv (list of str): The arguments to parse, or `None` to use `sys.argv`.
+
+    Examples:
+        $ python -m weather_news_mixer fetch
+        $ python -m weather_news_mixer export-html --abc 5 --sbs 0 --weatherzone 3 --courier-mail 2
+        $ python -m weather_news_mixer search hail --from 2024-05-01
+        $ python -m weather_news_mixer ingest archive/ --workers 8
+        $ python -m weather_news_mixer serve --port 8080 --interval 300
+        $ python -m weather_news_mixer --metrics metrics.prom save-sql
+    """
+    arguments = parse_arguments(argv)
+
+    try:
+        with profiling(profile_file_path):
+            run_command(arguments)
+    finally:
+        if arguments.metrics:
+            metrics.write(arguments.metrics)
+
+def run_command(arguments):
+    """
+    Run the command given on the command line.
+
+    Args:
+        arguments (argparse.Namespace): The arguments from `parse_arguments`.
+    """
+    if arguments.command is None:
+        from mixer_gui import run_gui
+        run_gui()
+        return
+
+    if arguments.command == "ingest":
+        summary = ingest_SQL(arguments.directory, arguments.workers)
+        print(f"Parsed {summary.files_parsed} snapshots, skipped {summary.files_skipped} already ingested, "
+              f"saved {summary.new_stories} new stories to {SQL_db_name}")
+        return
+
+    if arguments.command == "serve":
+        from api_server import run_API_server
+        run_API_server(arguments.host, arguments.port, arguments.interval, deduplicate = not arguments.keep_duplicates)
+        return
+
+    if arguments.command == "search":
+        for article in search_SQL(" ".join(arguments.keywords), arguments.start_date, arguments.end_date, arguments.limit,
+                                  arguments.rank or None):
+            print(preview_line(article))
+        return
+
+    batches = load_articles(deduplicate = not arguments.keep_duplicates)
+
+    if arguments.command == "fetch":
+        for source, batch in batches.items():
+            print(f"{source}: {len(batch)} articles")
+        return
+
+    # Take every article from a source unless a count was given for it
+    counts = {}
+    for source in sources:
+        requested = getattr(arguments, source.name)
+        counts[source.name] = available_titles(source, batches[source.name]) if requested is None else requested
+    articles = selected_articles(batches, counts)
+
+    if arguments.command == "preview":
+        with span("preview"):
+            for article in articles:
+                print(preview_line(article))
+    elif arguments.command == "export-html":
+        for page in export_to_HTML(articles, arguments.images):
+            print(f"Wrote {page}")
+    elif arguments.command == "save-sql":
+        print(f"Saved {save_to_SQL(articles)} new stories to {SQL_db_name}")
+
+if __name__ == "__main__":
+    main()
 
-# Display Tkinter GUI
-root.mainloop()
\ No newline at end of file